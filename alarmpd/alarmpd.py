@@ -29,11 +29,14 @@ renaming one of them), rather than silently picking one.
 
 Fading: set fade_duration in alarmpd.conf to the number of seconds it
 should take to go from 0 to 100% volume (0 disables fading, jumping
-straight to the target volume). An alarm's own "max=" suffix caps how far
-it fades, at the same seconds-per-percent rate, so a lower cap finishes
-faster. Turning the volume down manually while fading restarts the ramp,
-which doubles as a snooze -- alarmpd only stops adjusting the volume once
-it reaches the target.
+straight to the target volume), and fade_curve to its shape. An alarm's
+own "max=" suffix caps how far it fades, at the same seconds-per-percent
+rate, so a lower cap finishes faster. Turning the volume down manually
+while fading restarts the ramp from there, which doubles as a snooze --
+alarmpd only stops adjusting the volume once it reaches the target.
+
+`alarmpd.py --upcoming N` lists the next N firings without starting the
+daemon.
 
 Connection settings (host/port/password) come from
 ~/.config/mpd-scripts/alarmpd/alarmpd.conf, seeded from alarmpd.conf.example
@@ -43,12 +46,15 @@ single invocation.
 
 import argparse
 import configparser
+import heapq
+import itertools
 import logging
 import os
 import re
+import select
 import signal
-import subprocess
 import sys
+import threading
 import time
 from dataclasses import dataclass
 from datetime import date, datetime, time as dt_time, timedelta
@@ -56,6 +62,11 @@ from datetime import date, datetime, time as dt_time, timedelta
 from mpd import MPDClient, CommandError
 from mpd import ConnectionError as MPDConnectionError
 
+from mpd_hooks import HookRunner
+from mpd_logging import setup_logging, logging_options
+from mpd_profiling import install_sampling_profiler, profile_run
+from mpd_ramp import CURVES, Fade, MixerWatcher, Ramp, abort_idle
+
 CONFIG_DIR = os.path.join(os.path.expanduser("~"), ".config", "mpd-scripts", "alarmpd")
 CONFIG_FILE = os.path.join(CONFIG_DIR, "alarmpd.conf")
 
@@ -156,6 +167,117 @@ def parse_entry(playlist_name: str, default_max_volume: int) -> "Schedule | None
     return None
 
 
+class AlarmQueue:
+    """Every parsed alarm schedule, in a heap keyed by its next occurrence.
+
+    update() applies a fresh list of stored playlist names incrementally:
+    names it has already seen aren't re-parsed, new ones are pushed, and
+    removed or renamed ones are dropped lazily (their heap entries are
+    skipped when they surface). Firing an alarm advances just that entry
+    to its next occurrence, so keeping the queue current costs O(log n)
+    per change rather than re-sorting every schedule.
+    """
+
+    def __init__(self, default_max_volume: int):
+        self._default_max_volume = default_max_volume
+        self._parsed = {}  # playlist name -> Schedule, or None if not an alarm
+        self._heap = []  # [occurrence, tiebreak, Schedule]
+        self._counter = itertools.count()
+        self._utc_offset = None
+
+    def __len__(self) -> int:
+        return sum(1 for schedule in self._parsed.values() if schedule is not None)
+
+    def _live(self, entry) -> bool:
+        schedule = entry[2]
+        return self._parsed.get(schedule.playlist_name) is schedule
+
+    def _push(self, schedule: Schedule, now: datetime) -> None:
+        occurrence = schedule.next_occurrence(now)
+        if occurrence is not None:  # Past one-shot alarms never come back
+            heapq.heappush(self._heap, [occurrence, next(self._counter), schedule])
+
+    def _rebuild(self, now: datetime) -> None:
+        self._heap = []
+        for schedule in self._parsed.values():
+            if schedule is not None:
+                self._push(schedule, now)
+        self._utc_offset = now.utcoffset()
+
+    def update(self, playlist_names, now: datetime) -> None:
+        parsed = {}
+        for name in playlist_names:
+            if name in self._parsed:
+                parsed[name] = self._parsed[name]
+            else:
+                parsed[name] = schedule = parse_entry(name, self._default_max_volume)
+                if schedule is not None:
+                    self._push(schedule, now)
+        self._parsed = parsed
+        # Drop dead entries in one pass once they outnumber live ones, so a
+        # long run of generated one-shot alarms doesn't grow the heap forever.
+        if len(self._heap) > 2 * len(self) + 16:
+            self._rebuild(now)
+
+    def resync(self, now: datetime) -> None:
+        """Recompute every occurrence if the local UTC offset has changed
+        (a DST switch), since they were computed in the old one."""
+        if now.utcoffset() != self._utc_offset:
+            self._rebuild(now)
+
+    def _pop_dead(self) -> None:
+        while self._heap and not self._live(self._heap[0]):
+            heapq.heappop(self._heap)
+
+    def peek(self):
+        """Return (time, schedule) for the soonest alarm, or (None, None)
+        if there is none. If two different playlists share the soonest
+        slot, schedule is None: collisions are refused rather than
+        resolved silently."""
+        self._pop_dead()
+        if not self._heap:
+            return None, None
+        first = heapq.heappop(self._heap)
+        self._pop_dead()
+        tied = bool(self._heap) and self._heap[0][0] == first[0]
+        heapq.heappush(self._heap, first)
+        return first[0], (None if tied else first[2])
+
+    def at(self, when: datetime) -> list:
+        """Every schedule due at exactly `when` (to name a collision)."""
+        return sorted((entry[2] for entry in self._heap if entry[0] == when and self._live(entry)),
+                      key=lambda schedule: schedule.playlist_name)
+
+    def advance(self, when: datetime) -> None:
+        """Move every schedule due at or before `when` on to its next
+        occurrence after it -- call once an alarm has fired (or a
+        collision has been skipped)."""
+        after = when + timedelta(seconds=1)
+        while self._heap and self._heap[0][0] <= when:
+            entry = heapq.heappop(self._heap)
+            if self._live(entry):
+                self._push(entry[2], after)
+
+    def upcoming(self, count: int, now: datetime) -> list:
+        """The next `count` firings as (time, schedule, collides) tuples,
+        simulated on a copy of the heap. A "~" skip counts as one firing
+        (which skips it); the ones after come from the restored name."""
+        heap = [list(entry) for entry in self._heap if self._live(entry) and entry[0] >= now]
+        heapq.heapify(heap)
+        firings = []
+        while heap and len(firings) < count:
+            when, _, schedule = heapq.heappop(heap)
+            collides = (bool(heap) and heap[0][0] == when) or (bool(firings) and firings[-1][0] == when)
+            firings.append((when, schedule, collides))
+            if schedule.skip_once:
+                schedule = parse_entry(schedule.playlist_name[1:], self._default_max_volume)
+            if schedule is not None:
+                occurrence = schedule.next_occurrence(when + timedelta(seconds=1))
+                if occurrence is not None:
+                    heapq.heappush(heap, [occurrence, next(self._counter), schedule])
+        return firings
+
+
 def load_config() -> configparser.SectionProxy:
     """Load ~/.config/mpd-scripts/alarmpd/alarmpd.conf, seeding it from the
     alarmpd.conf.example template shipped alongside this script on first run.
@@ -189,12 +311,31 @@ def check_permissions() -> None:
         sys.exit(1)
 
 
-class AlarmDaemon:
-    """Polls MPD's stored playlists for alarm schedules, fires the soonest
-    one when its time comes, and (optionally) fades the volume in."""
+def warm_file(path: str, nbytes: int) -> float:
+    """Ask for the first `nbytes` of `path` to be read ahead, and read its
+    first block so the disk it's on is definitely spinning. Returns the
+    seconds that took; raises OSError if the file can't be read."""
+    started = time.monotonic()
+    with open(path, "rb", buffering=0) as f:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, nbytes, os.POSIX_FADV_WILLNEED)
+        f.read(min(nbytes, 64 * 1024))
+    return time.monotonic() - started
 
-    def __init__(self, host, port, password=None, interval=20, fade_duration=600,
-                 default_max_volume=100, pre_hook="", post_hook="", verbose=False):
+
+class AlarmDaemon:
+    """Reads alarm schedules from MPD's stored playlist names, sleeps until
+    the soonest one is due, fires it, and (optionally) fades the volume in.
+
+    Playlists are only re-read when a second connection, parked in
+    `idle stored_playlist` on its own thread, reports a change; between
+    changes the daemon sends MPD nothing and only wakes for the next alarm,
+    a fade step, or the `interval` clock re-check."""
+
+    def __init__(self, host, port, password=None, interval=60, fade_duration=600,
+                 default_max_volume=100, pre_hook="", post_hook="", verbose=False,
+                 logging_opts=None, fade_curve="linear", max_concurrent_hooks=4, hook_timeout=60.0,
+                 preroll_seconds=60, preroll_mb=8, music_directory=""):
         self._host = host
         self._port = port
         self._password = password
@@ -202,38 +343,53 @@ class AlarmDaemon:
         # Seconds-per-percent, derived from a total 0->100 duration so a
         # lower per-alarm "max=" cap finishes proportionally faster instead
         # of needing its own separate duration setting.
-        self._fade_tick_interval = fade_duration / 100.0 if fade_duration > 0 else 0
+        self._fade_seconds_per_percent = fade_duration / 100.0 if fade_duration > 0 else 0
+        self._fade_curve = fade_curve
         self._default_max_volume = default_max_volume
         self._pre_hook = pre_hook
         self._post_hook = post_hook
+        self._preroll_seconds = max(0, preroll_seconds)
+        self._preroll_bytes = max(0, preroll_mb) * 1024 * 1024
+        self._music_directory = music_directory
         self._verbose = verbose
 
         self._client = MPDClient()
         self._running = False
-        self._fading = False
-        self._fade_target = 100
-        self._fade_last_tick = 0.0
+        self._fade = None
+        self._mixer = None
         self._scheduled_time = None
         self._scheduled_schedule = None
-
-        log_level = logging.DEBUG if verbose else logging.INFO
-        logging.basicConfig(
-            filename=LOG_FILE if not verbose else None,
-            level=log_level,
-            format="%(asctime)s - %(levelname)s - %(message)s",
-        )
+        self._prerolled = None  # (time, playlist name) of the alarm pre-rolled last
+        self._queue = AlarmQueue(default_max_volume)
+        self._playlists_changed = threading.Event()
+        self._playlists_changed.set()
+        self._watch_client = None
+        self._wake_r = self._wake_w = None
+
+        # Console logging in verbose mode; otherwise a size-rotated LOG_FILE
+        # (or journald, per log_target), written from a background thread
+        # so log I/O never delays a fade tick.
+        if verbose:
+            setup_logging("alarmpd", level=logging.DEBUG, console=True)
+        else:
+            setup_logging("alarmpd", LOG_FILE, **(logging_opts or {}))
         self._logger = logging.getLogger("alarmpd")
+        self._hooks = HookRunner(self._logger, max_concurrent_hooks, hook_timeout)
 
     def log(self, message: str, level: int = logging.INFO) -> None:
         if self._verbose:
             print(f"[alarmpd] {message}")
         self._logger.log(level, message)
 
-    def connect(self) -> None:
-        self._client = MPDClient()
-        self._client.connect(self._host, self._port)
+    def _new_client(self) -> MPDClient:
+        client = MPDClient()
+        client.connect(self._host, self._port)
         if self._password:
-            self._client.password(self._password)
+            client.password(self._password)
+        return client
+
+    def connect(self) -> None:
+        self._client = self._new_client()
         self.log(f"Connected to MPD at {self._host}:{self._port}.")
 
     def connect_with_retry(self) -> None:
@@ -249,61 +405,137 @@ class AlarmDaemon:
                 self.log(f"Failed to connect to MPD ({e}). Retrying in 5s...", logging.WARNING)
                 time.sleep(5)
 
+    def ensure_connected(self) -> None:
+        """The command connection sits unused between playlist changes,
+        easily long enough for MPD's connection_timeout to close it, so
+        check it (and quietly reconnect) before using it."""
+        try:
+            self._client.ping()
+        except (MPDConnectionError, OSError):
+            self._client = self._new_client()
+            self._logger.debug("Reconnected the MPD command connection.")
+
     def handle_signal(self, signum, frame) -> None:
+        # The wakeup fd installed by run() is what interrupts its sleep.
         self.log("Stopping alarmpd...")
         self._running = False
 
-    def _iter_schedules(self):
-        for entry in self._client.listplaylists():
-            schedule = parse_entry(entry["playlist"], self._default_max_volume)
-            if schedule is not None:
-                yield schedule
-
-    def compute_next(self, now: datetime):
-        """Return (time, schedule) for the soonest alarm, or (None, None)
-        if there is none -- including when the soonest slot is a tie
-        between two different playlists, which is refused rather than
-        resolved silently."""
-        candidates = []
-        for schedule in self._iter_schedules():
-            occurrence = schedule.next_occurrence(now)
-            if occurrence is not None:
-                candidates.append((occurrence, schedule))
-
-        if not candidates:
-            return None, None
+    def _watch_playlists(self) -> None:
+        """Background thread: flag a rescan (and wake the main loop) on
+        every `stored_playlist` idle event. Reconnecting also flags one,
+        since changes made while disconnected were never reported."""
+        while self._running:
+            try:
+                self._watch_client = self._new_client()
+                while self._running:
+                    self._playlists_changed.set()
+                    self._wake()
+                    self._watch_client.idle("stored_playlist")
+            except (MPDConnectionError, CommandError, OSError) as e:
+                if self._running:
+                    self.log(f"Playlist watch connection lost ({e}). Retrying in 5s...", logging.WARNING)
+                    time.sleep(5)
+
+    def _wake(self) -> None:
+        try:
+            os.write(self._wake_w, b"\0")
+        except (BlockingIOError, OSError):
+            pass  # Pipe already full (a wakeup is pending anyway) or closed at shutdown
+
+    def _sleep(self, seconds: float) -> None:
+        """Sleep up to `seconds`, returning early on a signal or a playlist
+        change."""
+        readable, _, _ = select.select([self._wake_r], [], [], max(0.0, seconds))
+        if readable:
+            try:
+                os.read(self._wake_r, 4096)
+            except BlockingIOError:
+                pass
 
-        candidates.sort(key=lambda c: c[0])
-        soonest_time = candidates[0][0]
-        tied = [c for c in candidates if c[0] == soonest_time]
-        if len(tied) > 1:
-            names = ", ".join(repr(schedule.playlist_name) for _, schedule in tied)
+    def rescan(self, now: datetime) -> None:
+        """Re-read the stored playlist names into the alarm queue."""
+        self._playlists_changed.clear()
+        try:
+            self.ensure_connected()
+            entries = self._client.listplaylists()
+        except Exception:
+            self._playlists_changed.set()
+            raise
+        self._queue.update((entry["playlist"] for entry in entries), now)
+        self._logger.debug("Rescanned stored playlists: %d alarm(s).", len(self._queue))
+
+    def maybe_reschedule(self) -> None:
+        """Pick up the soonest alarm from the queue, logging it (or the
+        collision keeping it from being scheduled) when it changes."""
+        new_time, new_schedule = self._queue.peek()
+        if new_time == self._scheduled_time and new_schedule is self._scheduled_schedule:
+            return
+        self._scheduled_time = new_time
+        self._scheduled_schedule = new_schedule
+        if new_time is None:
+            return
+        if new_schedule is None:
+            names = ", ".join(repr(schedule.playlist_name) for schedule in self._queue.at(new_time))
             self.log(
-                f"Multiple alarms scheduled for the same time ({soonest_time}): {names}. "
+                f"Multiple alarms scheduled for the same time ({new_time}): {names}. "
                 "Refusing to schedule either until this is resolved.",
                 logging.ERROR,
             )
-            return None, None
-
-        return tied[0]
+        else:
+            self.log(f"Next alarm: {new_schedule.playlist_name!r} at {new_time}")
+
+    def _preroll_due(self, now: datetime) -> bool:
+        return (
+            self._preroll_seconds > 0
+            and self._scheduled_schedule is not None
+            and not self._scheduled_schedule.skip_once
+            and self._prerolled != (self._scheduled_time, self._scheduled_schedule.playlist_name)
+            and now >= self._scheduled_time - timedelta(seconds=self._preroll_seconds)
+        )
 
-    def maybe_reschedule(self, now: datetime) -> None:
-        new_time, new_schedule = self.compute_next(now)
-        if new_time != self._scheduled_time:
-            self._scheduled_time = new_time
-            self._scheduled_schedule = new_schedule
-            if new_time is not None:
-                self.log(f"Next alarm: {new_schedule.playlist_name!r} at {new_time}")
+    def preroll(self, schedule: Schedule) -> None:
+        """Ahead of an alarm: resolve its first track, start reading that
+        file into the page cache (spinning up a sleeping music disk), and
+        run the pre-alarm hook, so that playback starts on time."""
+        self._prerolled = (self._scheduled_time, schedule.playlist_name)
+        self.log(f"Pre-rolling alarm {schedule.playlist_name!r}.")
+        self._hooks.run("pre_alarm_hook", self._pre_hook)
 
-    def run_hook(self, command: str) -> None:
-        if not command:
+        try:
+            uris = self._client.listplaylist(schedule.playlist_name)
+        except CommandError as e:
+            # Renamed or deleted since it was scheduled; the rescan that
+            # follows drops it, and the pre-roll is only a warm-up anyway.
+            self.log(f"Couldn't pre-roll {schedule.playlist_name!r}: {e}", logging.WARNING)
+            return
+        if not uris or "://" in uris[0]:
+            return  # Empty, or a stream -- nothing on disk to warm up
+        music_directory = self._music_directory or self._mpd_music_directory()
+        if not music_directory or self._preroll_bytes == 0:
             return
+        path = os.path.join(music_directory, uris[0])
+        threading.Thread(target=self._warm_file, args=(path,), name="preroll", daemon=True).start()
+
+    def _mpd_music_directory(self) -> str:
+        """MPD's music_directory, which it only reveals over a local (unix
+        socket) connection; "" if it won't say."""
+        try:
+            return self._client.config()
+        except CommandError:
+            self._logger.debug("MPD won't report music_directory; set it in %s to warm up files.", CONFIG_FILE)
+            return ""
+
+    def _warm_file(self, path: str) -> None:
+        """Background thread, since a sleeping disk can take seconds to
+        answer even open() -- see warm_file()."""
         try:
-            subprocess.Popen(command, shell=True)
+            elapsed = warm_file(path, self._preroll_bytes)
         except OSError as e:
-            self.log(f"Failed to run hook {command!r}: {e}", logging.WARNING)
+            self.log(f"Couldn't warm up {path}: {e}", logging.WARNING)
+            return
+        self._logger.debug("Warmed up %s in %.1fs.", path, elapsed)
 
-    def fire_alarm(self, schedule: Schedule) -> None:
+    def fire_alarm(self, schedule: Schedule, pre_hook: bool = True) -> None:
         if schedule.skip_once:
             self.log(f"Skipping alarm {schedule.playlist_name!r} (one-time skip).")
             restored_name = schedule.playlist_name[1:]
@@ -314,64 +546,115 @@ class AlarmDaemon:
             return
 
         self.log(f"Firing alarm: {schedule.playlist_name!r}")
-        self.run_hook(self._pre_hook)
+        if pre_hook:
+            self._hooks.run("pre_alarm_hook", self._pre_hook)
 
         offset = len(self._client.playlistinfo())
-        self._client.load(schedule.playlist_name)
+        try:
+            self._client.load(schedule.playlist_name)
+        except CommandError as e:
+            self.log(f"Alarm {schedule.playlist_name!r} failed: {e}", logging.ERROR)
+            return
 
-        if self._fade_tick_interval > 0:
+        if self._fade_seconds_per_percent > 0:
             self._client.setvol(0)
-            self._fading = True
-            self._fade_target = schedule.max_volume
-            self._fade_last_tick = time.monotonic()
+            self.start_fade(schedule.max_volume)
         else:
             self._client.setvol(schedule.max_volume)
 
         self._client.play(offset)
 
-        if not self._fading:
-            self.run_hook(self._post_hook)
-
-    def fade_tick(self) -> None:
-        """Advance the volume fade by one step, if enough time has passed
-        since the last one. Stops (and fires the post-alarm hook) once the
-        target volume is reached -- turning the volume down manually before
-        then just makes this ramp again on the next tick, which is the
-        snooze mechanism."""
-        if time.monotonic() - self._fade_last_tick < self._fade_tick_interval:
-            return
-        self._fade_last_tick = time.monotonic()
+        if self._fade is None:
+            self._hooks.run("post_alarm_hook", self._post_hook)
+
+    def start_fade(self, target: int) -> None:
+        """Begin fading from 0 up to `target`. Manual volume changes are
+        picked up from a separate `idle mixer` connection rather than by
+        polling `status`."""
+        ramp = Ramp(0, target, self._fade_seconds_per_percent * target, self._fade_curve)
+        self._mixer = MixerWatcher(self._new_client).start()
+        self._fade = Fade(
+            ramp,
+            lambda level: self._client.setvol(level),
+            lambda: self._mixer.volume,
+            keep_rate=True,
+            on_manual=lambda level: self.log(f"Volume changed to {level}% mid-fade, ramping from there."),
+        )
 
-        current_volume = int(self._client.status().get("volume", 0))
-        if current_volume >= self._fade_target:
-            self._fading = False
-            self.run_hook(self._post_hook)
-            return
-        self._client.setvol(current_volume + 1)
+    def fade_tick(self):
+        """Bring the volume fade up to date. Returns the monotonic time the
+        next step is due, or None once the target volume is reached, which
+        also fires the post-alarm hook. Turning the volume down manually
+        before then restarts the ramp from there at the same rate, which is
+        the snooze mechanism."""
+        next_step = self._fade.step()
+        if next_step is None:
+            self._mixer.stop()
+            self._mixer = None
+            self._fade = None
+            self._hooks.run("post_alarm_hook", self._post_hook)
+        return next_step
 
     def run(self) -> None:
         self._running = True
         signal.signal(signal.SIGTERM, self.handle_signal)
         signal.signal(signal.SIGINT, self.handle_signal)
+        install_sampling_profiler("alarmpd", self.log)
+
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        signal.set_wakeup_fd(self._wake_w)
 
         self.connect_with_retry()
+        threading.Thread(target=self._watch_playlists, name="playlist-watch", daemon=True).start()
         self.log("alarmpd started.")
 
         while self._running:
             now = datetime.now().astimezone()
+            next_fade_step = None
             try:
-                self.maybe_reschedule(now)
+                if self._playlists_changed.is_set():
+                    self.rescan(now)
+                self._queue.resync(now)
+                self.maybe_reschedule()
+                if self._preroll_due(now):
+                    self.ensure_connected()
+                    self.preroll(self._scheduled_schedule)
                 if self._scheduled_time is not None and now >= self._scheduled_time:
-                    self.fire_alarm(self._scheduled_schedule)
-                    self._scheduled_time = None
-                    self._scheduled_schedule = None
-                if self._fading:
-                    self.fade_tick()
+                    # A collision (no schedule) is skipped rather than fired.
+                    if self._scheduled_schedule is not None:
+                        self.ensure_connected()
+                        prerolled = self._prerolled == (self._scheduled_time, self._scheduled_schedule.playlist_name)
+                        self.fire_alarm(self._scheduled_schedule, pre_hook=not prerolled)
+                    self._queue.advance(self._scheduled_time)
+                    self.maybe_reschedule()
+                if self._fade is not None:
+                    next_fade_step = self.fade_tick()
             except (MPDConnectionError, OSError):
                 self.log("Lost connection to MPD, reconnecting...", logging.WARNING)
                 self.connect_with_retry()
 
-            time.sleep(1 if self._fading else self._interval)
+            # Sleep until whichever comes first: the next fade step, the
+            # next alarm, or the interval clock re-check (which catches
+            # suspend/resume and clock changes, and costs no MPD traffic).
+            # A playlist change or a signal cuts it short.
+            timeout = self._interval
+            if next_fade_step is not None:
+                timeout = min(timeout, next_fade_step - time.monotonic())
+            elif self._fade is not None:
+                timeout = min(timeout, 1)
+            if self._scheduled_time is not None:
+                wake_at = self._scheduled_time
+                if self._preroll_due(wake_at):  # Still to pre-roll, so wake for that first
+                    wake_at -= timedelta(seconds=self._preroll_seconds)
+                timeout = min(timeout, (wake_at - datetime.now().astimezone()).total_seconds())
+            self._sleep(timeout)
+
+        signal.set_wakeup_fd(-1)
+        if self._watch_client is not None:
+            abort_idle(self._watch_client)
+        self.log(f"alarmpd stopped. Hooks: {self._hooks.stats()}")
 
     def fire_test(self, playlist_name: str) -> None:
         """Fire a named playlist immediately, for verifying fade/volume/hook
@@ -394,9 +677,10 @@ class AlarmDaemon:
             schedule = Schedule(playlist_name, frozenset(), None, dt_time(0, 0), self._default_max_volume, False)
 
         self.fire_alarm(schedule)
-        while self._running and self._fading:
-            time.sleep(1)
-            self.fade_tick()
+        while self._running and self._fade is not None:
+            next_step = self.fade_tick()
+            if next_step is not None:
+                time.sleep(max(0.0, next_step - time.monotonic()))
         self.log("Test alarm complete.")
 
     def prune_expired(self, now: datetime) -> list:
@@ -415,6 +699,18 @@ class AlarmDaemon:
                 removed.append(name)
         return removed
 
+    def upcoming(self, count: int) -> list:
+        """Connect, read the schedules, and return the next `count`
+        firings -- see AlarmQueue.upcoming()."""
+        try:
+            self.connect()
+        except (MPDConnectionError, OSError) as e:
+            print(f"Failed to connect to MPD: {e}", file=sys.stderr)
+            sys.exit(1)
+        now = datetime.now().astimezone()
+        self.rescan(now)
+        return self._queue.upcoming(count, now)
+
     def run_prune(self) -> None:
         """Connect, delete expired one-shot alarm playlists, print what was
         removed, then return -- doesn't enter the daemon loop."""
@@ -432,17 +728,55 @@ class AlarmDaemon:
             print("No expired one-shot alarms found.")
 
 
+def print_upcoming(firings: list) -> None:
+    if not firings:
+        print("No upcoming alarms.")
+        return
+    for when, schedule, collides in firings:
+        note = ""
+        if collides:
+            note = "  (collision -- won't fire)"
+        elif schedule.skip_once:
+            note = "  (skipped once)"
+        print(f"{when:%a %Y-%m-%d %H:%M}  {schedule.playlist_name}  [max {schedule.max_volume}%]{note}")
+
+
+def daemon_options(config: configparser.SectionProxy) -> dict:
+    """Read alarmpd.conf's alarm, fade, hook and pre-roll settings as
+    keyword arguments for AlarmDaemon (everything but the connection and
+    logging settings). Also used by mpd-host's alarm plugin. Raises
+    ValueError for an unknown fade_curve."""
+    fade_curve = config.get("fade_curve", fallback="linear")
+    if fade_curve not in CURVES:
+        raise ValueError(f"Unknown fade_curve {fade_curve!r} in {CONFIG_FILE} (expected one of {', '.join(CURVES)})")
+    return {
+        "interval": config.getint("interval", fallback=60),
+        "fade_duration": config.getint("fade_duration", fallback=600),
+        "fade_curve": fade_curve,
+        "default_max_volume": config.getint("default_max_volume", fallback=100),
+        "pre_hook": config.get("pre_alarm_hook", fallback=""),
+        "post_hook": config.get("post_alarm_hook", fallback=""),
+        "max_concurrent_hooks": config.getint("max_concurrent_hooks", fallback=4),
+        "hook_timeout": config.getfloat("hook_timeout", fallback=60),
+        "preroll_seconds": config.getint("preroll_seconds", fallback=60),
+        "preroll_mb": config.getint("preroll_mb", fallback=8),
+        "music_directory": os.path.expanduser(config.get("music_directory", fallback="")),
+    }
+
+
 def build_daemon(args: argparse.Namespace, config: configparser.SectionProxy) -> AlarmDaemon:
+    try:
+        options = daemon_options(config)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
     return AlarmDaemon(
         host=args.host or config.get("mpd_host", fallback="localhost"),
         port=args.port or config.getint("mpd_port", fallback=6600),
         password=args.password or config.get("mpd_password", fallback="") or None,
-        interval=config.getint("interval", fallback=20),
-        fade_duration=config.getint("fade_duration", fallback=600),
-        default_max_volume=config.getint("default_max_volume", fallback=100),
-        pre_hook=config.get("pre_alarm_hook", fallback=""),
-        post_hook=config.get("post_alarm_hook", fallback=""),
         verbose=args.verbose,
+        logging_opts=logging_options(config),
+        **options,
     )
 
 
@@ -500,6 +834,8 @@ if __name__ == "__main__":
                          help="Immediately fire the named playlist as a test alarm, then exit")
     parser.add_argument("--prune", action="store_true",
                          help="Delete expired one-shot alarm playlists, then exit")
+    parser.add_argument("--upcoming", metavar="N", type=int, default=None,
+                         help="List the next N alarm firings, then exit")
     cli_args = parser.parse_args()
 
     if cli_args.stop:
@@ -509,9 +845,14 @@ if __name__ == "__main__":
         cli_config = load_config()
         alarm_daemon = build_daemon(cli_args, cli_config)
         if cli_args.prune:
-            alarm_daemon.run_prune()
+            with profile_run("alarmpd-prune"):
+                alarm_daemon.run_prune()
+        elif cli_args.upcoming is not None:
+            with profile_run("alarmpd-upcoming"):
+                print_upcoming(alarm_daemon.upcoming(cli_args.upcoming))
         elif cli_args.test:
-            alarm_daemon.fire_test(cli_args.test)
+            with profile_run("alarmpd-test"):
+                alarm_daemon.fire_test(cli_args.test)
         elif cli_args.verbose:
             alarm_daemon.run()
         else:
@@ -12,6 +12,7 @@ set -e  # Exit on error
 
 INSTALL_DIR="$HOME/bin"
 SCRIPT_NAME="alarmpd.py"
+SHARED_MODULES="mpd_hooks.py mpd_logging.py mpd_profiling.py mpd_ramp.py"  # From ../common, symlinked here; imported by the script
 CONF_EXAMPLE="alarmpd.conf.example"
 UNIT_NAME="alarmpd.service"
 UNIT_DIR="$HOME/.config/systemd/user"  # Per-user systemd unit search path
@@ -26,6 +27,9 @@ pip3 install --user python-mpd2
 echo "Copying daemon script to $INSTALL_DIR/$SCRIPT_NAME..."
 cp "$SCRIPT_NAME" "$INSTALL_DIR/$SCRIPT_NAME"
 chmod +x "$INSTALL_DIR/$SCRIPT_NAME"
+for f in $SHARED_MODULES; do
+    cp "$f" "$INSTALL_DIR/$f"
+done
 cp "$CONF_EXAMPLE" "$INSTALL_DIR/$CONF_EXAMPLE"
 
 mkdir -p "$UNIT_DIR"
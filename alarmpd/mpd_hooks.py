@@ -0,0 +1 @@
+../common/mpd_hooks.py
\ No newline at end of file
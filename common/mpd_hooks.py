@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+mpd_hooks
+
+Runs the daemons' user-configured shell hooks (alarmpd's pre/post-alarm
+hooks, mpd-auto-stop's warning/stop hooks) without ever letting them build
+up in a process that stays up for weeks:
+
+  - at most `max_concurrent` hooks run at once; one fired while the cap is
+    reached is skipped (and logged) rather than queued behind a hung one
+  - each hook gets `timeout` seconds, then SIGTERM, then SIGKILL five
+    seconds later; it runs in its own session, so that reaches anything
+    the shell started too
+  - one reaper thread waits on every hook, so none is left a zombie
+
+Every hook's start, exit status and duration is logged, and running totals
+are kept in stats().
+"""
+
+import logging
+import os
+import signal
+import subprocess
+import threading
+import time
+
+KILL_GRACE_SECONDS = 5.0
+
+# How often the reaper checks on running hooks. It only wakes at all while
+# at least one is running.
+POLL_SECONDS = 0.25
+
+
+class _RunningHook:
+    __slots__ = ("name", "process", "started_at", "deadline", "terminated_at")
+
+    def __init__(self, name: str, process: subprocess.Popen, started_at: float, deadline: float):
+        self.name = name
+        self.process = process
+        self.started_at = started_at
+        self.deadline = deadline
+        self.terminated_at = None
+
+
+class HookRunner:
+    """Runs shell hooks in the background with a concurrency cap, a
+    per-hook timeout, and a reaper thread. Never raises: a missing or
+    broken hook shouldn't affect the daemon running it."""
+
+    def __init__(self, logger: logging.Logger, max_concurrent: int = 4, timeout: float = 60.0):
+        self._logger = logger
+        self._max_concurrent = max(1, max_concurrent)
+        self._timeout = timeout
+        self._running = []
+        self._cond = threading.Condition()
+        self._reaper = None
+        self._stats = {
+            "started": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "timed_out": 0,
+            "skipped": 0,
+            "running": 0,
+            "total_seconds": 0.0,
+            "max_seconds": 0.0,
+        }
+
+    def run(self, name: str, command: str) -> bool:
+        """Start `command` under the label `name`. Returns False if it
+        wasn't started (blank command, cap reached, or failed to spawn)."""
+        if not command:
+            return False
+        with self._cond:
+            if len(self._running) >= self._max_concurrent:
+                self._stats["skipped"] += 1
+                self._logger.warning("Skipping hook %s: %d hooks already running", name, len(self._running))
+                return False
+            try:
+                process = subprocess.Popen(command, shell=True, stdin=subprocess.DEVNULL, start_new_session=True)
+            except OSError as e:
+                self._stats["failed"] += 1
+                self._logger.warning("Failed to run hook %s (%r): %s", name, command, e)
+                return False
+
+            now = time.monotonic()
+            deadline = now + self._timeout if self._timeout > 0 else None
+            self._running.append(_RunningHook(name, process, now, deadline))
+            self._stats["started"] += 1
+            self._stats["running"] = len(self._running)
+            self._logger.info("Hook %s started (pid %d)", name, process.pid)
+
+            if self._reaper is None:
+                self._reaper = threading.Thread(target=self._reap, name="hook-reaper", daemon=True)
+                self._reaper.start()
+            self._cond.notify()
+        return True
+
+    def stats(self) -> dict:
+        """Running totals since startup: started, succeeded, failed,
+        timed_out, skipped, currently running, and total/max seconds."""
+        with self._cond:
+            stats = dict(self._stats)
+        stats["total_seconds"] = round(stats["total_seconds"], 3)
+        stats["max_seconds"] = round(stats["max_seconds"], 3)
+        return stats
+
+    def _reap(self) -> None:
+        with self._cond:
+            while True:
+                while not self._running:
+                    self._cond.wait()
+                now = time.monotonic()
+                for hook in list(self._running):
+                    returncode = hook.process.poll()
+                    if returncode is not None:
+                        self._running.remove(hook)
+                        self._finished(hook, returncode, now)
+                    elif hook.terminated_at is not None:
+                        if now - hook.terminated_at >= KILL_GRACE_SECONDS:
+                            self._signal(hook, signal.SIGKILL)
+                    elif hook.deadline is not None and now >= hook.deadline:
+                        self._logger.warning("Hook %s timed out after %gs, terminating it", hook.name, self._timeout)
+                        hook.terminated_at = now
+                        self._signal(hook, signal.SIGTERM)
+                self._stats["running"] = len(self._running)
+                if self._running:
+                    self._cond.wait(POLL_SECONDS)
+
+    def _finished(self, hook: _RunningHook, returncode: int, now: float) -> None:
+        elapsed = now - hook.started_at
+        self._stats["total_seconds"] += elapsed
+        self._stats["max_seconds"] = max(self._stats["max_seconds"], elapsed)
+        if hook.terminated_at is not None:
+            self._stats["timed_out"] += 1
+            self._logger.warning("Hook %s killed after %.1fs", hook.name, elapsed)
+        elif returncode == 0:
+            self._stats["succeeded"] += 1
+            self._logger.info("Hook %s exited 0 after %.1fs", hook.name, elapsed)
+        else:
+            self._stats["failed"] += 1
+            self._logger.warning("Hook %s exited %d after %.1fs", hook.name, returncode, elapsed)
+
+    @staticmethod
+    def _signal(hook: _RunningHook, signum: int) -> None:
+        try:
+            os.killpg(hook.process.pid, signum)
+        except (ProcessLookupError, PermissionError):
+            pass
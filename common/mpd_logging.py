@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+"""
+Logging setup shared by this repo's long-running daemons.
+
+setup_logging() replaces each daemon's own logging.basicConfig()/
+FileHandler setup with three things they all want on an always-on
+player:
+
+- Size-based rotation: the log file is rotated to <file>.1, <file>.2, ...
+  once it reaches a configured size, keeping a fixed number of old copies,
+  so months of uptime can't fill an SD card.
+- An optional journald-only mode that writes no log file at all.
+- Off-thread writes: every record goes through a QueueHandler, and a
+  single QueueListener thread does the formatting and the actual disk (or
+  journal) I/O, so a slow disk never stalls an idle loop or HTTP handler.
+
+Each daemon reads the log_target/log_max_kb/log_backup_count settings
+from its own config file via logging_options().
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+DEFAULT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+# journald timestamps every entry itself.
+JOURNALD_FORMAT = "%(levelname)s - %(message)s"
+
+LOG_TARGETS = ("file", "journald")
+DEFAULT_MAX_KB = 1024
+DEFAULT_BACKUP_COUNT = 3
+
+_queue = None
+_listener = None
+
+
+def logging_options(section):
+    """Read the log_target, log_max_kb and log_backup_count settings from a
+    configparser section (or None, for a config file predating them) as
+    keyword arguments for setup_logging()."""
+    if section is None:
+        return {}
+    return {
+        "target": section.get("log_target", fallback="file").strip().lower(),
+        "max_bytes": section.getint("log_max_kb", fallback=DEFAULT_MAX_KB) * 1024,
+        "backup_count": section.getint("log_backup_count", fallback=DEFAULT_BACKUP_COUNT),
+    }
+
+
+def _journald_handler(identifier):
+    """Log straight to the journal if python-systemd is installed; otherwise
+    to stderr, which journald captures for anything run as a systemd unit
+    (and for most desktop sessions' autostart entries)."""
+    try:
+        from systemd.journal import JournalHandler
+    except ImportError:
+        handler = logging.StreamHandler(sys.stderr)
+    else:
+        handler = JournalHandler(SYSLOG_IDENTIFIER=identifier)
+    handler.setFormatter(logging.Formatter(JOURNALD_FORMAT))
+    return handler
+
+
+def _start_listener(handlers):
+    global _listener
+    _listener = logging.handlers.QueueListener(_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def _restart_listener_after_fork():
+    # The listener thread doesn't survive fork(), so a daemon that sets up
+    # logging before forking into the background would otherwise queue
+    # records forever with nothing writing them out.
+    if _listener is not None:
+        _start_listener(_listener.handlers)
+
+
+def _stop_listener():
+    # Flushes anything still queued before the process exits.
+    if _listener is not None:
+        _listener.stop()
+
+
+def setup_logging(identifier, log_file=None, *, level=logging.INFO, console=False,
+                  target="file", max_bytes=DEFAULT_MAX_KB * 1024,
+                  backup_count=DEFAULT_BACKUP_COUNT, fmt=DEFAULT_FORMAT):
+    """Configure the root logger to write through a background thread.
+
+    With target="file", records go to log_file (if given), rotated at
+    max_bytes with backup_count old copies kept, and also to stderr if
+    console is True. With target="journald", they go only to the journal
+    and log_file/console are ignored. `identifier` names the daemon in the
+    journal. Only the first call in a process takes effect.
+    """
+    global _queue
+    if _queue is not None:
+        return
+
+    handlers = []
+    if target == "journald":
+        handlers.append(_journald_handler(identifier))
+    else:
+        if log_file:
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=max_bytes, backupCount=backup_count
+            )
+            file_handler.setFormatter(logging.Formatter(fmt))
+            handlers.append(file_handler)
+        if console or not handlers:
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(logging.Formatter(fmt))
+            handlers.append(console_handler)
+
+    _queue = queue.SimpleQueue()
+    _start_listener(handlers)
+    os.register_at_fork(after_in_child=_restart_listener_after_fork)
+    atexit.register(_stop_listener)
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(logging.handlers.QueueHandler(_queue))
+
+    if target not in LOG_TARGETS:
+        logging.getLogger(identifier).warning(
+            "Unknown log_target %r (expected one of: %s); logging to file.", target, ", ".join(LOG_TARGETS)
+        )
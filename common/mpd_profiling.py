@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+
+"""
+Opt-in CPU profiling shared by this repo's Python tools and daemons.
+
+Everything here is a no-op unless MPD_SCRIPTS_PROFILE is set to a
+directory in the tool's environment, e.g.:
+
+    MPD_SCRIPTS_PROFILE=~/profiles randomtrack.py 50
+
+One-shot tools wrap their entry point in profile_run(), which writes one
+cProfile/pstats dump per run (view with `python3 -m pstats <file>`, or
+snakeviz/gprof2dot).
+
+Long-running daemons call install_sampling_profiler() instead, since a
+cProfile dump covering weeks of uptime is neither cheap nor useful.
+Sending the process SIGUSR2 starts a low-overhead sampling profiler; a
+second SIGUSR2 stops it and writes what it saw in collapsed-stack format
+(one "frame;frame;frame count" line per distinct stack), ready for
+flamegraph.pl, speedscope, or inferno. A daemon exiting while sampling is
+still on writes its samples on the way out too.
+"""
+
+import atexit
+import cProfile
+import collections
+import contextlib
+import os
+import signal
+import sys
+import threading
+from datetime import datetime
+
+PROFILE_ENV = "MPD_SCRIPTS_PROFILE"
+
+# Seconds between samples. 10ms is coarse enough that sampling itself
+# stays well under 1% CPU on a Raspberry Pi, fine enough to show where an
+# idle loop actually spends its time.
+SAMPLE_INTERVAL_ENV = "MPD_SCRIPTS_PROFILE_INTERVAL"
+DEFAULT_SAMPLE_INTERVAL = 0.01
+
+
+def profile_dir():
+    """Return the directory profiles should be written to (creating it if
+    needed), or None if MPD_SCRIPTS_PROFILE isn't set."""
+    raw = os.environ.get(PROFILE_ENV, "").strip()
+    if not raw:
+        return None
+    directory = os.path.expanduser(raw)
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def _output_path(directory, tool_name, extension):
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    return os.path.join(directory, f"{tool_name}-{stamp}-{os.getpid()}.{extension}")
+
+
+@contextlib.contextmanager
+def profile_run(tool_name):
+    """Profile everything run inside this block with cProfile, writing
+    <tool_name>-<timestamp>-<pid>.pstats to the profile directory when it
+    exits -- including via sys.exit() or an exception, since a run that
+    dies partway through is often the one worth looking at."""
+    directory = profile_dir()
+    if directory is None:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        path = _output_path(directory, tool_name, "pstats")
+        profiler.dump_stats(path)
+        print(f"[profile] Wrote {path}", file=sys.stderr)
+
+
+def _frame_label(code):
+    # ";" separates frames in the collapsed format, so it can't appear
+    # inside a single frame's label.
+    label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    return label.replace(";", ":")
+
+
+class SamplingProfiler:
+    """Periodically snapshots every thread's Python stack from a background
+    thread, counting identical stacks, until stopped."""
+
+    def __init__(self, tool_name, directory, interval=DEFAULT_SAMPLE_INTERVAL, log=None):
+        self._tool_name = tool_name
+        self._directory = directory
+        self._interval = interval
+        self._log = log or (lambda message: print(message, file=sys.stderr))
+        self._samples = collections.Counter()
+        self._stop_event = None
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def toggle(self, signum=None, frame=None):
+        """SIGUSR2 handler: start sampling if stopped, stop and write the
+        collapsed stacks if running."""
+        if self.running:
+            self.stop()
+        else:
+            self.start()
+
+    def start(self):
+        if self.running:
+            return
+        self._samples = collections.Counter()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(
+            target=self._sample_loop, args=(self._stop_event,), name="mpd-profiler", daemon=True
+        )
+        self._thread.start()
+        self._log(f"Sampling profiler started (every {self._interval * 1000:.0f}ms); send SIGUSR2 again to stop.")
+
+    def stop(self):
+        """Stop sampling and write the collapsed stacks, returning the path
+        written (or None if sampling wasn't running)."""
+        if not self.running:
+            return None
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        self._stop_event = None
+
+        path = _output_path(self._directory, self._tool_name, "collapsed")
+        with open(path, "w") as f:
+            for stack, count in self._samples.most_common():
+                f.write(f"{stack} {count}\n")
+        self._log(f"Sampling profiler stopped: {sum(self._samples.values())} samples written to {path}")
+        return path
+
+    def _sample_loop(self, stop_event):
+        own_ident = threading.get_ident()
+        while not stop_event.wait(self._interval):
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(thread_names.get(ident, f"thread-{ident}"))
+                stack.reverse()
+                self._samples[";".join(stack)] += 1
+
+
+def install_sampling_profiler(tool_name, log=None):
+    """If MPD_SCRIPTS_PROFILE is set, make SIGUSR2 toggle a SamplingProfiler
+    for this process and return it; otherwise do nothing and return None.
+
+    Must be called from the main thread, like any signal.signal() call.
+    `log` is a one-argument callable for status messages (the daemon's
+    own logger), defaulting to stderr.
+    """
+    directory = profile_dir()
+    if directory is None:
+        return None
+
+    try:
+        interval = float(os.environ.get(SAMPLE_INTERVAL_ENV, "") or DEFAULT_SAMPLE_INTERVAL)
+    except ValueError:
+        interval = DEFAULT_SAMPLE_INTERVAL
+
+    log = log or (lambda message: print(message, file=sys.stderr))
+    profiler = SamplingProfiler(tool_name, directory, interval, log)
+    signal.signal(signal.SIGUSR2, profiler.toggle)
+    atexit.register(profiler.stop)
+    log(f"Profiling enabled: send SIGUSR2 (kill -USR2 {os.getpid()}) to start/stop sampling into {directory}.")
+    return profiler
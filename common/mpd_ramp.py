@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+mpd_ramp
+
+The volume ramp engine behind every fade in this repo (alarmpd's fade-in,
+mpd-auto-stop's fade-out, mpc-fade.sh's fades).
+
+A Ramp is the pure schedule: which integer volume MPD should be at, on the
+monotonic clock, for a fade from `start` to `target` over `duration`
+seconds along one of these curves:
+
+    linear  constant %/sec
+    log     each 1% step's dwell time weighted by 1/level (floored at 1%),
+            so quiet levels get proportionally more time -- mpc-fade.sh's
+            original -L curve
+    db      straight line in decibels (volume% taken as amplitude, 0%
+            treated as -60 dB), which lingers even longer near silence and
+            reaches 0 smoothly instead of from the 1% floor
+
+A Fade drives a Ramp against MPD. It sends `setvol` only when the integer
+level actually changes, sleeping until exactly the moment the next change
+is due rather than waking on a fixed tick. Given a way to read the current
+volume that costs no round trip -- a MixerWatcher's `idle mixer`
+connection, or a status cache kept by one -- it spots volumes it never set
+itself, i.e. someone changing the volume by hand, and carries on from
+there.
+
+Run directly, it fades MPD (MPD_HOST/MPD_PORT, like mpc) from its current
+volume to a target; that's what mpc-fade.sh uses when it's installed
+alongside it:
+
+    mpd_ramp.py TARGET SECONDS [--curve linear|log|db]
+"""
+
+import argparse
+import math
+import os
+import socket
+import sys
+import threading
+import time
+
+from mpd import MPDClient, CommandError
+from mpd import ConnectionError as MPDConnectionError
+
+CURVES = ("linear", "log", "db")
+DB_FLOOR = -60.0
+QUANTIZE_SLACK = 1  # How far a mixer may round a setvol before it reads as a manual change
+
+
+def _curve_value(curve: str, start: int, target: int, fraction: float) -> float:
+    if curve == "log":
+        low, high = max(start, 1), max(target, 1)
+        return low * (high / low) ** fraction
+    if curve == "db":
+        def to_db(volume):
+            return 20 * math.log10(volume / 100) if volume > 0 else DB_FLOOR
+        level_db = to_db(start) + (to_db(target) - to_db(start)) * fraction
+        return 0.0 if level_db <= DB_FLOOR else 100 * 10 ** (level_db / 20)
+    return start + (target - start) * fraction
+
+
+class Ramp:
+    """A fade from `start` to `target` volume over `duration` seconds,
+    starting now on `clock`."""
+
+    def __init__(self, start: int, target: int, duration: float, curve: str = "linear", clock=time.monotonic):
+        if curve not in CURVES:
+            raise ValueError(f"Unknown fade curve {curve!r} (expected one of {', '.join(CURVES)})")
+        self.start = int(start)
+        self.target = int(target)
+        self.duration = max(0.0, float(duration))
+        self.curve = curve
+        self.clock = clock
+        self.started_at = clock()
+        self.ends_at = self.started_at + self.duration
+
+    @property
+    def rising(self) -> bool:
+        return self.target > self.start
+
+    def level(self, now: float) -> int:
+        """The integer volume MPD should be at, at monotonic time `now`."""
+        if now >= self.ends_at or self.duration == 0:
+            return self.target
+        fraction = max(0.0, (now - self.started_at) / self.duration)
+        value = round(_curve_value(self.curve, self.start, self.target, fraction))
+        # Never overshoot the target because of rounding or the log floor.
+        return min(value, self.target) if self.rising else max(value, self.target)
+
+    def next_step_at(self, now: float):
+        """The monotonic time level() next changes after `now`, or None
+        once the target has been reached."""
+        current = self.level(now)
+        if current == self.target:
+            return None
+        low, high = now, self.ends_at
+        for _ in range(40):  # level() is monotonic in time, so bisect for the change
+            middle = (low + high) / 2
+            if self.level(middle) == current:
+                low = middle
+            else:
+                high = middle
+        return high
+
+    def rebase(self, volume: int, now: float, keep_rate: bool = False) -> "Ramp":
+        """A new ramp continuing from `volume` at `now` to the same target.
+        By default it ends when this one would have; with keep_rate it
+        keeps this one's %/sec instead, so a longer way to go takes longer
+        (alarmpd's turn-it-down-to-snooze)."""
+        if keep_rate:
+            span = abs(self.target - self.start)
+            duration = abs(self.target - volume) * self.duration / span if span else 0.0
+        else:
+            duration = self.ends_at - now
+        return Ramp(volume, self.target, duration, self.curve, self.clock)
+
+
+class Fade:
+    """Drives a Ramp: `set_volume(level)` whenever the level changes, and,
+    given `current_volume()` (returning an int, or None if unknown), a
+    rebase whenever the volume turns out to be neither the last level it
+    confirmed nor one of its own still on the way (or within
+    QUANTIZE_SLACK of the newest of those) -- so turning it back down to a
+    level the fade already passed counts as a manual change.
+    A manual change that already reaches or passes the target ends the
+    fade instead of turning it around."""
+
+    def __init__(self, ramp: Ramp, set_volume, current_volume=None, keep_rate: bool = False, on_manual=None):
+        self.ramp = ramp
+        self._set_volume = set_volume
+        self._current_volume = current_volume
+        self._keep_rate = keep_rate
+        self._on_manual = on_manual
+        # Levels sent but not yet seen back from current_volume(), oldest
+        # first, and the last level that was.
+        self._in_flight = []
+        self._confirmed = ramp.start
+        self._last = ramp.start
+        self.finished = False
+
+    def step(self):
+        """Bring the volume up to date. Returns the monotonic time the next
+        step is due, or None once the fade is finished."""
+        if self.finished:
+            return None
+        now = self.ramp.clock()
+
+        if self._current_volume is not None:
+            volume = self._current_volume()
+            if volume is not None and volume in self._in_flight:
+                # One of our own setvols coming back; anything sent before
+                # it has been overtaken.
+                del self._in_flight[:self._in_flight.index(volume) + 1]
+                self._confirmed = volume
+            elif volume is not None and self._in_flight and abs(volume - self._in_flight[-1]) <= QUANTIZE_SLACK:
+                # The newest one, rounded by a hardware mixer with coarser
+                # steps than 1% (setvol 47 reading back as 46).
+                self._in_flight.clear()
+                self._confirmed = volume
+            elif volume is not None and volume != self._confirmed:
+                self._in_flight.clear()
+                self._confirmed = volume
+                self._last = volume
+                if self._on_manual is not None:
+                    self._on_manual(volume)
+                if volume >= self.ramp.target if self.ramp.rising else volume <= self.ramp.target:
+                    self.finished = True
+                    return None
+                self.ramp = self.ramp.rebase(volume, now, self._keep_rate)
+
+        level = self.ramp.level(now)
+        if level != self._last:
+            self._set_volume(level)
+            self._in_flight.append(level)
+            self._last = level
+
+        next_at = self.ramp.next_step_at(now)
+        if next_at is None:
+            self.finished = True
+        return next_at
+
+    def run(self, cancel_event: threading.Event = None) -> bool:
+        """Step until finished, sleeping between steps. Returns False if
+        cancel_event was set partway through."""
+        while True:
+            next_at = self.step()
+            if next_at is None:
+                return True
+            delay = max(0.0, next_at - self.ramp.clock())
+            if cancel_event is not None:
+                if cancel_event.wait(timeout=delay):
+                    return False
+            else:
+                time.sleep(delay)
+
+
+class MixerWatcher:
+    """Keeps its own MPD connection in `idle mixer` on a background thread
+    and remembers the current volume, for a Fade's current_volume when
+    the caller has no idle connection of its own. `connect` returns a new,
+    connected MPDClient."""
+
+    def __init__(self, connect):
+        self._connect = connect
+        self._client = None
+        self._stopped = threading.Event()
+        self.volume = None
+
+    def start(self) -> "MixerWatcher":
+        threading.Thread(target=self._run, name="mpd-mixer-watch", daemon=True).start()
+        return self
+
+    def _run(self) -> None:
+        try:
+            self._client = self._connect()
+            while not self._stopped.is_set():
+                self.volume = _parse_volume(self._client.status())
+                self._client.idle("mixer")
+        except (MPDConnectionError, CommandError, OSError):
+            pass
+        finally:
+            self.volume = None
+            if self._client is not None:
+                try:
+                    self._client.disconnect()
+                except Exception:
+                    pass
+
+    def stop(self) -> None:
+        """Wake the thread out of idle, after which it disconnects and
+        exits."""
+        self._stopped.set()
+        if self._client is not None:
+            abort_idle(self._client)
+
+
+def abort_idle(client: MPDClient) -> None:
+    """Break another thread's blocking idle() on `client` by shutting its
+    socket down, so that idle() raises ConnectionError. Closing the
+    client instead would block on the reader that idle() is holding."""
+    try:
+        with socket.socket(fileno=os.dup(client.fileno())) as sock:
+            sock.shutdown(socket.SHUT_RDWR)
+    except (MPDConnectionError, OSError):
+        pass  # Already disconnected
+
+
+def _parse_volume(status: dict):
+    try:
+        volume = int(status.get("volume", -1))
+    except ValueError:
+        return None
+    return volume if volume >= 0 else None  # -1: no mixer
+
+
+def connect() -> MPDClient:
+    """Connect to MPD using MPD_HOST/MPD_PORT, the same way mpc does."""
+    host = os.environ.get("MPD_HOST", "localhost")
+    password = None
+    if "@" in host and not host.startswith("@"):  # "@..." is an abstract socket, not a password
+        password, host = host.split("@", 1)
+    port = int(os.environ.get("MPD_PORT", "6600"))
+
+    client = MPDClient()
+    client.connect(host, port)
+    if password:
+        client.password(password)
+    return client
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fade MPD's volume from its current level to TARGET")
+    parser.add_argument("target", type=int, help="Volume to fade to (0-100)")
+    parser.add_argument("seconds", type=float, help="Fade duration in seconds")
+    parser.add_argument("--curve", choices=CURVES, default="linear", help="Fade curve (default: linear)")
+    args = parser.parse_args()
+
+    try:
+        client = connect()
+        start = _parse_volume(client.status())
+    except (MPDConnectionError, CommandError, OSError) as e:
+        sys.exit(f"Cannot reach MPD: {e}")
+    if start is None:
+        sys.exit("MPD has no volume control (no mixer configured).")
+
+    watcher = MixerWatcher(connect).start()
+    target = max(0, min(100, args.target))
+    try:
+        Fade(Ramp(start, target, args.seconds, args.curve), client.setvol, lambda: watcher.volume).run()
+    except KeyboardInterrupt:
+        sys.exit(130)
+    finally:
+        watcher.stop()
+        client.disconnect()
+
+
+if __name__ == "__main__":
+    from mpd_profiling import profile_run  # Only needed when run directly, e.g. by mpc-fade.sh
+
+    with profile_run("mpd-ramp"):
+        main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+mpd_volume
+
+The engine behind the volume scripts (volume.py, mpdvolup.py,
+mpdvoldown.py), shared by both variants in volume/.
+
+Each invocation reads volume.conf, opens one MPD connection, and makes its
+change in as few round trips as the request allows:
+
+    up/down, no cap      `volume +N` / `volume -N`: MPD (0.23+) applies the
+                         change itself, so nothing is read first
+    up with maxVolume    `status`, then `setvol`, since the cap needs the
+                         current level
+    MPD older than 0.23  `status`, then `setvol`
+
+The connection goes through python-mpd2 if it's installed and the caller
+wants it, and otherwise over a plain socket that speaks just the few
+commands needed here, so the scripts work with no Python library at all.
+The mpc variant always uses the plain socket; the python-mpd variant only
+falls back to it when python-mpd2 is missing.
+"""
+
+import configparser
+import os
+import socket
+import sys
+
+try:
+    from mpd import MPDClient, CommandError
+    from mpd import ConnectionError as MPDConnectionError
+except ImportError:  # The plain socket below does the job on its own
+    MPDClient = None
+
+CONFIG_FILE = os.path.expanduser("~/.config/mpd-scripts/volume/volume.conf")
+TIMEOUT = 10  # Seconds; a key binding shouldn't hang forever on a dead server
+
+
+class VolumeError(Exception):
+    """MPD refused a command (an ACK) or broke off the conversation."""
+
+
+if MPDClient is not None:
+    MPD_ERRORS = (VolumeError, OSError, CommandError, MPDConnectionError)
+else:
+    MPD_ERRORS = (VolumeError, OSError)
+
+
+def _quote(word: str) -> str:
+    return '"' + word.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+class RawClient:
+    """Just enough of MPD's protocol for the volume scripts, over a plain
+    socket, with the same method names as python-mpd2's MPDClient."""
+
+    def __init__(self, host: str, port: int, timeout: float = TIMEOUT):
+        if host.startswith("/"):
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.settimeout(timeout)
+            self._sock.connect(host)
+        else:
+            self._sock = socket.create_connection((host, port), timeout)
+        self._file = self._sock.makefile("rb")
+        greeting = self._file.readline().decode("utf-8", "replace")
+        if not greeting.startswith("OK MPD "):
+            self._sock.close()
+            raise VolumeError(f"Not an MPD server (greeting {greeting.strip()!r})")
+        self.mpd_version = greeting[len("OK MPD "):].strip()
+
+    def _command(self, name: str, *args: str) -> dict:
+        line = " ".join([name] + [_quote(arg) for arg in args])
+        self._sock.sendall(line.encode("utf-8") + b"\n")
+        result = {}
+        for raw in self._file:
+            line = raw.decode("utf-8", "replace").rstrip("\n")
+            if line == "OK":
+                return result
+            if line.startswith("ACK "):
+                raise VolumeError(line.split("} ", 1)[-1])
+            key, _, value = line.partition(": ")
+            result[key] = value
+        raise VolumeError("Connection closed by MPD")
+
+    def password(self, password: str) -> None:
+        self._command("password", password)
+
+    def status(self) -> dict:
+        return self._command("status")
+
+    def setvol(self, volume) -> None:
+        self._command("setvol", str(volume))
+
+    def volume(self, change) -> None:
+        self._command("volume", str(change))
+
+    def close(self) -> None:
+        try:
+            self._sock.sendall(b"close\n")
+        except OSError:
+            pass
+
+    def disconnect(self) -> None:
+        self._file.close()
+        self._sock.close()
+
+
+def read_config(path: str = CONFIG_FILE) -> dict:
+    """Read volume.conf, exiting with an error if it doesn't exist (the
+    variant's install.sh creates it)."""
+    if not os.path.isfile(path):
+        print(f"Error: MPD extended configuration file (volume.conf) not found at {path}")
+        sys.exit(1)
+
+    config = configparser.ConfigParser()
+    config.read(path)
+    return {
+        'host': config.get('MPD', 'host', fallback='localhost'),
+        'port': config.getint('MPD', 'port', fallback=6600),
+        'password': config.get('MPD', 'password', fallback=''),
+        'volUp': config.getint('MPD-SCRIPTS', 'volUp', fallback=5),
+        'volDown': config.getint('MPD-SCRIPTS', 'volDown', fallback=5),
+        'toggleMaxVolume': config.getboolean('MPD-SCRIPTS', 'toggleMaxVolume', fallback=False),
+        'maxVolume': config.getint('MPD-SCRIPTS', 'maxVolume', fallback=80),
+    }
+
+
+def connect(mpd_config: dict, use_library: bool = True):
+    """Open and authenticate one connection: python-mpd2's MPDClient if
+    use_library and it's installed, a RawClient otherwise."""
+    if use_library and MPDClient is not None:
+        client = MPDClient()
+        client.timeout = TIMEOUT
+        client.connect(mpd_config['host'], mpd_config['port'])
+    else:
+        client = RawClient(mpd_config['host'], mpd_config['port'])
+    if mpd_config['password']:
+        client.password(mpd_config['password'])
+    return client
+
+
+def supports_relative_volume(client) -> bool:
+    """Whether the server takes `volume +N`/`volume -N` (MPD 0.23+)."""
+    try:
+        major, minor = (int(part) for part in client.mpd_version.split(".")[:2])
+    except (AttributeError, ValueError):
+        return False
+    return (major, minor) >= (0, 23)
+
+
+def current_volume(client):
+    """MPD's volume as an int, or None if it has no mixer to control."""
+    volume = int(client.status().get('volume', -1))
+    return volume if volume >= 0 else None
+
+
+def change_volume(client, delta: int, max_volume=None) -> int:
+    """Change the volume by delta, capping an increase at max_volume if
+    given. Returns the change requested of MPD: the capped one if the
+    current level had to be read, otherwise delta as asked."""
+    if max_volume is None or delta <= 0:
+        if supports_relative_volume(client):
+            client.volume(f"{delta:+d}")
+            return delta
+    current = current_volume(client)
+    if current is None:
+        raise VolumeError("MPD has no volume control (no mixer configured)")
+    new_volume = max(0, min(100, current + delta))
+    if max_volume is not None and delta > 0:
+        new_volume = min(new_volume, max_volume)
+    client.setvol(new_volume)
+    return new_volume - current
+
+
+def run(direction, amount=None, usage: str = "", use_library: bool = True) -> int:
+    """What each volume script does, over one connection. With no
+    direction, prints usage and the current volume; otherwise moves it
+    'up' or 'down' by amount (volUp/volDown from volume.conf if None).
+    Returns the exit status."""
+    mpd_config = read_config()
+    try:
+        client = connect(mpd_config, use_library)
+    except MPD_ERRORS as e:
+        print(f"Error: couldn't connect to MPD at {mpd_config['host']}:{mpd_config['port']}: {e}")
+        return 1
+
+    try:
+        if direction is None:
+            volume = current_volume(client)
+            print(f"{usage}\nCurrent volume: {'Unknown' if volume is None else f'{volume}%'}")
+        elif direction == 'up':
+            if amount is None:
+                amount = mpd_config['volUp']
+            max_volume = mpd_config['maxVolume'] if mpd_config['toggleMaxVolume'] else None
+            print(f"Volume increased by {change_volume(client, amount, max_volume)} units.")
+        else:
+            if amount is None:
+                amount = mpd_config['volDown']
+            print(f"Volume decreased by {-change_volume(client, -amount)} units.")
+    except MPD_ERRORS as e:
+        print(f"Error: {e}")
+        return 1
+    finally:
+        try:
+            client.close()
+            client.disconnect()
+        except MPD_ERRORS:
+            pass
+    return 0
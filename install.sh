@@ -14,9 +14,9 @@
 #    alongside it, e.g. a .conf.example template or a stations list) into
 #    the directory chosen in step 2, and installs MPD Notifier via its own
 #    installer.
-# 5. Offers to install the optional MPD Rewind Daemon, mpd-smart-shuffle,
-#    alarmpd, mpd-auto-stop, and volume control scripts, each delegating to
-#    its own installer.
+# 5. Offers to install the optional MPD Rewind Daemon, MPD Auto-Bookmark
+#    Daemon, mpd-smart-shuffle, alarmpd, mpd-auto-stop, mpd-host, and volume
+#    control scripts, each delegating to its own installer.
 #
 # Run this once; no manual copying into your PATH is needed afterwards.
 
@@ -274,31 +274,36 @@ install_dependencies() {
 # file(s)". Companions travel alongside their script because each one
 # resolves its own directory at runtime (dirname "$0" / FindBin::RealBin /
 # __file__) to find its .conf.example template, station list, or shared
-# module -- so they'd fail on first run if left behind. Directories that
+# module -- so they'd fail on first run if left behind. mpd_profiling.py
+# is the common/ module (symlinked into each Python tool's directory) that
+# every Python entry point imports for MPD_SCRIPTS_PROFILE support; mpc-fade.sh
+# runs the common/ ramp engine, mpd_ramp.py, when python-mpd2 is available. Directories that
 # ship their own install.sh (mpd-notifier, mpd_rewind_daemon, volume/mpc,
 # volume/python-mpd) are handled separately below instead.
 SIMPLE_SCRIPTS=(
     "add-current-song|add-current-song.sh|add-current-song.conf.example"
     "iheart-radio|iheart.pl|iheart-stations.txt"
     "tunein-radio|tunein.pl|tunein-radio-stations.txt"
-    "lastfm-love|loved.py unloved.py|lastfm_common.py lastfm-love.conf.example"
-    "mpc-fade|mpc-fade.sh|mpc-fade.conf.example"
+    "lastfm-love|loved.py unloved.py|lastfm_common.py mpd_profiling.py lastfm-love.conf.example"
+    "mpc-fade|mpc-fade.sh|mpd_ramp.py mpd_profiling.py mpc-fade.conf.example"
     "mpd-add-random|mpd-add-random.sh|mpd-add-random.conf.example"
     "mpd-add-random-artist|mpd-add-random-artist.sh|"
     "mpd-find-dup|mpd-remove-duplicates-queue.sh mpd-deduplicate-save-and-reload.sh|mpd-deduplicate-save-and-reload.conf.example"
+    "mpd-libcache|mpd-libcache.py|mpd_profiling.py"
+    "mpd-stickers|mpd-stickers.py|mpd_profiling.py"
     "mpd-queue-shuffle|mpd-queue-shuffle.sh|mpd-queue-shuffle.conf.example"
-    "mpd-radio-tray|mpd-radio-tray.py|mpd-radio-tray.conf.example stations.txt.example"
+    "mpd-radio-tray|mpd-radio-tray.py|mpd_profiling.py mpd-radio-tray.conf.example stations.txt.example"
     "mpd-random-album|mpd-random-album.sh|mpd-random-album.conf.example"
     "mpd-recent-tracks|mpd-recent-tracks.sh|mpd-recent-tracks.conf.example exclude_paths.txt.example"
     "mpdsimilar|mpdsimilar.sh|mpdsimilar.conf.example"
-    "mpd-tray-icon|mpd-tray-icon.py|"
-    "mpd-kb-control|mpd-kb-control.py|mpd-kb-control.conf.example"
-    "mpdmark|mpdmark.py|mpdmark.conf.example"
+    "mpd-tray-icon|mpd-tray-icon.py|mpd_profiling.py"
+    "mpd-kb-control|mpd-kb-control.py mpd-kb-send.py|mpd_profiling.py mpd-kb-control.conf.example"
+    "mpdmark|mpdmark.py|mpd_profiling.py mpdmark.conf.example"
     "music_queue_manager|music_queue_manager.sh|music_queue_manager.conf.example"
     "playpause|playpause.sh|playpause.conf.example"
     "rm-artists-playlist|rm-artists-playlist.sh|rm-artists-playlist.conf.example"
     "rm-duplicates-playlist|rm-duplicates-playlist.sh|rm-duplicates-playlist.conf.example"
-    "somafm|soma_fm_playlist_fetcher.py|"
+    "somafm|soma_fm_playlist_fetcher.py|mpd_profiling.py"
 )
 
 # Copies every script in SIMPLE_SCRIPTS (and its companion files) into
@@ -356,6 +361,27 @@ offer_mpd_rewind_daemon() {
     fi
 }
 
+# Offers to install the optional MPD Auto-Bookmark Daemon (bookmarks the
+# position on pause/stop/song change for mpdmark), delegating to its own
+# installer chooser if you say yes, for the same reason as
+# offer_mpd_rewind_daemon above.
+offer_mpd_autobookmark_daemon() {
+    local daemon_installer="$SCRIPT_DIR/mpd_autobookmark_daemon/install.sh"
+
+    if [ ! -x "$daemon_installer" ]; then
+        return
+    fi
+
+    echo
+    read -r -p "Also install the optional MPD Auto-Bookmark Daemon (saves your place on pause/stop for mpdmark)? [y/N] " REPLY
+
+    if [[ "$REPLY" =~ ^[Yy]$ ]]; then
+        "$daemon_installer" || echo "mpd_autobookmark_daemon installation did not complete successfully; you can retry with mpd_autobookmark_daemon/install.sh." >&2
+    else
+        echo "Skipped. Run mpd_autobookmark_daemon/install.sh later if you change your mind."
+    fi
+}
+
 # Offers to install the optional mpd-smart-shuffle tool (background play
 # monitor + smarter random-queue-fill script), delegating to its own
 # installer if you say yes, for the same reason as offer_mpd_rewind_daemon
@@ -421,6 +447,28 @@ offer_mpd_auto_stop() {
     fi
 }
 
+# Offers to install the optional mpd-host process, which runs the monitor,
+# rewind and alarm daemons above as plugins of one process over one MPD
+# connection. Asked last of those, since it hosts whichever of them were
+# just installed; their own daemons then need disabling (see
+# mpd-host/README.md), which is left to you rather than done silently.
+offer_mpd_host() {
+    local host_installer="$SCRIPT_DIR/mpd-host/install-systemd.sh"
+
+    if [ ! -x "$host_installer" ]; then
+        return
+    fi
+
+    echo
+    read -r -p "Also install the optional mpd-host (runs the monitor, rewind and alarm daemons in one process)? [y/N] " REPLY
+
+    if [[ "$REPLY" =~ ^[Yy]$ ]]; then
+        "$host_installer" || echo "mpd-host installation did not complete successfully; you can retry with mpd-host/install-systemd.sh." >&2
+    else
+        echo "Skipped. Run mpd-host/install-systemd.sh later if you change your mind."
+    fi
+}
+
 # Installs MPD Notifier (desktop notification on track change) by
 # delegating to its own installer, unconditionally -- unlike the rewind
 # daemon or volume scripts below, there's no conflicting choice to make
@@ -458,15 +506,15 @@ Also install the optional volume control scripts (mpdvolup.py, mpdvoldown.py,
 volume.py)? They come in two variants -- install only ONE, since both use the
 same three filenames:
 
-  A) mpc-based       Shells out to the mpc command-line tool for every call.
-                      Simpler and needs no Python library, matching most other
-                      scripts in this repo that already talk to MPD via mpc.
+  A) mpc-based       Needs nothing but Python 3: talks to MPD over a plain
+                      socket itself (it no longer runs mpc, despite the name).
+
+  B) python-mpd2-based  Talks to MPD via the python-mpd2 library (falling
+                      back to a plain socket without it). Effectively "free"
+                      to add if you're also installing mpd_rewind_daemon or
+                      mpd-radio-tray, since both already depend on python-mpd2.
 
-  B) python-mpd2-based  Talks to MPD directly over its protocol via the
-                      python-mpd2 library instead of spawning mpc each time.
-                      Effectively "free" to add if you're also installing
-                      mpd_rewind_daemon or mpd-radio-tray, since both already
-                      depend on python-mpd2.
+  Both share one engine and behave the same; each call is one connection.
 EOF
     read -r -p "Install [A]mpc, [B]python-mpd2, or [N]either? [a/b/N] " REPLY
 
@@ -489,8 +537,10 @@ install_dependencies
 copy_simple_scripts
 install_mpd_notifier
 offer_mpd_rewind_daemon
+offer_mpd_autobookmark_daemon
 offer_mpd_smart_shuffle
 offer_alarmpd
 offer_mpd_auto_stop
+offer_mpd_host
 offer_volume_scripts
 print_migration_summary
@@ -7,6 +7,7 @@ Unloves the currently playing MPD track on Last.fm, via pylast.
 import sys
 
 from lastfm_common import get_current_track, get_network
+from mpd_profiling import profile_run
 
 
 def main():
@@ -22,4 +23,5 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    with profile_run("unloved"):
+        main()
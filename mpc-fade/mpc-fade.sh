@@ -36,13 +36,17 @@
 #                       approximating a perceptually even fade (loudness is
 #                       roughly logarithmic in volume%). Off by default,
 #                       or set by LOG_CURVE in the config file below.
+#                       Same as --curve log.
+#   -C, --curve NAME   Fade curve: linear (default), log, or db (a straight
+#                       line in decibels; lingers near silence longest).
+#                       Or set CURVE in the config file below.
 #   -q, --quiet        Suppress the "Fading..."/"Done." progress messages.
 #                       Errors still print regardless.
 #   -n, --dry-run      Print what would happen without changing anything.
 #   -h, --help         Show this help and exit.
 #
 # Configuration:
-#   PULSE_APP, DEFAULT_SECS, and LOG_CURVE live in
+#   PULSE_APP, DEFAULT_SECS, CURVE, and LOG_CURVE live in
 #   ~/.config/mpd-scripts/mpc-fade/mpc-fade.conf, seeded from
 #   mpc-fade.conf.example (shipped alongside this script). PULSE_APP is
 #   normally set by -l/--list-sinks saving a choice; the others can be
@@ -56,6 +60,13 @@
 #     racing the first one's volume changes.
 #   - Ctrl+C (or SIGTERM) during a fade jumps straight to the target volume
 #     before exiting, rather than leaving it stuck partway through.
+#   - MPD-volume fades are run by mpd_ramp.py (the shared ramp engine, from
+#     ../common) when it's installed next to this script and python-mpd2 is
+#     available: one MPD connection for the whole fade, a setvol only when
+#     the volume actually changes, and manual volume changes mid-fade
+#     picked up via MPD's idle events. Otherwise, and always in --pulse
+#     mode, the fade falls back to one mpc/pactl call per 1% step (db
+#     curves are then approximated by log).
 #
 # Examples:
 #   mpc-fade.sh 60 30        # fade current volume to 60% over 30 seconds
@@ -145,7 +156,8 @@ Options:
   -i, --sink-id ID   Fade a specific PulseAudio sink-input index directly (implies --pulse).
   -l, --list-sinks   List active PulseAudio sink inputs and save your choice as the
                      default --pulse app to $CONFIG_FILE.
-  -L, --log-curve    Use a logarithmic fade curve instead of linear.
+  -L, --log-curve    Use a logarithmic fade curve instead of linear (same as --curve log).
+  -C, --curve NAME   Fade curve: linear, log, or db (default: $CURVE).
   -q, --quiet        Suppress the "Fading..."/"Done." progress messages.
   -n, --dry-run      Print what would happen without changing anything.
   -h, --help         Show this help and exit.
@@ -160,12 +172,21 @@ CONFIG_FILE="$CONFIG_DIR/mpc-fade.conf"
 APP="mpd"
 SECS=2
 LOG_CURVE=0
+CURVE=""
 if [[ -f "$CONFIG_FILE" ]]; then
     # shellcheck source=mpc-fade.conf.example
     source "$CONFIG_FILE"
     [[ -n "${PULSE_APP:-}" ]] && APP="$PULSE_APP"
     [[ -n "${DEFAULT_SECS:-}" ]] && SECS="$DEFAULT_SECS"
 fi
+if [[ -z "$CURVE" ]]; then
+    CURVE="linear"
+    (( LOG_CURVE )) && CURVE="log"
+fi
+
+# The shared ramp engine, installed alongside this script (symlinked from
+# ../common in a checkout).
+RAMP_ENGINE="$(dirname "$(readlink -f "$0")")/mpd_ramp.py"
 
 TOGGLE=0
 PULSE=0
@@ -183,7 +204,8 @@ while [[ $# -gt 0 ]]; do
         -a|--app) APP="$2"; shift 2 ;;
         -i|--sink-id) SINK_ID="$2"; PULSE=1; shift 2 ;;
         -l|--list-sinks) LIST_SINKS=1; shift ;;
-        -L|--log-curve) LOG_CURVE=1; shift ;;
+        -L|--log-curve) CURVE="log"; shift ;;
+        -C|--curve) CURVE="$2"; shift 2 ;;
         -q|--quiet) QUIET=1; shift ;;
         -n|--dry-run) DRY_RUN=1; shift ;;
         -h|--help) display_help; exit 0 ;;
@@ -196,6 +218,11 @@ if (( PULSE || LIST_SINKS )); then
     require_cmd pactl
 fi
 
+case "$CURVE" in
+    linear|log|db) ;;
+    *) echo >&2 "$PROGRAM_NAME: ERROR: unknown curve '$CURVE' (expected linear, log, or db)"; exit 1 ;;
+esac
+
 # --- volume backend -------------------------------------------------------
 #
 # Both backends are addressed through get_volume/set_volume so fade_to()
@@ -295,6 +322,12 @@ fade_loop_log() {
     done
 }
 
+# True if the shared ramp engine can drive this fade: it's installed next
+# to this script and python-mpd2 is importable.
+ramp_engine_available() {
+    [[ -f "$RAMP_ENGINE" ]] && python3 -c 'import mpd' 2>/dev/null
+}
+
 # Fades from the current volume to $1 over $2 seconds. $3 is the
 # PulseAudio sink-input index, ignored when not in --pulse mode.
 fade_to() {
@@ -312,25 +345,37 @@ fade_to() {
         return 0
     fi
 
+    local backend="mpc"
+    if (( PULSE )); then
+        backend="pulse"
+    elif ramp_engine_available; then
+        backend="ramp engine"
+    fi
+
     if (( DRY_RUN )); then
-        local curve="linear"
-        (( LOG_CURVE )) && curve="log"
-        local backend="mpc"
-        (( PULSE )) && backend="pulse"
-        echo "[dry-run] would fade volume: ${vol}% -> ${target}% over ${duration}s ($curve curve, $backend backend)."
+        echo "[dry-run] would fade volume: ${vol}% -> ${target}% over ${duration}s ($CURVE curve, $backend backend)."
         return 0
     fi
 
     info "Fading volume: ${vol}% -> ${target}% over ${duration}s..."
 
     # Jump straight to the target instead of leaving volume stuck partway
-    # through if interrupted mid-fade.
-    trap "set_volume '${target}' '${idx}'; info 'Interrupted -- jumped to ${target}%.'; exit 130" INT TERM
-
-    if (( LOG_CURVE )); then
-        fade_loop_log "$vol" "$target" "$duration" "$idx"
-    else
+    # through if interrupted mid-fade (stopping the ramp engine first, if
+    # it's the one fading).
+    RAMP_PID=""
+    trap "[[ -n \"\$RAMP_PID\" ]] && kill \"\$RAMP_PID\" 2>/dev/null; set_volume '${target}' '${idx}'; info 'Interrupted -- jumped to ${target}%.'; exit 130" INT TERM
+
+    if [[ "$backend" == "ramp engine" ]]; then
+        # Run in the background and `wait`, so a signal reaches the trap
+        # right away instead of after the whole fade.
+        python3 "$RAMP_ENGINE" "$target" "$duration" --curve "$CURVE" 9>&- &
+        RAMP_PID=$!
+        wait "$RAMP_PID"
+        RAMP_PID=""
+    elif [[ "$CURVE" == "linear" ]]; then
         fade_loop_linear "$vol" "$target" "$duration" "$idx"
+    else
+        fade_loop_log "$vol" "$target" "$duration" "$idx"
     fi
 
     trap - INT TERM
@@ -99,17 +99,32 @@ if [[ ! -d "$MUSIC_DIR" ]]; then
     exit 1
 fi
 
-# Build a NUL-delimited array of all audio files, safe for filenames
-# containing spaces, newlines, or other unusual characters. -L follows
-# symlinks, so symlinked audio files (and directories of them) are included
-# rather than silently skipped.
+# Build a NUL-delimited array of every track's path relative to MUSIC_DIR
+# (as mpc expects), safe for filenames containing spaces, newlines, or
+# other unusual characters.
+#
+# If mpd-libcache.py is installed, its library snapshot already holds MPD's
+# own song URIs, so there's nothing to scan -- it's read in milliseconds.
+# Otherwise the music directory is walked with find. -L follows symlinks,
+# so symlinked audio files (and directories of them) are included rather
+# than silently skipped. A plain prefix strip is used rather than
+# `realpath`, which would resolve a symlinked subdirectory to its physical
+# target -- MPD's own database indexes such tracks under the symlink's
+# name (as found by `find -L`), not its target, so resolving it here would
+# build a path outside MUSIC_DIR that MPD wouldn't recognize.
 TRACKS=()
-while IFS= read -r -d '' track; do
-    TRACKS+=("$track")
-done < <(find -L "$MUSIC_DIR" -type f \
-    \( -iname "*.mp3" -o -iname "*.flac" -o -iname "*.ogg" -o -iname "*.m4a" \
-       -o -iname "*.opus" -o -iname "*.wav" -o -iname "*.wma" -o -iname "*.aac" \) \
-    -print0)
+if command -v mpd-libcache.py &>/dev/null; then
+    while IFS= read -r -d '' track; do
+        TRACKS+=("$track")
+    done < <(mpd-libcache.py query --fields uri -0)
+else
+    while IFS= read -r -d '' track; do
+        TRACKS+=("${track#"$MUSIC_DIR"/}")
+    done < <(find -L "$MUSIC_DIR" -type f \
+        \( -iname "*.mp3" -o -iname "*.flac" -o -iname "*.ogg" -o -iname "*.m4a" \
+           -o -iname "*.opus" -o -iname "*.wav" -o -iname "*.wma" -o -iname "*.aac" \) \
+        -print0)
+fi
 
 TOTAL_TRACKS="${#TRACKS[@]}"
 
@@ -124,17 +139,11 @@ if [[ "$NUM_TRACKS" -gt "$TOTAL_TRACKS" ]]; then
 fi
 
 # Randomly select NUM_TRACKS tracks (NUL-delimited to preserve odd filenames)
-# and queue each one with a path relative to MUSIC_DIR, as mpc expects. A
-# plain prefix strip is used rather than `realpath`, which would resolve a
-# symlinked subdirectory to its physical target -- MPD's own database
-# indexes such tracks under the symlink's name (as found by `find -L`
-# above), not its target, so resolving it here would build a path outside
-# MUSIC_DIR that MPD wouldn't recognize. A failed individual add is a
-# warning, not a reason to abort the whole run -- one bad path shouldn't
-# stop the rest from being added.
+# and queue each one. A failed individual add is a warning, not a reason to
+# abort the whole run -- one bad path shouldn't stop the rest from being
+# added.
 ADDED_COUNT=0
-while IFS= read -r -d '' track; do
-    relative_path="${track#"$MUSIC_DIR"/}"
+while IFS= read -r -d '' relative_path; do
     if mpc add "$relative_path"; then
         (( ADDED_COUNT++ )) || true
     else
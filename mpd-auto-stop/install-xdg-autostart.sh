@@ -11,6 +11,7 @@ set -e  # Exit on error
 
 INSTALL_DIR="$HOME/bin"
 SCRIPT_NAME="mpd-auto-stop.py"
+SHARED_MODULES="mpd_hooks.py mpd_logging.py mpd_profiling.py mpd_ramp.py"  # From ../common, symlinked here; imported by the script
 CONF_EXAMPLE="mpd-auto-stop.conf.example"
 TEMPLATE="index.html"
 SCRIPT_PATH="$INSTALL_DIR/$SCRIPT_NAME"
@@ -43,6 +44,9 @@ pip3 install --user python-mpd2
 echo "Copying daemon script to $SCRIPT_PATH..."
 cp "$SCRIPT_NAME" "$SCRIPT_PATH"
 chmod +x "$SCRIPT_PATH"
+for f in $SHARED_MODULES; do
+    cp "$f" "$INSTALL_DIR/$f"
+done
 cp "$CONF_EXAMPLE" "$INSTALL_DIR/$CONF_EXAMPLE"
 cp "$TEMPLATE" "$INSTALL_DIR/$TEMPLATE"
 
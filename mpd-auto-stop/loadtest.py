@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+loadtest.py
+
+Benchmarks mpd-auto-stop's HTTP front ends. Starts a fake MPD (just enough
+of the protocol for the daemon: a greeting, `status`, `setvol`, `idle`,
+and OK for anything else), runs mpd-auto-stop.py in the foreground against
+it with a throwaway HOME so your real config and state are never touched,
+then hammers it with keep-alive connections and reports requests/sec and
+latency percentiles.
+
+    ./loadtest.py                              # both front ends, GET /timer
+    ./loadtest.py --server asyncio -c 200 -d 10
+    ./loadtest.py --path / --path /timer
+
+Needs python-mpd2 (for the daemon itself) and nothing else.
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mpd-auto-stop.py")
+
+
+class FakeMPDHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        state = self.server.state
+        seen = state["version"]  # Like MPD, idle reports changes made since the previous idle
+        self.wfile.write(b"OK MPD 0.23.5\n")
+        for line in self.rfile:
+            command, _, arg = line.strip().partition(b" ")
+            if command == b"close":
+                return
+            if command == b"status":
+                self.wfile.write(f"volume: {state['volume']}\nstate: play\nOK\n".encode())
+            elif command == b"idle":
+                with self.server.changed:
+                    self.server.changed.wait_for(lambda: state["version"] != seen)
+                    seen = state["version"]
+                self.wfile.write(b"changed: mixer\nOK\n")
+            else:
+                if command == b"setvol":
+                    with self.server.changed:
+                        state["volume"] = int(arg.strip(b'"'))
+                        state["version"] += 1
+                        self.server.changed.notify_all()
+                self.wfile.write(b"OK\n")
+
+
+class FakeMPD(socketserver.ThreadingTCPServer):
+    """Just enough of MPD for mpd-auto-stop: a greeting, `status`, `setvol`
+    (remembered, and reported to `idle`), and OK for anything else."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.state = {"volume": 50, "version": 0}
+        self.changed = threading.Condition()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"mpd-auto-stop didn't start listening on port {port}")
+
+
+async def read_response(reader: asyncio.StreamReader) -> tuple:
+    """Read one response; returns (status, keep_alive)."""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    version, status = lines[0].split(" ", 2)[:2]
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    await reader.readexactly(int(headers.get("content-length", "0")))
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+    return int(status), keep_alive
+
+
+async def client(port: int, paths: list, deadline: float, latencies: list, errors: list) -> None:
+    reader = writer = None
+    i = 0
+    while time.monotonic() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            started = time.perf_counter()
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\nAccept-Encoding: gzip\r\n\r\n".encode())
+            status, keep_alive = await read_response(reader)
+            latencies.append(time.perf_counter() - started)
+            if status >= 400:
+                errors.append(status)
+        except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+            errors.append(type(e).__name__)
+            keep_alive = False
+        if not keep_alive and writer is not None:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def run_one(server: str, args: argparse.Namespace, mpd_port: int) -> None:
+    http_port = free_port()
+    with tempfile.TemporaryDirectory() as home:
+        env = dict(os.environ, HOME=home)
+        daemon = subprocess.Popen(
+            [sys.executable, SCRIPT, "--verbose", "--server", server,
+             "-a", "127.0.0.1", "-p", str(http_port), "-H", "127.0.0.1", "-P", str(mpd_port)],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_for_port(http_port)
+            latencies, errors = [], []
+
+            async def main():
+                deadline = time.monotonic() + args.duration
+                await asyncio.gather(*(client(http_port, args.path, deadline, latencies, errors)
+                                       for _ in range(args.concurrency)))
+
+            started = time.monotonic()
+            asyncio.run(main())
+            elapsed = time.monotonic() - started
+        finally:
+            daemon.terminate()
+            daemon.wait(timeout=10)
+
+    latencies.sort()
+    print(f"{server:8} {len(latencies) / elapsed:9.0f} req/s  "
+          f"p50 {percentile(latencies, 0.50) * 1000:7.2f} ms  "
+          f"p99 {percentile(latencies, 0.99) * 1000:7.2f} ms  "
+          f"max {percentile(latencies, 1.0) * 1000:7.2f} ms  "
+          f"({len(latencies)} requests, {len(errors)} errors)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load-test mpd-auto-stop's HTTP front ends against a fake MPD")
+    parser.add_argument("--server", choices=("threads", "asyncio", "both"), default="both",
+                        help="Front end(s) to test (default: both)")
+    parser.add_argument("-c", "--concurrency", type=int, default=50, help="Concurrent connections (default: 50)")
+    parser.add_argument("-d", "--duration", type=float, default=5.0, help="Seconds per front end (default: 5)")
+    parser.add_argument("--path", action="append",
+                        help="Path to request, repeatable; requests cycle through them (default: /timer)")
+    args = parser.parse_args()
+    args.path = args.path or ["/timer"]
+
+    mpd = FakeMPD(("127.0.0.1", 0), FakeMPDHandler)
+    threading.Thread(target=mpd.serve_forever, daemon=True).start()
+    mpd_port = mpd.server_address[1]
+
+    print(f"{args.concurrency} connections, {args.duration:g}s each, paths: {' '.join(args.path)}")
+    for server in (("threads", "asyncio") if args.server == "both" else (args.server,)):
+        run_one(server, args, mpd_port)
+    mpd.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,7 @@ Endpoints:
     GET /                          Web UI
     GET /timer                     Status: {"status": "stopped"} or
                                     {"status": "started", "remaining_seconds": N, "fading": bool}
+    GET /timer/events              Server-Sent Events stream of status changes.
     GET /timer/<duration>/start    Start a timer. Duration like "45m", "1h", "1.5h", "3600s".
     GET /timer/stop                Cancel the running timer (does not pause playback itself).
     GET /timer/restart             Re-arm the running timer with its original duration.
@@ -21,24 +22,36 @@ mpd-auto-stop.conf.example on first run.
 """
 
 import argparse
+import asyncio
 import base64
 import configparser
+import gzip
+import hashlib
 import hmac
+import http.client
+import io
 import json
 import logging
 import os
 import re
 import signal
-import subprocess
 import sys
 import threading
+import time
 import urllib.parse as urlparse
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from http import HTTPStatus
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
-from mpd import MPDClient
+from mpd import MPDClient, CommandError
 from mpd import ConnectionError as MPDConnectionError
 
+from mpd_hooks import HookRunner
+from mpd_logging import setup_logging, logging_options
+from mpd_profiling import install_sampling_profiler
+from mpd_ramp import Fade, Ramp, CURVES
+
 VERSION = (2, 0, 0)
 
 CONFIG_DIR = os.path.join(os.path.expanduser("~"), ".config", "mpd-scripts", "mpd-auto-stop")
@@ -50,6 +63,10 @@ LOG_FILE = os.path.join(STATE_DIR, "mpd-auto-stop.log")
 
 DURATION_PATTERN = re.compile(r"^([0-9]*\.?[0-9]+)([smh])$")
 
+# How often an idle /timer/events stream gets a comment line, so proxies
+# don't time it out and a client that went away is noticed.
+EVENT_KEEPALIVE_SECONDS = 15
+
 
 def parse_duration(duration: str) -> float:
     """Parse a "45m"/"1h"/"1.5h"/"3600s"-style duration into seconds."""
@@ -107,7 +124,14 @@ class InvalidTimerStateError(Exception):
 class MPDConnection:
     """Thread-safe wrapper around a single reused MPDClient connection.
     Reconnects (once) on a dropped connection before giving up, since this
-    is a long-running daemon rather than a one-shot CLI call."""
+    is a long-running daemon rather than a one-shot CLI call.
+
+    Once watch() is called, a second connection sits in `idle player
+    mixer` on a background thread and keeps a cached copy of MPD's status
+    up to date, so status() is answered without a round trip -- and without
+    queueing behind a fade's setvol on the command connection."""
+
+    WATCH_RETRY_MAX_SECONDS = 30
 
     def __init__(self, host: str, port: int, password: str = None):
         self._host = host
@@ -116,14 +140,57 @@ class MPDConnection:
         self._client = MPDClient()
         self._lock = threading.Lock()
         self._connected = False
+        self._status_lock = threading.Lock()
+        self._cached_status = None
 
-    def _connect(self) -> None:
-        self._client = MPDClient()
-        self._client.connect(self._host, self._port)
+    def _new_client(self) -> MPDClient:
+        client = MPDClient()
+        client.connect(self._host, self._port)
         if self._password:
-            self._client.password(self._password)
+            client.password(self._password)
+        return client
+
+    def _connect(self) -> None:
+        self._client = self._new_client()
         self._connected = True
 
+    def watch(self) -> None:
+        """Start the background idle connection that keeps status() cached."""
+        threading.Thread(target=self._watch, name="mpd-idle", daemon=True).start()
+
+    def _watch(self) -> None:
+        retry_delay = 1
+        while True:
+            client = None
+            try:
+                client = self._new_client()
+                retry_delay = 1
+                while True:
+                    status = client.status()
+                    with self._status_lock:
+                        self._cached_status = status
+                    client.idle("player", "mixer")
+            except (MPDConnectionError, CommandError, OSError):
+                pass
+            with self._status_lock:
+                self._cached_status = None  # Unknown until reconnected; status() falls back to asking
+            if client is not None:
+                try:
+                    client.disconnect()
+                except (MPDConnectionError, OSError):
+                    pass
+            time.sleep(retry_delay)
+            retry_delay = min(retry_delay * 2, self.WATCH_RETRY_MAX_SECONDS)
+
+    def status(self) -> dict:
+        """MPD's status: the idle connection's cached copy while it's
+        connected, otherwise a `status` round trip on the command
+        connection."""
+        with self._status_lock:
+            if self._cached_status is not None:
+                return dict(self._cached_status)
+        return self.call("status")
+
     def call(self, method_name: str, *args):
         """Thread-safely invoke an MPDClient method by name, reconnecting
         once on a dropped connection before letting the error propagate."""
@@ -141,20 +208,23 @@ class MPDConnection:
 
 class Hooks:
     """Runs optional shell commands (warning_hook/stop_hook) from the
-    config, fire-and-forget. Never fatal -- a missing/broken hook shouldn't
-    affect the timer itself."""
+    config in the background, through a HookRunner that caps how many run
+    at once, times them out, and reaps them. Never fatal -- a
+    missing/broken hook shouldn't affect the timer itself."""
 
-    def __init__(self, config: configparser.SectionProxy):
+    def __init__(self, config: configparser.SectionProxy, logger: logging.Logger):
         self._config = config
+        self._runner = HookRunner(
+            logger,
+            max_concurrent=config.getint("max_concurrent_hooks", fallback=4),
+            timeout=config.getfloat("hook_timeout", fallback=60),
+        )
 
     def run(self, name: str) -> None:
-        command = self._config.get(name, fallback="")
-        if not command:
-            return
-        try:
-            subprocess.Popen(command, shell=True)
-        except OSError:
-            pass
+        self._runner.run(name, self._config.get(name, fallback=""))
+
+    def stats(self) -> dict:
+        return self._runner.stats()
 
 
 class Timer:
@@ -164,6 +234,10 @@ class Timer:
     All public methods are safe to call concurrently from multiple HTTP
     handler threads; the countdown/fade itself runs in its own background
     thread so it never blocks request handling.
+
+    Every state change (started, restarted, extended, fading, stopped,
+    fired) bumps a version number and wakes anyone blocked in
+    wait_for_change(), which is what the /timer/events stream is built on.
     """
 
     STOPPED = "stopped"
@@ -175,6 +249,10 @@ class Timer:
         self._hooks = hooks
         self._logger = logger
         self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._version = 0
+        self._last_event = Timer.STOPPED
+        self._listeners = []
 
         self._status = Timer.STOPPED
         self._started_at = None
@@ -194,11 +272,26 @@ class Timer:
 
     def get_status(self) -> dict:
         with self._lock:
-            result = {"status": self._status}
-            if self._status == Timer.STARTED:
-                result["remaining_seconds"] = round(self._remaining_seconds(), 1)
-                result["fading"] = self._fading
-            return result
+            return self._snapshot()
+
+    def wait_for_change(self, version: int, timeout: float):
+        """Block until the state moves past `version` or `timeout` seconds
+        pass, whichever is first. Returns (version, event, status): a
+        version equal to the one passed in means nothing changed."""
+        with self._changed:
+            self._changed.wait_for(lambda: self._version != version, timeout=timeout)
+            return self._version, self._last_event, self._snapshot()
+
+    def subscribe(self, callback) -> None:
+        """Call callback(version, event, status) on every state change,
+        from whichever thread made it and with the timer's lock held -- so
+        it must return quickly and must not call back into the timer."""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def unsubscribe(self, callback) -> None:
+        with self._lock:
+            self._listeners.remove(callback)
 
     def start(self, duration_str: str) -> dict:
         duration = parse_duration(duration_str)
@@ -215,6 +308,7 @@ class Timer:
                 self._status = Timer.STOPPED
                 self._started_at = None
                 self._duration = 0.0
+                self._publish("stopped")
                 self._logger.info("Timer stopped")
             return {}
 
@@ -224,7 +318,7 @@ class Timer:
                 raise InvalidTimerStateError("Can't restart a stopped timer")
             duration = self._duration
             self._cancel_run(restore_volume=True)
-            self._begin(duration)
+            self._begin(duration, event="restarted")
             self._logger.info("Timer restarted with duration %s seconds", duration)
             return {"remaining_seconds": round(self._remaining_seconds(), 1)}
 
@@ -234,13 +328,29 @@ class Timer:
                 raise InvalidTimerStateError("Can't extend a stopped timer")
             new_duration = self._remaining_seconds() + parse_duration(duration_str)
             self._cancel_run(restore_volume=True)
-            self._begin(new_duration)
+            self._begin(new_duration, event="extended")
             self._logger.info("Timer extended with duration %s seconds", new_duration)
             return {"remaining_seconds": round(self._remaining_seconds(), 1)}
 
     # --- internal; callers must hold self._lock ---
 
-    def _begin(self, duration: float) -> None:
+    def _snapshot(self) -> dict:
+        result = {"status": self._status}
+        if self._status == Timer.STARTED:
+            result["remaining_seconds"] = round(self._remaining_seconds(), 1)
+            result["fading"] = self._fading
+        return result
+
+    def _publish(self, event: str) -> None:
+        self._version += 1
+        self._last_event = event
+        self._changed.notify_all()
+        if self._listeners:
+            status = self._snapshot()
+            for callback in self._listeners:
+                callback(self._version, event, status)
+
+    def _begin(self, duration: float, event: str = "started") -> None:
         self._status = Timer.STARTED
         self._started_at = datetime.now()
         self._duration = duration
@@ -249,6 +359,7 @@ class Timer:
         self._cancel_event = threading.Event()
         self._thread = threading.Thread(target=self._run, args=(self._cancel_event, duration), daemon=True)
         self._thread.start()
+        self._publish(event)
         self._logger.info("Timer started with duration %s seconds", duration)
 
     def _cancel_run(self, restore_volume: bool) -> None:
@@ -321,33 +432,51 @@ class Timer:
                 self._fading = False
                 self._thread = None
                 self._cancel_event = None
+                self._publish("fired")
 
     def _do_fade(self, cancel_event: threading.Event, fade_seconds: float) -> bool:
-        """Ramp the volume down to 0 over fade_seconds seconds. Returns
-        False if cancelled partway through."""
-        try:
-            start_volume = int(self._mpd.call("status").get("volume", 0))
-        except Exception:
-            start_volume = 0
+        """Ramp the volume down to 0 over fade_seconds seconds, along
+        fade_curve, returning once fade_seconds have passed. Returns False
+        if cancelled partway through.
+
+        If the volume turns out to be something this fade never set, someone
+        changed it by hand mid-fade; the ramp then continues down from their
+        level over the time left, rather than snapping back to its own."""
+        fade_ends_at = time.monotonic() + max(0.0, fade_seconds)
+        volume = self._current_volume()
+        start_volume = volume if volume is not None else 0
 
         with self._lock:
             self._original_volume = start_volume
             self._fading = True
+            self._publish("fading")
+
+        if start_volume > 0 and fade_seconds > 0:
+            def set_volume(level):
+                try:
+                    self._mpd.call("setvol", level)
+                except Exception:
+                    pass
 
-        if start_volume <= 0 or fade_seconds <= 0:
-            return not cancel_event.is_set()
+            def on_manual(level):
+                self._logger.info("Volume changed to %d mid-fade, fading from there", level)
 
-        steps = max(1, int(fade_seconds))
-        tick_interval = fade_seconds / steps
-        for step in range(1, steps + 1):
-            if cancel_event.wait(timeout=tick_interval):
+            ramp = Ramp(start_volume, 0, fade_seconds, self._config.get("fade_curve", fallback="linear"))
+            if not Fade(ramp, set_volume, self._current_volume, on_manual=on_manual).run(cancel_event):
                 return False
-            target = max(0, round(start_volume * (1 - step / steps)))
-            try:
-                self._mpd.call("setvol", target)
-            except Exception:
-                pass
-        return True
+
+        # The ramp can reach 0 a little early (or have nothing to do at
+        # all); the pause itself still belongs at the end of the fade.
+        return not cancel_event.wait(timeout=max(0.0, fade_ends_at - time.monotonic()))
+
+    def _current_volume(self):
+        """The volume from MPDConnection's idle-kept status cache, or None
+        if it's unknown."""
+        try:
+            volume = int(self._mpd.status().get("volume", -1))
+        except Exception:
+            return None
+        return volume if volume >= 0 else None
 
     def _do_stop_action(self) -> None:
         try:
@@ -373,96 +502,186 @@ class Route:
         self.method_name = method_name
 
 
-def build_handler_class(timer: Timer, index_html: str, logger: logging.Logger,
-                         http_username: str = "", http_password: str = ""):
-    routes = [
-        Route(re.compile(r"/?$"), "_index"),
-        Route(re.compile(r"/timer$"), "_timer_status"),
-        Route(re.compile(r"/timer/(?P<duration>[.0-9a-zA-Z]+)/start$"), "_timer_start"),
-        Route(re.compile(r"/timer/stop$"), "_timer_stop"),
-        Route(re.compile(r"/timer/restart$"), "_timer_restart"),
-        Route(re.compile(r"/timer/(?P<duration>[.0-9a-zA-Z]+)/extend$"), "_timer_extend"),
-    ]
+# "_index" and "_timer_events" are served by each front end itself; every
+# other method_name is a TimerAPI method returning (status, JSON body).
+ROUTES = [
+    Route(re.compile(r"/?$"), "_index"),
+    Route(re.compile(r"/timer$"), "_timer_status"),
+    Route(re.compile(r"/timer/events$"), "_timer_events"),
+    Route(re.compile(r"/timer/(?P<duration>[.0-9a-zA-Z]+)/start$"), "_timer_start"),
+    Route(re.compile(r"/timer/stop$"), "_timer_stop"),
+    Route(re.compile(r"/timer/restart$"), "_timer_restart"),
+    Route(re.compile(r"/timer/(?P<duration>[.0-9a-zA-Z]+)/extend$"), "_timer_extend"),
+    Route(re.compile(r"/hooks$"), "_hooks_stats"),
+]
+
+
+def match_route(path: str):
+    """Return (method_name, match) for the first route matching path, or
+    (None, None)."""
+    for route in ROUTES:
+        match = route.pattern.match(path)
+        if match:
+            return route.method_name, match
+    return None, None
+
+
+class TimerAPI:
+    """The JSON endpoints, independent of which HTTP front end serves them.
+    Each method returns (http_status, body) for the body to be sent as
+    JSON."""
+
+    def __init__(self, timer: Timer, hooks: Hooks):
+        self._timer = timer
+        self._hooks = hooks
+
+    def call(self, method_name: str, match) -> tuple:
+        return getattr(self, method_name)(match)
+
+    def _timer_status(self, match):
+        return 200, self._timer.get_status()
+
+    def _timer_start(self, match):
+        try:
+            return 200, self._timer.start(match.group("duration"))
+        except ValueError as e:
+            return 400, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": str(e)}
+
+    def _timer_stop(self, match):
+        try:
+            return 200, self._timer.stop()
+        except Exception as e:
+            return 500, {"error": str(e)}
+
+    def _timer_restart(self, match):
+        try:
+            return 200, self._timer.restart()
+        except InvalidTimerStateError as e:
+            return 400, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": str(e)}
+
+    def _timer_extend(self, match):
+        try:
+            return 200, self._timer.extend(match.group("duration"))
+        except (ValueError, InvalidTimerStateError) as e:
+            return 400, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": str(e)}
+
+    def _hooks_stats(self, match):
+        return 200, self._hooks.stats()
+
+
+class IndexPage:
+    """index.html, gzipped once at startup and tagged with an ETag, so a
+    browser reloading the UI gets a bodiless 304 and a first visit gets the
+    compressed copy without compressing it per request."""
+
+    def __init__(self, html: str):
+        self._body = html.encode("utf-8")
+        self._gzipped = gzip.compress(self._body, compresslevel=9)
+        self.etag = '"' + hashlib.sha1(self._body).hexdigest()[:16] + '"'
 
-    auth_required = bool(http_username or http_password)
-    expected_header = "Basic " + base64.b64encode(f"{http_username}:{http_password}".encode()).decode()
+    def response(self, headers) -> tuple:
+        """Return (status, extra_headers, body) for a request with the given
+        headers (anything with a case-insensitive .get())."""
+        extra = [("ETag", self.etag), ("Cache-Control", "no-cache"), ("Vary", "Accept-Encoding")]
+        if_none_match = headers.get("If-None-Match", "")
+        if if_none_match.strip() == "*" or self.etag in if_none_match:
+            return 304, extra, b""
+        if "gzip" in headers.get("Accept-Encoding", ""):
+            return 200, extra + [("Content-Encoding", "gzip")], self._gzipped
+        return 200, extra, self._body
 
+
+def format_event(event: str, status: dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(status)}\n\n".encode("utf-8")
+
+
+def basic_auth_header(http_username: str, http_password: str) -> str:
+    """The Authorization header every request must carry, or "" if auth is
+    disabled."""
+    if not (http_username or http_password):
+        return ""
+    return "Basic " + base64.b64encode(f"{http_username}:{http_password}".encode()).decode()
+
+
+def authorized(expected_header: str, headers) -> bool:
+    if not expected_header:
+        return True
+    # Constant-time comparison so response timing can't leak how
+    # much of the credential was guessed correctly.
+    return hmac.compare_digest(headers.get("Authorization", ""), expected_header)
+
+
+def build_handler_class(timer: Timer, api: TimerAPI, index_page: IndexPage, logger: logging.Logger,
+                         expected_header: str = ""):
     class Handler(BaseHTTPRequestHandler):
         def log_message(self, fmt, *args):
             logger.info("%s - %s", self.address_string(), fmt % args)
 
-        def _respond(self, status: int, content_type: str, body: str) -> None:
-            body_bytes = body.encode("utf-8")
+        def _send(self, status: int, headers: list, body: bytes) -> None:
             self.send_response(status)
-            self.send_header("Content-Type", content_type)
-            self.send_header("Content-Length", str(len(body_bytes)))
+            for name, value in headers:
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
             self.end_headers()
-            self.wfile.write(body_bytes)
+            self.wfile.write(body)
+
+        def _respond(self, status: int, content_type: str, body: str) -> None:
+            self._send(status, [("Content-Type", content_type)], body.encode("utf-8"))
 
         def _json(self, status: int, obj: dict) -> None:
             self._respond(status, "application/json", json.dumps(obj))
 
-        def _authenticated(self) -> bool:
-            if not auth_required:
-                return True
-            # Constant-time comparison so response timing can't leak how
-            # much of the credential was guessed correctly.
-            return hmac.compare_digest(self.headers.get("Authorization", ""), expected_header)
-
         def _require_auth(self) -> None:
-            self.send_response(401)
-            self.send_header("WWW-Authenticate", 'Basic realm="mpd-auto-stop"')
-            self.send_header("Content-Length", "0")
-            self.end_headers()
+            self._send(401, [("WWW-Authenticate", 'Basic realm="mpd-auto-stop"')], b"")
 
         def do_GET(self):
-            if not self._authenticated():
+            if not authorized(expected_header, self.headers):
                 self._require_auth()
                 return
 
-            path = urlparse.urlparse(self.path).path
-            for route in routes:
-                match = route.pattern.match(path)
-                if match:
-                    getattr(self, route.method_name)(match)
-                    return
-            self._respond(404, "text/plain", "Not found")
-
-        def _index(self, match):
-            self._respond(200, "text/html", index_html)
-
-        def _timer_status(self, match):
-            self._json(200, timer.get_status())
-
-        def _timer_start(self, match):
-            try:
-                self._json(200, timer.start(match.group("duration")))
-            except ValueError as e:
-                self._json(400, {"error": str(e)})
-            except Exception as e:
-                self._json(500, {"error": str(e)})
-
-        def _timer_stop(self, match):
-            try:
-                self._json(200, timer.stop())
-            except Exception as e:
-                self._json(500, {"error": str(e)})
-
-        def _timer_restart(self, match):
-            try:
-                self._json(200, timer.restart())
-            except InvalidTimerStateError as e:
-                self._json(400, {"error": str(e)})
-            except Exception as e:
-                self._json(500, {"error": str(e)})
+            method_name, match = match_route(urlparse.urlparse(self.path).path)
+            if method_name is None:
+                self._respond(404, "text/plain", "Not found")
+            elif method_name == "_index":
+                status, headers, body = index_page.response(self.headers)
+                self._send(status, [("Content-Type", "text/html; charset=utf-8")] + headers, body)
+            elif method_name == "_timer_events":
+                self._timer_events()
+            else:
+                self._json(*api.call(method_name, match))
+
+        def _timer_events(self):
+            """Server-Sent Events stream: the current status straight away,
+            then one message per state change. Clients count remaining time
+            down locally between messages, so an idle timer costs nothing
+            beyond the keepalive comment."""
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self.close_connection = True
 
-        def _timer_extend(self, match):
+            version, _, status = timer.wait_for_change(-1, timeout=0)
+            event = "status"
             try:
-                self._json(200, timer.extend(match.group("duration")))
-            except (ValueError, InvalidTimerStateError) as e:
-                self._json(400, {"error": str(e)})
-            except Exception as e:
-                self._json(500, {"error": str(e)})
+                while True:
+                    self.wfile.write(format_event(event, status))
+                    self.wfile.flush()
+                    while True:
+                        new_version, event, status = timer.wait_for_change(version, EVENT_KEEPALIVE_SECONDS)
+                        if new_version != version:
+                            version = new_version
+                            break
+                        self.wfile.write(b": keepalive\n\n")
+                        self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
 
     return Handler
 
@@ -482,6 +701,7 @@ class App:
     def run(self) -> None:
         signal.signal(signal.SIGTERM, self._handle_signal)
         signal.signal(signal.SIGINT, self._handle_signal)
+        install_sampling_profiler("mpd-auto-stop", self._logger.info)
         self._logger.info("Starting server @ %s:%s", *self._server.server_address[:2])
         self._server.serve_forever()
         self._logger.info("Stopped.")
@@ -494,19 +714,201 @@ class App:
         threading.Thread(target=self._server.shutdown, daemon=True).start()
 
 
-def build_logger(verbose: bool) -> logging.Logger:
-    logger = logging.getLogger("mpd-auto-stop")
-    logger.setLevel(logging.DEBUG if verbose else logging.INFO)
+class AsyncApp:
+    """The server = asyncio front end: every connection is handled on one
+    event loop instead of ThreadingHTTPServer's unbounded thread per
+    connection. Connections past max_connections get an immediate 503,
+    HTTP/1.1 connections are kept alive for up to keepalive_timeout idle
+    seconds, and every call into the timer (and so into MPD) runs on a
+    single dedicated executor thread -- so a burst of requests queues up
+    there instead of piling onto the timer's and MPD connection's locks."""
+
+    def __init__(self, host: str, port: int, timer: Timer, api: TimerAPI, index_page: IndexPage,
+                 logger: logging.Logger, expected_header: str = "",
+                 max_connections: int = 64, keepalive_timeout: float = 15.0):
+        self._host = host
+        self._port = port
+        self._timer = timer
+        self._api = api
+        self._index_page = index_page
+        self._logger = logger
+        self._expected_header = expected_header
+        self._max_connections = max(1, max_connections)
+        self._keepalive_timeout = keepalive_timeout
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mpd")
+        self._connections = set()
+        self._latest = None
+        self._changed = None
+
+    def run(self) -> None:
+        install_sampling_profiler("mpd-auto-stop", self._logger.info)
+        asyncio.run(self._serve())
+        self._logger.info("Stopped.")
+
+    async def _serve(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = asyncio.Event()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, self._handle_signal, signum, stopping)
+
+        # Timer changes arrive on whichever thread made them; hop onto the
+        # loop and wake every /timer/events stream from there.
+        self._changed = asyncio.Event()
+
+        def on_change(*change):
+            loop.call_soon_threadsafe(self._on_change, change)
+
+        self._timer.subscribe(on_change)
+        self._latest = self._timer.wait_for_change(-1, timeout=0)
+
+        server = await asyncio.start_server(self._handle_connection, self._host, self._port)
+        self._logger.info("Starting server @ %s:%s (asyncio, max %d connections)",
+                          self._host, self._port, self._max_connections)
+        try:
+            await stopping.wait()
+        finally:
+            server.close()
+            for task in list(self._connections):
+                task.cancel()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await server.wait_closed()
+            self._timer.unsubscribe(on_change)
+            self._executor.shutdown(wait=False)
+
+    def _handle_signal(self, signum, stopping: asyncio.Event) -> None:
+        self._logger.info("Received signal %s, stopping server...", signum)
+        stopping.set()
+
+    def _on_change(self, change: tuple) -> None:
+        self._latest = change
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        peer = (writer.get_extra_info("peername") or ("-",))[0]
+        if len(self._connections) >= self._max_connections:
+            self._logger.warning("%s - refused: already at max_connections (%d)", peer, self._max_connections)
+            writer.write(self._response_head(503, [("Content-Type", "text/plain"), ("Retry-After", "1")],
+                                             len(b"Too many connections"), keep_alive=False))
+            writer.write(b"Too many connections")
+            await self._close(writer)
+            return
+
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self._keepalive_timeout)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+                keep_alive = await self._handle_request(head, writer, peer)
+        except ConnectionError:
+            pass
+        except asyncio.CancelledError:
+            pass  # Cancelled by _serve() on shutdown; nothing left to do but close
+        finally:
+            self._connections.discard(task)
+            await self._close(writer)
+
+    async def _handle_request(self, head: bytes, writer: asyncio.StreamWriter, peer: str) -> bool:
+        """Answer one request. Returns whether the connection may be reused."""
+        request_line, _, header_block = head.partition(b"\r\n")
+        try:
+            method, target, version = request_line.decode("latin-1").split()
+        except ValueError:
+            await self._send(writer, peer, "-", 400, [("Content-Type", "text/plain")], b"Bad request", False)
+            return False
+        headers = http.client.parse_headers(io.BytesIO(header_block))
+        connection = headers.get("Connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        request = f"{method} {target} {version}"
+
+        if method != "GET":
+            await self._send(writer, peer, request, 501, [("Content-Type", "text/plain")], b"Unsupported method", False)
+            return False
+        if not authorized(self._expected_header, headers):
+            await self._send(writer, peer, request, 401, [("WWW-Authenticate", 'Basic realm="mpd-auto-stop"')],
+                             b"", keep_alive)
+            return keep_alive
+
+        method_name, match = match_route(urlparse.urlparse(target).path)
+        if method_name is None:
+            await self._send(writer, peer, request, 404, [("Content-Type", "text/plain")], b"Not found", keep_alive)
+        elif method_name == "_index":
+            status, extra, body = self._index_page.response(headers)
+            await self._send(writer, peer, request, status, [("Content-Type", "text/html; charset=utf-8")] + extra,
+                             body, keep_alive)
+        elif method_name == "_timer_events":
+            self._logger.info("%s - \"%s\" 200 -", peer, request)
+            await self._timer_events(writer)
+            return False
+        else:
+            loop = asyncio.get_running_loop()
+            status, obj = await loop.run_in_executor(self._executor, self._api.call, method_name, match)
+            await self._send(writer, peer, request, status, [("Content-Type", "application/json")],
+                             json.dumps(obj).encode("utf-8"), keep_alive)
+        return keep_alive
+
+    async def _timer_events(self, writer: asyncio.StreamWriter) -> None:
+        """Same stream as the threaded front end's, but each open stream is
+        just a coroutine waiting on the loop rather than a parked thread."""
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                     b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n")
+        version, _, status = self._latest
+        event = "status"
+        while True:
+            writer.write(format_event(event, status))
+            await writer.drain()
+            while self._latest[0] == version:
+                try:
+                    await asyncio.wait_for(self._changed.wait(), EVENT_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    writer.write(b": keepalive\n\n")
+                    await writer.drain()
+            version, event, status = self._latest
+
+    def _response_head(self, status: int, headers: list, length: int, keep_alive: bool) -> bytes:
+        lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}"]
+        lines.extend(f"{name}: {value}" for name, value in headers)
+        lines.append(f"Content-Length: {length}")
+        if keep_alive:
+            lines.append("Connection: keep-alive")
+            lines.append(f"Keep-Alive: timeout={int(self._keepalive_timeout)}")
+        else:
+            lines.append("Connection: close")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def _send(self, writer: asyncio.StreamWriter, peer: str, request: str, status: int, headers: list,
+                    body: bytes, keep_alive: bool) -> None:
+        writer.write(self._response_head(status, headers, len(body), keep_alive))
+        writer.write(body)
+        self._logger.info("%s - \"%s\" %d %d", peer, request, status, len(body))
+        await writer.drain()
+
+    async def _close(self, writer: asyncio.StreamWriter) -> None:
+        try:
+            writer.close()
+            await writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+
+def build_logger(verbose: bool, config: configparser.SectionProxy) -> logging.Logger:
+    """Console logging in the foreground, otherwise a size-rotated LOG_FILE
+    (or journald, per log_target); written from a background thread either
+    way, so slow log I/O never holds up an HTTP request or the fade."""
     if verbose:
-        handler = logging.StreamHandler()
+        setup_logging("mpd-auto-stop", console=True)
     else:
-        handler = logging.FileHandler(LOG_FILE)
-    handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
-    logger.addHandler(handler)
+        setup_logging("mpd-auto-stop", LOG_FILE, **logging_options(config))
+    logger = logging.getLogger("mpd-auto-stop")
+    logger.setLevel(logging.DEBUG if verbose else logging.INFO)
     return logger
 
 
-def build_app(args: argparse.Namespace, config: configparser.SectionProxy, logger: logging.Logger) -> App:
+def build_app(args: argparse.Namespace, config: configparser.SectionProxy, logger: logging.Logger):
     mpd_host = args.mpd_host or config.get("mpd_host", fallback="localhost")
     mpd_port = args.mpd_port or config.getint("mpd_port", fallback=6600)
     mpd_password = args.mpd_password or config.get("mpd_password", fallback="") or None
@@ -514,16 +916,32 @@ def build_app(args: argparse.Namespace, config: configparser.SectionProxy, logge
     http_port = args.http_port or config.getint("http_port", fallback=9090)
     http_username = args.http_username or config.get("http_username", fallback="")
     http_password = args.http_password or config.get("http_password", fallback="")
+    server = args.server or config.get("server", fallback="threads")
+
+    fade_curve = config.get("fade_curve", fallback="linear")
+    if fade_curve not in CURVES:
+        logger.error("Unknown fade_curve %r in %s (expected one of %s)", fade_curve, CONFIG_FILE, ", ".join(CURVES))
+        sys.exit(1)
 
     mpd = MPDConnection(mpd_host, mpd_port, mpd_password)
-    hooks = Hooks(config)
+    mpd.watch()
+    hooks = Hooks(config, logger)
     timer = Timer(mpd, config, hooks, logger)
 
     template_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "index.html")
     with open(template_path) as f:
         index_html = f.read()
 
-    handler_class = build_handler_class(timer, index_html, logger, http_username, http_password)
+    api = TimerAPI(timer, hooks)
+    index_page = IndexPage(index_html)
+    expected_header = basic_auth_header(http_username, http_password)
+    if server == "asyncio":
+        return AsyncApp(http_host, http_port, timer, api, index_page, logger, expected_header,
+                        max_connections=config.getint("max_connections", fallback=64),
+                        keepalive_timeout=config.getfloat("keepalive_timeout", fallback=15.0))
+    if server != "threads":
+        logger.warning("Unknown server %r in config, using threads", server)
+    handler_class = build_handler_class(timer, api, index_page, logger, expected_header)
     return App(http_host, http_port, handler_class, logger)
 
 
@@ -544,7 +962,7 @@ def start_daemon(args: argparse.Namespace, config: configparser.SectionProxy) ->
     with open(PID_FILE, "w") as f:
         f.write(str(os.getpid()))
 
-    logger = build_logger(verbose=False)
+    logger = build_logger(verbose=False, config=config)
     app = build_app(args, config, logger)
     app.run()
     os.remove(PID_FILE)
@@ -582,6 +1000,8 @@ def main() -> None:
     parser.add_argument("-w", "--mpd-password", default=None, help="MPD password. Overrides mpd-auto-stop.conf.")
     parser.add_argument("-U", "--http-username", default=None, help="HTTP Basic Auth username. Overrides mpd-auto-stop.conf.")
     parser.add_argument("-W", "--http-password", default=None, help="HTTP Basic Auth password. Overrides mpd-auto-stop.conf.")
+    parser.add_argument("--server", choices=("threads", "asyncio"), default=None,
+                        help="HTTP front end: a thread per connection, or one asyncio event loop. Overrides mpd-auto-stop.conf.")
     parser.add_argument("-s", "--stop", action="store_true", help="Stop the daemon")
     parser.add_argument("-v", "--verbose", action="store_true", help="Run in the foreground with console logging")
     args = parser.parse_args()
@@ -594,7 +1014,7 @@ def main() -> None:
     config = load_config()
 
     if args.verbose:
-        logger = build_logger(verbose=True)
+        logger = build_logger(verbose=True, config=config)
         app = build_app(args, config, logger)
         app.run()
     else:
@@ -0,0 +1 @@
+../common/mpd_ramp.py
\ No newline at end of file
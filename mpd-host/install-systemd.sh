@@ -0,0 +1,59 @@
+#!/usr/bin/bash
+
+# mpd-host systemd --user service installer
+#
+# Installs mpd-host.py to ~/bin and enables it as a systemd --user service.
+# It only hosts tools that are already installed: install alarmpd,
+# mpd_rewind_daemon and/or mpd-smart-shuffle with their own installers
+# first, then stop and disable their own daemons (see README.md), since
+# mpd-host replaces them. Run ../install.sh first if ~/bin isn't already
+# on your PATH.
+
+set -e  # Exit on error
+
+INSTALL_DIR="$HOME/bin"
+SCRIPT_NAME="mpd-host.py"
+SHARED_MODULES="mpd_hooks.py mpd_logging.py mpd_profiling.py mpd_ramp.py"  # From ../common, symlinked here; imported by the script
+CONF_EXAMPLE="mpd-host.conf.example"
+UNIT_NAME="mpd-host.service"
+UNIT_DIR="$HOME/.config/systemd/user"  # Per-user systemd unit search path
+
+cd "$(dirname "$(readlink -f "$0")")"
+
+echo "Installing mpd-host (systemd --user service)..."
+
+mkdir -p "$INSTALL_DIR"
+
+echo "Installing python-mpd2..."
+pip3 install --user python-mpd2
+
+echo "Copying host script to $INSTALL_DIR/$SCRIPT_NAME..."
+cp "$SCRIPT_NAME" "$INSTALL_DIR/$SCRIPT_NAME"
+chmod +x "$INSTALL_DIR/$SCRIPT_NAME"
+for f in $SHARED_MODULES; do
+    cp "$f" "$INSTALL_DIR/$f"
+done
+cp "$CONF_EXAMPLE" "$INSTALL_DIR/$CONF_EXAMPLE"
+
+# Each plugin imports its tool's own script from ~/bin; one that's missing
+# is just left out at startup, but say so now rather than only in the log.
+for module in monitor.py mpd_rewind_daemon.py alarmpd.py; do
+    if [ ! -f "$INSTALL_DIR/$module" ]; then
+        echo "Note: $INSTALL_DIR/$module not found; its plugin won't load until that tool is installed." >&2
+    fi
+done
+
+mkdir -p "$UNIT_DIR"
+echo "Installing systemd unit to $UNIT_DIR/$UNIT_NAME..."
+cp "$UNIT_NAME" "$UNIT_DIR/$UNIT_NAME"
+
+# Re-scan unit files for the new one, then start it now and mark it to
+# start automatically on every future login.
+systemctl --user daemon-reload
+systemctl --user enable --now "$UNIT_NAME"
+
+echo "Installation complete! Check status with:"
+echo "  systemctl --user status $UNIT_NAME"
+echo "View logs with:"
+echo "  journalctl --user -u $UNIT_NAME -f"
+echo "Remember to stop the hosted tools' own daemons (see README.md)."
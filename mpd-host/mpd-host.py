@@ -0,0 +1,684 @@
+#!/usr/bin/env python3
+"""
+mpd-host
+
+Runs this repo's always-on MPD daemons -- mpd-smart-shuffle's play
+monitor, mpd_rewind_daemon, and alarmpd -- as plugins of a single asyncio
+process built on python-mpd2's asyncio client, instead of as three
+interpreters each with its own connection, idle loop, reconnect logic,
+signal handling and PID file.
+
+The plugins share one MPD connection: one `idle` on the union of the
+subsystems they care about, with their commands interleaved on the same
+connection (python-mpd2 leaves and re-enters idle around them). Each
+idle event is followed by a single `status`, handed to every plugin
+interested in one of the subsystems that changed.
+
+Each plugin still reads its own tool's config file -- rewind tiers and
+the genre filter from mpd_rewind_daemon.conf, alarms, fades, hooks and
+pre-roll from alarmpd.conf, skip detection and the history database from
+mpd-smart-shuffle's config.ini -- so each stays individually
+configurable. Only the MPD connection, logging, and which plugins to load
+come from ~/.config/mpd-scripts/mpd-host/mpd-host.conf (seeded from
+mpd-host.conf.example on first run). Don't also run a hosted tool's own
+daemon.
+"""
+
+import argparse
+import asyncio
+import configparser
+import logging
+import os
+import signal
+import sys
+import time
+from datetime import datetime, timedelta
+
+from mpd import CommandError
+from mpd import ConnectionError as MPDConnectionError
+from mpd.asyncio import MPDClient
+
+from mpd_hooks import HookRunner
+from mpd_logging import setup_logging, logging_options
+from mpd_profiling import install_sampling_profiler
+from mpd_ramp import Fade, Ramp
+
+CONFIG_DIR = os.path.join(os.path.expanduser("~"), ".config", "mpd-scripts", "mpd-host")
+CONFIG_FILE = os.path.join(CONFIG_DIR, "mpd-host.conf")
+
+STATE_DIR = os.path.join(os.path.expanduser("~"), ".local", "state", "mpd-host")
+PID_FILE = os.path.join(STATE_DIR, "mpd-host.pid")
+LOG_FILE = os.path.join(STATE_DIR, "mpd-host.log")
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+RECONNECT_SECONDS = 5
+
+# Installed, the hosted tools' modules sit alongside this script in ~/bin.
+# In a checkout, each lives in its own sibling directory.
+SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
+for _tool_dir in ("mpd-smart-shuffle", "mpd_rewind_daemon", "alarmpd"):
+    _tool_path = os.path.normpath(os.path.join(SCRIPT_DIR, "..", _tool_dir))
+    if os.path.isdir(_tool_path):
+        sys.path.append(_tool_path)
+
+
+class Plugin:
+    """A daemon hosted by mpd-host. `subsystems` lists the idle
+    subsystems it wants on_idle() calls for; it sends commands over
+    `host.client`, which is replaced on every reconnect, so it should
+    never hold on to a client of its own."""
+
+    name = ""
+    subsystems = ()
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+        self.host = None
+
+    async def start(self, host: "Host") -> None:
+        """Called after every (re)connect, before the shared idle starts."""
+        self.host = host
+
+    async def on_idle(self, changed: list, status: dict) -> None:
+        """Called for each idle event touching one of `subsystems`, with
+        the status fetched right after it."""
+
+    async def stop(self) -> None:
+        """Called once, at shutdown."""
+
+
+class MonitorPlugin(Plugin):
+    """mpd-smart-shuffle's play/skip history recorder (monitor.py)."""
+
+    name = "monitor"
+    subsystems = ("player",)
+
+    def __init__(self, logger: logging.Logger):
+        super().__init__(logger)
+        import monitor  # Opens the history database, so only when this plugin is loaded
+        self._recorder = monitor.PlayRecorder()
+
+    async def on_idle(self, changed: list, status: dict) -> None:
+        current = await self.host.client.currentsong()
+        key = self._recorder.on_player(status, current)
+        if key is None:
+            return
+
+        now = str(time.time())
+        try:
+            await self.host.client.sticker_set("song", current["file"], "lastplayed_unixtime", now)
+            self._recorder.record_play(key, now)
+            self.logger.debug("Recorded play: %s - %s", current["artist"], current["title"])
+        except (MPDConnectionError, OSError):
+            raise
+        except Exception as e:
+            self.logger.error("Failed to record play: %s", e, exc_info=True)
+
+
+class RewindPlugin(Plugin):
+    """mpd_rewind_daemon: rewinds a track on resume, by an amount scaled
+    to how long it was paused."""
+
+    name = "rewind"
+    subsystems = ("player",)
+
+    def __init__(self, logger: logging.Logger):
+        super().__init__(logger)
+        import mpd_rewind_daemon
+        self._rewind = mpd_rewind_daemon
+        self._last_state = None
+        self._pause_started_at = None
+        self._genre_song_id = None
+        self._genre_allowed = True
+
+    async def start(self, host: "Host") -> None:
+        await super().start(host)
+        # Seed the state, so the first pause after (re)connecting is seen
+        # as one.
+        self._last_state = (await host.client.status()).get("state")
+        if self._last_state == "pause" and self._pause_started_at is None:
+            self._pause_started_at = time.time()
+
+    async def on_idle(self, changed: list, status: dict) -> None:
+        state = status.get("state")
+        await self._update_genre_cache(status)
+
+        if state == "pause" and self._last_state == "play":
+            self._pause_started_at = time.time()
+        elif state == "play" and self._last_state == "pause":
+            pause_duration = (time.time() - self._pause_started_at) if self._pause_started_at else 0.0
+            await self._rewind_and_resume(pause_duration, status)
+            self._pause_started_at = None
+        self._last_state = state
+
+    async def _update_genre_cache(self, status: dict) -> None:
+        """Re-check the genre filter once per song change, like
+        MPDRewindDaemon.update_genre_cache()."""
+        if not self._rewind.GENRE_FILTER_ENABLED:
+            return
+        song_id = status.get("songid")
+        if song_id == self._genre_song_id:
+            return
+        self._genre_song_id = song_id
+        if song_id is None:
+            self._genre_allowed = False
+            return
+        try:
+            current = await self.host.client.currentsong()
+        except CommandError as e:
+            self.logger.warning("Error fetching current song for genre filter: %s", e)
+            self._genre_song_id = None  # Try again next time
+            self._genre_allowed = False
+            return
+        self._genre_allowed = self._rewind.song_genre_allowed(current)
+
+    async def _rewind_and_resume(self, pause_duration: float, status: dict) -> None:
+        """One relative seekcur, as in MPDRewindDaemon.rewind_and_resume()."""
+        if not self._genre_allowed:
+            self.logger.info("Current track's genre is not in genre_filter; skipping rewind.")
+            return
+
+        seek_back_time = self._rewind.rewind_amount(pause_duration)
+        if seek_back_time <= 0:
+            self.logger.info("Paused for %.2fs; too brief to rewind.", pause_duration)
+            return
+
+        try:
+            if float(status.get("elapsed", 0)) <= seek_back_time:
+                self.logger.info("Paused for %.2fs; rewinding to the start of the track.", pause_duration)
+                await self.host.client.seekcur(0)
+            else:
+                self.logger.info("Paused for %.2fs; rewinding %.2fs.", pause_duration, seek_back_time)
+                await self.host.client.seekcur(f"-{seek_back_time:g}")
+        except CommandError as e:
+            self.logger.warning("Error during rewind operation: %s", e)
+
+
+class AlarmPlugin(Plugin):
+    """alarmpd: plays playlists named after a time at that time, fading
+    the volume in. The schedule runs as its own task, woken by playlist
+    changes and (while fading) volume changes from the shared idle, and
+    otherwise asleep until the next alarm, pre-roll, fade step or clock
+    re-check -- the same loop as AlarmDaemon.run()."""
+
+    name = "alarm"
+    subsystems = ("stored_playlist", "mixer")
+
+    def __init__(self, logger: logging.Logger):
+        super().__init__(logger)
+        import alarmpd
+        self._alarmpd = alarmpd
+        options = alarmpd.daemon_options(alarmpd.load_config())
+        self._interval = options["interval"]
+        self._fade_seconds_per_percent = options["fade_duration"] / 100.0 if options["fade_duration"] > 0 else 0
+        self._fade_curve = options["fade_curve"]
+        self._default_max_volume = options["default_max_volume"]
+        self._pre_hook = options["pre_hook"]
+        self._post_hook = options["post_hook"]
+        self._preroll_seconds = max(0, options["preroll_seconds"])
+        self._preroll_bytes = max(0, options["preroll_mb"]) * 1024 * 1024
+        self._music_directory = options["music_directory"]
+        self._hooks = HookRunner(logger, options["max_concurrent_hooks"], options["hook_timeout"])
+
+        self._queue = alarmpd.AlarmQueue(self._default_max_volume)
+        self._scheduled_time = None
+        self._scheduled_schedule = None
+        self._prerolled = None
+        self._playlists_changed = True
+        self._wakeup = None  # Created in start(), on the host's event loop
+        self._task = None
+        self._warming = set()
+        self._fade = None
+        self._volume = None
+        self._pending = []
+
+    async def start(self, host: "Host") -> None:
+        await super().start(host)
+        # Playlist changes made while disconnected were never reported.
+        self._playlists_changed = True
+        self._volume = None
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._schedule())
+        self._wakeup.set()
+
+    async def on_idle(self, changed: list, status: dict) -> None:
+        if "stored_playlist" in changed:
+            self._playlists_changed = True
+            self._wakeup.set()
+        if "mixer" in changed:
+            try:
+                volume = int(status.get("volume", -1))
+            except ValueError:
+                volume = -1
+            self._volume = volume if volume >= 0 else None
+            if self._fade is not None:
+                self._wakeup.set()
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self.logger.info("Hooks: %s", self._hooks.stats())
+
+    async def _schedule(self) -> None:
+        while True:
+            self._wakeup.clear()
+            now = datetime.now().astimezone()
+            next_fade_step = None
+            try:
+                if self._playlists_changed:
+                    await self._rescan(now)
+                self._queue.resync(now)
+                self._reschedule()
+                if self._preroll_due(now):
+                    await self._preroll(self._scheduled_schedule)
+                if self._scheduled_time is not None and now >= self._scheduled_time:
+                    # A collision (no schedule) is skipped rather than fired.
+                    schedule = self._scheduled_schedule
+                    if schedule is not None:
+                        prerolled = self._prerolled == (self._scheduled_time, schedule.playlist_name)
+                        try:
+                            await self._fire(schedule, pre_hook=not prerolled)
+                        except CommandError as e:
+                            self.logger.error("Alarm %r failed: %s", schedule.playlist_name, e)
+                    self._queue.advance(self._scheduled_time)
+                    self._reschedule()
+                if self._fade is not None:
+                    next_fade_step = await self._fade_tick()
+            except (MPDConnectionError, OSError) as e:
+                # start() wakes this up again once the host has reconnected.
+                self.logger.warning("Lost connection to MPD (%s); waiting for a reconnect.", e)
+                await self._sleep(self._interval)
+                continue
+            except Exception:
+                self.logger.exception("Alarm scheduling failed")
+                await self._sleep(self._interval)
+                continue
+
+            timeout = self._interval
+            if next_fade_step is not None:
+                timeout = min(timeout, next_fade_step - time.monotonic())
+            if self._scheduled_time is not None:
+                wake_at = self._scheduled_time
+                if self._preroll_due(wake_at):  # Still to pre-roll, so wake for that first
+                    wake_at -= timedelta(seconds=self._preroll_seconds)
+                timeout = min(timeout, (wake_at - datetime.now().astimezone()).total_seconds())
+            await self._sleep(timeout)
+
+    async def _sleep(self, seconds: float) -> None:
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), max(0.0, seconds))
+        except asyncio.TimeoutError:
+            pass
+
+    async def _rescan(self, now: datetime) -> None:
+        self._playlists_changed = False
+        try:
+            entries = await self.host.client.listplaylists()
+        except Exception:
+            self._playlists_changed = True
+            raise
+        self._queue.update((entry["playlist"] for entry in entries), now)
+        self.logger.debug("Rescanned stored playlists: %d alarm(s).", len(self._queue))
+
+    def _reschedule(self) -> None:
+        new_time, new_schedule = self._queue.peek()
+        if new_time == self._scheduled_time and new_schedule is self._scheduled_schedule:
+            return
+        self._scheduled_time = new_time
+        self._scheduled_schedule = new_schedule
+        if new_time is None:
+            return
+        if new_schedule is None:
+            names = ", ".join(repr(schedule.playlist_name) for schedule in self._queue.at(new_time))
+            self.logger.error(
+                "Multiple alarms scheduled for the same time (%s): %s. "
+                "Refusing to schedule either until this is resolved.", new_time, names
+            )
+        else:
+            self.logger.info("Next alarm: %r at %s", new_schedule.playlist_name, new_time)
+
+    def _preroll_due(self, now: datetime) -> bool:
+        return (
+            self._preroll_seconds > 0
+            and self._scheduled_schedule is not None
+            and not self._scheduled_schedule.skip_once
+            and self._prerolled != (self._scheduled_time, self._scheduled_schedule.playlist_name)
+            and now >= self._scheduled_time - timedelta(seconds=self._preroll_seconds)
+        )
+
+    async def _preroll(self, schedule) -> None:
+        self._prerolled = (self._scheduled_time, schedule.playlist_name)
+        self.logger.info("Pre-rolling alarm %r.", schedule.playlist_name)
+        self._hooks.run("pre_alarm_hook", self._pre_hook)
+
+        # The asyncio client hands back listplaylist's lines as a generator.
+        try:
+            uris = list(await self.host.client.listplaylist(schedule.playlist_name))
+        except CommandError as e:
+            # Renamed or deleted since it was scheduled; the rescan that
+            # follows drops it, and the pre-roll is only a warm-up anyway.
+            self.logger.warning("Couldn't pre-roll %r: %s", schedule.playlist_name, e)
+            return
+        if not uris or "://" in uris[0]:
+            return  # Empty, or a stream -- nothing on disk to warm up
+        music_directory = self._music_directory
+        if not music_directory:
+            try:
+                music_directory = await self.host.client.config()
+            except CommandError:
+                self.logger.debug("MPD won't report music_directory; set it in alarmpd.conf to warm up files.")
+        if not music_directory or self._preroll_bytes == 0:
+            return
+        task = asyncio.create_task(self._warm(os.path.join(music_directory, uris[0])))
+        self._warming.add(task)
+        task.add_done_callback(self._warming.discard)
+
+    async def _warm(self, path: str) -> None:
+        try:
+            elapsed = await asyncio.to_thread(self._alarmpd.warm_file, path, self._preroll_bytes)
+        except OSError as e:
+            self.logger.warning("Couldn't warm up %s: %s", path, e)
+            return
+        self.logger.debug("Warmed up %s in %.1fs.", path, elapsed)
+
+    async def _fire(self, schedule, pre_hook: bool = True) -> None:
+        client = self.host.client
+        if schedule.skip_once:
+            self.logger.info("Skipping alarm %r (one-time skip).", schedule.playlist_name)
+            try:
+                await client.rename(schedule.playlist_name, schedule.playlist_name[1:])
+            except CommandError as e:
+                self.logger.warning("Failed to restore playlist name after skip: %s", e)
+            return
+
+        self.logger.info("Firing alarm: %r", schedule.playlist_name)
+        if pre_hook:
+            self._hooks.run("pre_alarm_hook", self._pre_hook)
+
+        offset = len(await client.playlistinfo())
+        await client.load(schedule.playlist_name)
+
+        if self._fade_seconds_per_percent > 0:
+            await client.setvol(0)
+            # Anything cached predates that setvol; wait for the next mixer
+            # event rather than take it for a manual change.
+            self._volume = None
+            target = schedule.max_volume
+            self._fade = Fade(
+                Ramp(0, target, self._fade_seconds_per_percent * target, self._fade_curve),
+                self._send_volume,
+                lambda: self._volume,
+                keep_rate=True,
+                on_manual=lambda level: self.logger.info("Volume changed to %d%% mid-fade, ramping from there.", level),
+            )
+        else:
+            await client.setvol(schedule.max_volume)
+
+        await client.play(offset)
+
+        if self._fade is None:
+            self._hooks.run("post_alarm_hook", self._post_hook)
+
+    def _send_volume(self, level: int) -> None:
+        # Fade.step() is synchronous: queue the setvol now, await it after.
+        self._pending.append(self.host.client.setvol(level))
+
+    async def _fade_tick(self):
+        try:
+            next_step = self._fade.step()
+        finally:
+            pending, self._pending = self._pending, []
+            for result in pending:
+                await result
+        if next_step is None:
+            self._fade = None
+            self._hooks.run("post_alarm_hook", self._post_hook)
+        return next_step
+
+
+PLUGINS = {plugin.name: plugin for plugin in (MonitorPlugin, RewindPlugin, AlarmPlugin)}
+
+
+class Host:
+    """Owns the shared MPD connection: connects (retrying until MPD is
+    up), starts the plugins, runs the one idle loop and dispatches its
+    events, and reconnects whenever the connection drops."""
+
+    def __init__(self, host: str, port: int, password: str, plugins: list, logger: logging.Logger):
+        self._host = host
+        self._port = port
+        self._password = password
+        self._plugins = plugins
+        self._logger = logger
+        self._subsystems = sorted({subsystem for plugin in plugins for subsystem in plugin.subsystems})
+        self.client = None
+
+    async def connect(self) -> None:
+        client = MPDClient()
+        await client.connect(self._host, self._port)
+        if self._password:
+            try:
+                await client.password(self._password)
+            except CommandError:
+                client.disconnect()
+                raise
+        self.client = client
+
+    async def run(self) -> int:
+        """Serve until SIGTERM/SIGINT, or until serving fails for good
+        (MPD refusing the password), then stop every plugin. Returns the
+        exit status."""
+        stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, stopping.set)
+
+        self._logger.info("mpd-host started with plugins: %s", ", ".join(plugin.name for plugin in self._plugins))
+        serving = asyncio.create_task(self._serve())
+        stopped = asyncio.create_task(stopping.wait())
+        await asyncio.wait({serving, stopped}, return_when=asyncio.FIRST_COMPLETED)
+        stopped.cancel()
+
+        self._logger.info("Stopping mpd-host...")
+        status = 0
+        if serving.done():
+            status = 1
+            if serving.exception() is not None:
+                self._logger.error("Serving MPD failed", exc_info=serving.exception())
+        else:
+            serving.cancel()
+            try:
+                await serving
+            except asyncio.CancelledError:
+                pass
+        for plugin in self._plugins:
+            await self._call(plugin, plugin.stop())
+        if self.client is not None:
+            self.client.disconnect()
+        self._logger.info("mpd-host stopped.")
+        return status
+
+    async def _serve(self) -> None:
+        """Connect, run the idle loop, and reconnect whenever the
+        connection drops. Returns only if MPD refuses the password, which
+        retrying won't fix."""
+        while True:
+            try:
+                await self.connect()
+            except CommandError as e:
+                self._logger.error("MPD refused the connection (%s); check mpd_password in %s.", e, CONFIG_FILE)
+                return
+            except (MPDConnectionError, OSError) as e:
+                self._logger.warning("Failed to connect to MPD (%s). Retrying in %ds...", e, RECONNECT_SECONDS)
+                await asyncio.sleep(RECONNECT_SECONDS)
+                continue
+            self._logger.info("Connected to MPD at %s:%s.", self._host, self._port)
+
+            try:
+                for plugin in self._plugins:
+                    await self._call(plugin, plugin.start(self))
+                async for changed in self.client.idle(self._subsystems):
+                    status = await self.client.status()
+                    for plugin in self._plugins:
+                        if any(subsystem in plugin.subsystems for subsystem in changed):
+                            await self._call(plugin, plugin.on_idle(changed, status))
+            except (MPDConnectionError, OSError) as e:
+                self._logger.warning("Lost connection to MPD (%s), reconnecting...", str(e) or "connection closed")
+            finally:
+                self.client.disconnect()
+
+    async def _call(self, plugin: Plugin, call) -> None:
+        """Await a plugin call, so that a bug in one plugin is logged
+        instead of taking the others down with it. Connection errors are
+        the host's to handle."""
+        try:
+            await call
+        except (MPDConnectionError, OSError):
+            raise
+        except Exception:
+            self._logger.exception("Plugin %s failed", plugin.name)
+
+
+def load_config() -> configparser.SectionProxy:
+    """Load ~/.config/mpd-scripts/mpd-host/mpd-host.conf, seeding it from the
+    mpd-host.conf.example template shipped alongside this script on first
+    run.
+
+    Returns:
+        configparser.SectionProxy: the "mpd-host" section.
+    """
+    if not os.path.exists(CONFIG_FILE):
+        os.makedirs(CONFIG_DIR, mode=0o700, exist_ok=True)
+        template = os.path.join(SCRIPT_DIR, "mpd-host.conf.example")
+        with open(template) as src, open(CONFIG_FILE, "w") as dst:
+            dst.write(src.read())
+        os.chmod(CONFIG_FILE, 0o600)  # May contain an MPD password
+
+    config = configparser.ConfigParser()
+    config.read(CONFIG_FILE)
+    return config["mpd-host"]
+
+
+def check_permissions() -> None:
+    """Ensure STATE_DIR (holding the PID and log files) exists and is
+    writable, creating it if needed. Exits the process if it can't be."""
+    try:
+        os.makedirs(STATE_DIR, exist_ok=True)
+    except OSError as e:
+        print(f"Permission denied: cannot create {STATE_DIR}: {e}")
+        sys.exit(1)
+
+    if not os.access(STATE_DIR, os.W_OK):
+        print(f"Permission denied: cannot write to {STATE_DIR}.")
+        sys.exit(1)
+
+
+def load_plugins(names: str, logger: logging.Logger) -> list:
+    """Instantiate the comma-separated plugin `names`. One that can't be
+    loaded (its tool isn't installed, or its config is invalid) is logged
+    and left out rather than stopping the others."""
+    plugins = []
+    for name in (name.strip() for name in names.split(",")):
+        if not name:
+            continue
+        if name not in PLUGINS:
+            logger.error("Unknown plugin %r (expected one of: %s)", name, ", ".join(PLUGINS))
+            continue
+        try:
+            plugins.append(PLUGINS[name](logging.getLogger(f"mpd-host.{name}")))
+        except (ImportError, ValueError, KeyError, OSError) as e:
+            logger.error("Not loading plugin %s: %s", name, e)
+    return plugins
+
+
+def run(config: configparser.SectionProxy, verbose: bool) -> None:
+    # Console logging in verbose mode; otherwise a size-rotated LOG_FILE
+    # (or journald, per log_target), written from a background thread.
+    if verbose:
+        setup_logging("mpd-host", level=logging.DEBUG, console=True, fmt=LOG_FORMAT)
+    else:
+        setup_logging("mpd-host", LOG_FILE, fmt=LOG_FORMAT, **logging_options(config))
+    logger = logging.getLogger("mpd-host")
+
+    plugins = load_plugins(config.get("plugins", fallback="monitor, rewind, alarm"), logger)
+    if not plugins:
+        logger.error("No plugins loaded; nothing to do.")
+        sys.exit(1)
+
+    install_sampling_profiler("mpd-host", logger.info)
+    host = Host(
+        config.get("mpd_host", fallback="localhost"),
+        config.getint("mpd_port", fallback=6600),
+        config.get("mpd_password", fallback=""),
+        plugins,
+        logger,
+    )
+    sys.exit(asyncio.run(host.run()))
+
+
+def start_daemon(config: configparser.SectionProxy) -> None:
+    """Forks the process, creates a new session, and runs the host in the
+    background, tracking its PID for later --stop."""
+    if os.path.exists(PID_FILE):
+        print("Daemon is already running.")
+        sys.exit(1)
+
+    pid = os.fork()
+    if pid > 0:
+        sys.exit(0)
+
+    os.setsid()
+
+    with open(PID_FILE, "w") as f:
+        f.write(str(os.getpid()))
+    try:
+        run(config, verbose=False)
+    finally:
+        if os.path.exists(PID_FILE):
+            os.remove(PID_FILE)
+
+
+def stop_daemon() -> None:
+    """Sends SIGTERM to the PID recorded in PID_FILE, if it's still running."""
+    if not os.path.exists(PID_FILE):
+        print("Daemon is not running.")
+        sys.exit(1)
+
+    with open(PID_FILE) as f:
+        pid = int(f.read().strip())
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        print(f"No process found with PID {pid}. The daemon may have already stopped.")
+        os.remove(PID_FILE)
+        sys.exit(0)
+    except PermissionError:
+        print(f"Permission error while checking process with PID {pid}.")
+        sys.exit(1)
+
+    os.kill(pid, signal.SIGTERM)
+    print("Daemon stopped.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="mpd-host: run the monitor, rewind and alarm daemons in one process")
+    parser.add_argument("-s", "--stop", action="store_true", help="Stop the daemon")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Run in the foreground with console logging")
+    cli_args = parser.parse_args()
+
+    if cli_args.stop:
+        stop_daemon()
+    else:
+        check_permissions()
+        cli_config = load_config()
+        if cli_args.verbose:
+            run(cli_config, verbose=True)
+        else:
+            start_daemon(cli_config)
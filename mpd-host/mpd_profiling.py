@@ -0,0 +1 @@
+../common/mpd_profiling.py
\ No newline at end of file
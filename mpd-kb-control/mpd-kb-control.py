@@ -6,7 +6,8 @@ Dispatches multimedia-key presses to MPD, for binding to a window manager's
 keybindings (XF86AudioPlay, XF86AudioNext, etc.).
 
 Usage:
-    mpd-kb-control.py {play,next,prev,raise,lower,mute,consume,random,repeat,single}
+    mpd-kb-control.py {play,next,prev,raise,lower,forward,back,mute,consume,random,repeat,single}
+    mpd-kb-control.py --daemon
 
 Commands:
     play     Toggle play/pause. If MPD is stopped, starts playback instead
@@ -18,6 +19,8 @@ Commands:
     raise    Raise the volume by volume_step (clamped to max_volume, if
              enforce_max_volume is enabled).
     lower    Lower the volume by volume_step.
+    forward  Seek forward seek_step seconds in the current song.
+    back     Seek back seek_step seconds.
     mute     Toggle mute: saves the current volume and sets it to 0, or
              restores the last saved volume if already at 0.
     consume  Toggle consume mode (played tracks are removed from the queue).
@@ -30,6 +33,14 @@ None of consume/random/repeat/single have a dedicated multimedia key on a
 standard keyboard -- see README.md for examples binding them on a separate
 keypad instead.
 
+Each invocation normally starts Python, connects to MPD, runs one command
+and disconnects. With --daemon, it instead stays running with one
+authenticated connection held open, taking command names over a Unix socket
+(see socket_path()); bind keys to the tiny mpd-kb-send.py client (or socat)
+instead, and a key press costs a socket write rather than an interpreter
+start and a new MPD connection. The daemon also coalesces bursts of
+volume/seek presses from a held key into one change.
+
 Connection settings and behavior come from
 ~/.config/mpd-scripts/mpd-kb-control/mpd-kb-control.conf, seeded from
 mpd-kb-control.conf.example on first run.
@@ -39,12 +50,18 @@ import argparse
 import configparser
 import fcntl
 import os
+import signal
+import socket
 import subprocess
 import sys
+import time
 
 from mpd import MPDClient, CommandError
+from mpd import ConnectionError as MPDConnectionError
 from socket import error as SocketError
 
+from mpd_profiling import profile_run, install_sampling_profiler
+
 CONFIG_DIR = os.path.join(os.path.expanduser("~"), ".config", "mpd-scripts", "mpd-kb-control")
 CONFIG_FILE = os.path.join(CONFIG_DIR, "mpd-kb-control.conf")
 
@@ -52,6 +69,13 @@ STATE_DIR = os.path.join(os.path.expanduser("~"), ".local", "state", "mpd-kb-con
 VOLUME_SAVE_FILE = os.path.join(STATE_DIR, "volume_save")
 MUTE_LOCK_FILE = os.path.join(STATE_DIR, "mute.lock")
 
+SOCKET_NAME = "mpd-kb-control.sock"
+
+# How often --daemon pings MPD while no keys are pressed, to stay inside
+# MPD's connection_timeout (60s by default) instead of reconnecting on the
+# next press.
+KEEPALIVE_SECONDS = 30
+
 
 def die(msg: str) -> None:
     """Print an error message to stderr and exit with status 1."""
@@ -80,6 +104,13 @@ def load_config() -> configparser.SectionProxy:
     return config["mpd-kb-control"]
 
 
+def socket_path() -> str:
+    """Where --daemon listens: $XDG_RUNTIME_DIR (private to the user, and
+    cleared on logout) if set, otherwise the state directory. mpd-kb-send.py
+    works out the same path."""
+    return os.path.join(os.environ.get("XDG_RUNTIME_DIR") or STATE_DIR, SOCKET_NAME)
+
+
 def notify(config: configparser.SectionProxy, message: str) -> None:
     """Show a desktop notification via notify-send, if notify is enabled in
     the config and notify-send is available. Never fatal -- a missing
@@ -134,6 +165,28 @@ def cmd_lower(client: MPDClient, config: configparser.SectionProxy) -> None:
     _adjust_volume(client, config, -step)
 
 
+def _seek(client: MPDClient, config: configparser.SectionProxy, delta: int) -> None:
+    """Seek delta seconds from the current position, clamped to the start
+    and end of the song. Does nothing while stopped."""
+    status = client.status()
+    if status.get("state") not in ("play", "pause"):
+        return
+    elapsed = float(status.get("elapsed", 0))
+    target = max(0.0, elapsed + delta)
+    duration = float(status.get("duration", 0))
+    if duration:
+        target = min(target, max(0.0, duration - 1))
+    client.seekcur(f"{target:.1f}")
+
+
+def cmd_forward(client: MPDClient, config: configparser.SectionProxy) -> None:
+    _seek(client, config, config.getint("seek_step", fallback=10))
+
+
+def cmd_back(client: MPDClient, config: configparser.SectionProxy) -> None:
+    _seek(client, config, -config.getint("seek_step", fallback=10))
+
+
 def cmd_mute(client: MPDClient, config: configparser.SectionProxy) -> None:
     """Toggle mute: save the current (non-zero) volume and zero it, or
     restore the last saved volume if already at 0.
@@ -189,6 +242,11 @@ cmd_random = _make_toggle("random", "random", "Random")
 cmd_repeat = _make_toggle("repeat", "repeat", "Repeat")
 cmd_single = _make_toggle("single", "single", "Single")
 
+# Commands --daemon coalesces (see KeyDaemon), as steps of volume_step or
+# seek_step in each direction.
+VOLUME_DIRECTIONS = {"raise": 1, "lower": -1}
+SEEK_DIRECTIONS = {"forward": 1, "back": -1}
+
 
 COMMANDS = {
     "play": cmd_play,
@@ -196,6 +254,8 @@ COMMANDS = {
     "prev": cmd_prev,
     "raise": cmd_raise,
     "lower": cmd_lower,
+    "forward": cmd_forward,
+    "back": cmd_back,
     "mute": cmd_mute,
     "consume": cmd_consume,
     "random": cmd_random,
@@ -204,22 +264,214 @@ COMMANDS = {
 }
 
 
+def connect(host: str, port: int, password) -> MPDClient:
+    """Connect (and authenticate, if password is set) to MPD. Raises
+    SocketError or CommandError on failure."""
+    client = MPDClient()
+    client.connect(host, port)
+    if password:
+        try:
+            client.password(password)
+        except CommandError:
+            client.disconnect()
+            raise
+    return client
+
+
+class KeyDaemon:
+    """--daemon mode: holds one MPD connection open and runs each command
+    name written to the socket at socket_path().
+
+    Commands run in arrival order on the one connection, so two presses
+    can't race each other (mute's file lock is still taken, since a
+    one-shot invocation may run alongside). A dropped connection --
+    including MPD closing it for idleness between pings -- is reopened and
+    the command retried once. The config file is re-read whenever it
+    changes, so edits apply without a restart. Failures are reported the
+    same way as in one-shot mode: a notification (if enabled) and stderr.
+
+    Volume and seek presses are coalesced: a raise/lower/forward/back
+    starts a batch that takes in every further one arriving within
+    coalesce_ms (and any already queued up behind a slow command), then
+    runs as a single status + setvol/seekcur, clamped once, with one
+    notification. Holding a key down therefore can't flood MPD or queue up
+    a backlog that keeps changing the volume after it's released.
+    """
+
+    def __init__(self, host: str, port: int, password) -> None:
+        self._host = host
+        self._port = port
+        self._password = password
+        self._client = None
+        self._config = load_config()
+        self._config_mtime = os.path.getmtime(CONFIG_FILE)
+        self._server = None
+
+    def serve(self) -> None:
+        path = socket_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+        except OSError:
+            # Not listening: nothing there, or a socket left behind by a
+            # daemon that didn't get to clean up.
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        else:
+            die(f"mpd-kb-control is already running (listening on {path}).")
+        finally:
+            probe.close()
+
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o077)  # Only this user may send commands
+        try:
+            self._server.bind(path)
+        finally:
+            os.umask(old_umask)
+        self._server.listen(16)
+        # Raise SystemExit on SIGTERM too, so the finally below removes the socket.
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        install_sampling_profiler("mpd-kb-control")
+
+        print(f"mpd-kb-control listening on {path}", file=sys.stderr)
+        try:
+            command = None
+            while True:
+                if command is None:
+                    command = self._receive(KEEPALIVE_SECONDS)
+                if command is None:
+                    self._keepalive()
+                    continue
+                self._reload_config()
+                if command in VOLUME_DIRECTIONS or command in SEEK_DIRECTIONS:
+                    # Whatever ended the batch, if anything, runs next.
+                    command = self._run_batch(command)
+                else:
+                    self._run(command, COMMANDS[command])
+                    command = None
+        finally:
+            self._server.close()
+            os.unlink(path)
+            if self._client is not None:
+                self._client.disconnect()
+
+    def _receive(self, timeout: float):
+        """Wait up to timeout seconds for the next known command name,
+        returning None if none arrives."""
+        deadline = time.monotonic() + timeout
+        while True:
+            self._server.settimeout(max(0.0, deadline - time.monotonic()))
+            try:
+                conn, _ = self._server.accept()
+            except (socket.timeout, BlockingIOError):
+                # A timeout of 0 (deadline already passed) makes the socket
+                # non-blocking, so an empty backlog raises BlockingIOError.
+                return None
+            with conn:
+                conn.settimeout(1.0)  # A stuck client mustn't hold up other keys
+                try:
+                    command = conn.recv(64).decode("ascii", "replace").strip()
+                except OSError:
+                    continue
+            if not command:
+                continue  # e.g. another --daemon checking whether this one is up
+            if command not in COMMANDS:
+                print(f"Ignoring unknown command {command!r}", file=sys.stderr)
+                continue
+            return command
+
+    def _keepalive(self) -> None:
+        if self._client is not None:
+            try:
+                self._client.ping()
+            except (MPDConnectionError, OSError):
+                self._client.disconnect()
+                self._client = None
+
+    def _reload_config(self) -> None:
+        mtime = os.path.getmtime(CONFIG_FILE)
+        if mtime != self._config_mtime:
+            self._config, self._config_mtime = load_config(), mtime
+
+    def _run_batch(self, command: str):
+        """Coalesce command with the volume/seek presses that follow it
+        within coalesce_ms, run the totals, and return the command that
+        ended the batch early (None if the window just ran out)."""
+        window = self._config.getint("coalesce_ms", fallback=30) / 1000
+        volume_steps = seek_steps = 0
+        deadline = time.monotonic() + window
+        while command is not None:
+            if command in VOLUME_DIRECTIONS:
+                volume_steps += VOLUME_DIRECTIONS[command]
+            elif command in SEEK_DIRECTIONS:
+                seek_steps += SEEK_DIRECTIONS[command]
+            else:
+                break
+            command = self._receive(deadline - time.monotonic())
+
+        if volume_steps:
+            delta = volume_steps * self._config.getint("volume_step", fallback=5)
+            self._run("raise" if delta > 0 else "lower", lambda client, config: _adjust_volume(client, config, delta))
+        if seek_steps:
+            delta = seek_steps * self._config.getint("seek_step", fallback=10)
+            self._run("forward" if delta > 0 else "back", lambda client, config: _seek(client, config, delta))
+        return command
+
+    def _run(self, label: str, action) -> None:
+        """Run action(client, config), connecting first if needed, and
+        reconnecting and retrying once if the connection has dropped."""
+        config = self._config
+        for attempt in range(2):
+            if self._client is None:
+                try:
+                    self._client = connect(self._host, self._port, self._password)
+                except SocketError as e:
+                    notify(config, "Failed to connect to MPD")
+                    print(f"Failed to connect to MPD server: {e}", file=sys.stderr)
+                    return
+                except CommandError as e:
+                    notify(config, "MPD authentication failed")
+                    print(f"Error authenticating with MPD: {e}", file=sys.stderr)
+                    return
+            try:
+                action(self._client, config)
+            except CommandError as e:
+                notify(config, f"'{label}' failed")
+                print(f"MPD command failed: {e}", file=sys.stderr)
+            except (MPDConnectionError, OSError):
+                self._client.disconnect()
+                self._client = None
+                continue  # Reconnect and retry once
+            return
+        notify(config, f"'{label}' failed: lost connection to MPD")
+        print(f"Lost connection to MPD running {label!r}", file=sys.stderr)
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Dispatch multimedia-key presses to MPD.")
-    parser.add_argument("command", choices=sorted(COMMANDS), help="Action to perform")
+    parser.add_argument("command", nargs="?", choices=sorted(COMMANDS), help="Action to perform")
+    parser.add_argument("-d", "--daemon", action="store_true", help="Stay running with one MPD connection, taking commands from mpd-kb-send.py over a Unix socket")
     parser.add_argument("-H", "--host", default=None, help="MPD host. Overrides mpd-kb-control.conf.")
     parser.add_argument("-P", "--port", default=None, type=int, help="MPD port. Overrides mpd-kb-control.conf.")
     parser.add_argument("-a", "--password", default=None, help="MPD password. Overrides mpd-kb-control.conf.")
     args = parser.parse_args()
+    if (args.command is None) == (not args.daemon):
+        parser.error("give either a command or --daemon")
 
     config = load_config()
     host = args.host or config.get("mpd_host", fallback="localhost")
     port = args.port or config.getint("mpd_port", fallback=6600)
     password = args.password or config.get("mpd_password", fallback="") or None
 
-    client = MPDClient()
+    if args.daemon:
+        KeyDaemon(host, port, password).serve()
+        return
+
     try:
-        client.connect(host, port)
+        client = connect(host, port, password)
     except SocketError as e:
         # Invoked from a keybinding with no visible terminal, so stderr
         # alone would be silently lost -- surface failures as a
@@ -227,12 +479,9 @@ def main() -> None:
         # sees.
         notify(config, "Failed to connect to MPD")
         die(f"Failed to connect to MPD server: {e}")
-    if password:
-        try:
-            client.password(password)
-        except CommandError as e:
-            notify(config, "MPD authentication failed")
-            die(f"Error authenticating with MPD: {e}")
+    except CommandError as e:
+        notify(config, "MPD authentication failed")
+        die(f"Error authenticating with MPD: {e}")
 
     try:
         COMMANDS[args.command](client, config)
@@ -248,4 +497,5 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    with profile_run("mpd-kb-control"):
+        main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+mpd-kb-send
+
+Minimal client for `mpd-kb-control.py --daemon`: writes one command name
+(play, next, raise, ...) to the daemon's Unix socket and exits without
+waiting for it to run. Bind media keys to this instead of
+mpd-kb-control.py once the daemon is running. It deliberately imports only
+the standard library modules Python loads at startup anyway.
+
+If the daemon isn't running, it runs `mpd-kb-control.py COMMAND` from the
+same directory instead, so a key binding keeps working either way.
+
+Usage:
+    mpd-kb-send.py {play,next,prev,raise,lower,forward,back,mute,consume,random,repeat,single}
+"""
+
+import os
+import socket
+import sys
+
+# Must match mpd-kb-control.py's socket_path().
+SOCKET_PATH = os.path.join(
+    os.environ.get("XDG_RUNTIME_DIR") or os.path.join(os.path.expanduser("~"), ".local", "state", "mpd-kb-control"),
+    "mpd-kb-control.sock",
+)
+
+
+def main() -> None:
+    if len(sys.argv) != 2:
+        sys.stderr.write("usage: mpd-kb-send.py COMMAND\n")
+        sys.exit(2)
+    command = sys.argv[1]
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(SOCKET_PATH)
+            sock.sendall(command.encode("ascii", "replace") + b"\n")
+    except OSError:
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mpd-kb-control.py")
+        os.execv(sys.executable, [sys.executable, script, command])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+
+"""
+mpd-libcache
+
+Keeps a compact on-disk snapshot of MPD's library (one tab-separated line
+per song) so shell scripts can filter the whole library in milliseconds
+instead of re-running `mpc listall`/`mpc find` or `find -L` over the music
+directory on every invocation.
+
+The snapshot lives at ~/.cache/mpd-scripts/mpd-libcache/library.tsv. Its
+first line is a header recording MPD's db_update stamp at the time it was
+built; every other line is one song, with these columns in this order:
+
+    uri  artist  albumartist  album  date  genre  duration  last_modified
+
+duration is in seconds (blank if MPD doesn't know it), last_modified is
+epoch seconds. Multi-valued tags are joined with "; ", and tabs/newlines
+inside tag values are replaced with spaces so every record is exactly one
+line.
+
+`query` (and `update`) first ask MPD for its db_update stamp -- a single
+cheap `stats` command -- and only rebuild the snapshot if it changed, so
+the snapshot is never stale and is only rebuilt after an actual library
+update. If MPD can't be reached, an existing snapshot is used as-is.
+
+Like mpc, connection settings come from the MPD_HOST ("host" or
+"password@host") and MPD_PORT environment variables, so the snapshot
+always describes the same MPD the calling script's mpc commands talk to.
+"""
+
+import argparse
+import calendar
+import mmap
+import os
+import sys
+import time
+
+from mpd import MPDClient, CommandError
+from mpd import ConnectionError as MPDConnectionError
+
+from mpd_profiling import profile_run
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "mpd-scripts", "mpd-libcache")
+SNAPSHOT_FILE = os.path.join(CACHE_DIR, "library.tsv")
+
+FIELDS = ("uri", "artist", "albumartist", "album", "date", "genre", "duration", "last_modified")
+HEADER_PREFIX = "#mpd-libcache v1 db_update="
+
+
+def die(msg: str) -> None:
+    """Print an error message to stderr and exit with status 1."""
+    sys.stderr.write(msg)
+    sys.stderr.write("\n")
+    sys.exit(1)
+
+
+def connect() -> MPDClient:
+    """Connect to MPD using MPD_HOST/MPD_PORT, the same way mpc does."""
+    host = os.environ.get("MPD_HOST", "localhost")
+    password = None
+    if "@" in host and not host.startswith("@"):  # "@..." is an abstract socket, not a password
+        password, host = host.split("@", 1)
+    port = int(os.environ.get("MPD_PORT", "6600"))
+
+    client = MPDClient()
+    client.connect(host, port)
+    if password:
+        client.password(password)
+    return client
+
+
+def _tag(song: dict, name: str) -> str:
+    value = song.get(name, "")
+    if isinstance(value, list):
+        value = "; ".join(value)
+    return value.replace("\t", " ").replace("\n", " ").replace("\r", " ")
+
+
+def _last_modified(song: dict) -> str:
+    raw = song.get("last-modified", "")
+    if not raw:
+        return "0"
+    try:
+        return str(calendar.timegm(time.strptime(raw, "%Y-%m-%dT%H:%M:%SZ")))  # MPD reports UTC
+    except ValueError:
+        return "0"
+
+
+def _song_record(song: dict) -> str:
+    duration = song.get("duration") or song.get("time") or ""
+    return "\t".join((
+        _tag(song, "file"),
+        _tag(song, "artist"),
+        _tag(song, "albumartist"),
+        _tag(song, "album"),
+        _tag(song, "date"),
+        _tag(song, "genre"),
+        duration,
+        _last_modified(song),
+    ))
+
+
+def _iter_songs(client: MPDClient):
+    """Yield every song in the library. Walks one top-level directory at a
+    time rather than one `listallinfo` of the whole library, which can
+    overflow MPD's max_output_buffer_size on large collections."""
+    for entry in client.lsinfo(""):
+        if "file" in entry:
+            yield entry
+        elif "directory" in entry:
+            for song in client.listallinfo(entry["directory"]):
+                if "file" in song:
+                    yield song
+
+
+def read_stamp(path: str = SNAPSHOT_FILE):
+    """Return the db_update stamp the snapshot was built from, or None if
+    there's no (valid) snapshot."""
+    try:
+        with open(path) as f:
+            header = f.readline().rstrip("\n")
+    except OSError:
+        return None
+    if not header.startswith(HEADER_PREFIX):
+        return None
+    return header[len(HEADER_PREFIX):]
+
+
+def rebuild(client: MPDClient, stamp: str) -> int:
+    """Write a fresh snapshot tagged with `stamp`, replacing the old one
+    atomically so a concurrent reader never sees a half-written file.
+    Returns the number of songs written."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f"{SNAPSHOT_FILE}.{os.getpid()}.tmp"
+    count = 0
+    try:
+        with open(tmp_path, "w") as f:
+            f.write(f"{HEADER_PREFIX}{stamp}\n")
+            for song in _iter_songs(client):
+                f.write(_song_record(song))
+                f.write("\n")
+                count += 1
+        os.replace(tmp_path, SNAPSHOT_FILE)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return count
+
+
+def refresh(force: bool = False, quiet: bool = True) -> None:
+    """Rebuild the snapshot if MPD's db_update stamp no longer matches it
+    (or always, with force). Falls back to an existing snapshot if MPD
+    can't be reached, and exits with an error if there isn't one."""
+    try:
+        client = connect()
+    except (MPDConnectionError, OSError, CommandError) as e:
+        if read_stamp() is None:
+            die(f"Cannot reach MPD ({e}) and no library snapshot exists yet.")
+        print(f"Warning: cannot reach MPD ({e}); using the existing snapshot.", file=sys.stderr)
+        return
+
+    try:
+        stamp = client.stats().get("db_update", "0")
+        if not force and read_stamp() == stamp:
+            if not quiet:
+                print(f"Snapshot is up to date (db_update {stamp}).")
+            return
+        count = rebuild(client, stamp)
+        if not quiet:
+            print(f"Wrote {count} songs to {SNAPSHOT_FILE}.")
+    finally:
+        client.disconnect()
+
+
+def _parse_fields(raw: str) -> list:
+    names = [name.strip() for name in raw.split(",") if name.strip()]
+    unknown = [name for name in names if name not in FIELDS]
+    if unknown:
+        die(f"Unknown field(s): {', '.join(unknown)}. Valid fields: {', '.join(FIELDS)}")
+    return [FIELDS.index(name) for name in names]
+
+
+def query(args: argparse.Namespace) -> None:
+    """Print every song matching the filters, as the requested columns
+    joined by tabs, one record per line (or NUL-terminated, with -0)."""
+    columns = _parse_fields(args.fields)
+    terminator = b"\0" if args.null else b"\n"
+
+    # Exact, case-sensitive matches, like `mpc find`; genre is a
+    # case-insensitive substring match, since genre tagging is loose.
+    exact = {}
+    for name in ("artist", "albumartist", "album"):
+        value = getattr(args, name)
+        if value is not None:
+            exact[FIELDS.index(name)] = value.encode()
+    genre = args.genre.lower().encode() if args.genre else None
+    genre_col = FIELDS.index("genre")
+    min_mtime = time.time() - args.modified_within * 86400 if args.modified_within is not None else None
+    mtime_col = FIELDS.index("last_modified")
+
+    out = sys.stdout.buffer
+    with open(SNAPSHOT_FILE, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            start = data.find(b"\n") + 1  # Skip the header line
+            end_of_data = len(data)
+            while start < end_of_data:
+                end = data.find(b"\n", start)
+                if end == -1:
+                    end = end_of_data
+                row = data[start:end].split(b"\t")
+                start = end + 1
+
+                if len(row) != len(FIELDS):
+                    continue
+                if any(row[col] != value for col, value in exact.items()):
+                    continue
+                if genre is not None and genre not in row[genre_col].lower():
+                    continue
+                if min_mtime is not None and int(row[mtime_col] or 0) < min_mtime:
+                    continue
+
+                out.write(b"\t".join(row[col] for col in columns))
+                out.write(terminator)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Maintain and query a compact snapshot of the MPD library for shell scripts"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    update_parser = subparsers.add_parser("update", help="Rebuild the snapshot if MPD's database changed")
+    update_parser.add_argument("-f", "--force", action="store_true", help="Rebuild even if it looks up to date")
+
+    query_parser = subparsers.add_parser("query", help="Print songs matching the given filters")
+    query_parser.add_argument("--fields", default=",".join(FIELDS),
+                              help=f"Comma-separated columns to print (default: all, i.e. {','.join(FIELDS)})")
+    query_parser.add_argument("--artist", help="Exact artist match")
+    query_parser.add_argument("--albumartist", help="Exact albumartist match")
+    query_parser.add_argument("--album", help="Exact album match")
+    query_parser.add_argument("--genre", help="Case-insensitive substring match against genre")
+    query_parser.add_argument("--modified-within", type=float, metavar="DAYS",
+                              help="Only songs MPD saw modified in the last DAYS days")
+    query_parser.add_argument("-0", "--null", action="store_true",
+                              help="Terminate records with NUL instead of newline")
+    query_parser.add_argument("-n", "--no-refresh", action="store_true",
+                              help="Use the snapshot as-is, without checking MPD for changes first")
+
+    subparsers.add_parser("path", help="Print the snapshot's path, e.g. to read it directly with awk")
+
+    args = parser.parse_args()
+
+    if args.command == "update":
+        refresh(force=args.force, quiet=False)
+    elif args.command == "query":
+        if args.no_refresh:
+            if read_stamp() is None:
+                die(f"No library snapshot at {SNAPSHOT_FILE}; run '{os.path.basename(sys.argv[0])} update' first.")
+        else:
+            refresh()
+        query(args)
+    elif args.command == "path":
+        print(SNAPSHOT_FILE)
+
+
+if __name__ == "__main__":
+    with profile_run("mpd-libcache"):
+        try:
+            main()
+        except BrokenPipeError:
+            # e.g. `mpd-libcache.py query | head` -- not an error.
+            sys.stderr.close()
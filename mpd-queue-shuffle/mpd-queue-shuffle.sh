@@ -151,8 +151,14 @@ mpc clear
 
 # Fetch all available tracks in the music directory, stored relative to
 # MUSIC_DIR (e.g. "ArtistName/Album/track.mp3") so the artist-grouping
-# below (and the final playlist paths) are correct.
-find "$MUSIC_DIR" -type f -iname "*.mp3" | sed "s|^$MUSIC_DIR||" > "$TRACK_LIST"
+# below (and the final playlist paths) are correct. mpd-libcache.py's
+# library snapshot, if installed, already has exactly those paths and
+# avoids rescanning the whole directory tree on every run.
+if command -v mpd-libcache.py &>/dev/null; then
+    mpd-libcache.py query --fields uri | grep -i '\.mp3$' > "$TRACK_LIST" || true
+else
+    find "$MUSIC_DIR" -type f -iname "*.mp3" | sed "s|^$MUSIC_DIR||" > "$TRACK_LIST"
+fi
 
 # Count the number of tracks per artist, and limit how many from each artist can be included.
 awk -F"/" '{artists[$1]++} END {for (a in artists) print a, (artists[a] < 50 ? 5 : int(artists[a] * 0.10))}' "$TRACK_LIST" > "$ARTIST_LIMITS"
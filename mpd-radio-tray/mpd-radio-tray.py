@@ -7,10 +7,13 @@ with MPD (Music Player Daemon). Offers quick control via tray menu for:
 
 - Stopping playback
 - Categorized stations
+- Searching stations by name as you type
 - Refreshing station list
 - Exiting application
 
-Uses `python-mpd2` internally.
+Uses `python-mpd2` internally. One MPD connection lives on a worker
+thread (MPDWorker), so a slow or unreachable server never blocks the menu:
+clicks are handed to the worker and return immediately.
 
 Configuration:
     Settings (MPD host/port, optional custom tray icon) live in
@@ -20,27 +23,40 @@ Configuration:
     stations.txt.example.
 """
 
+import asyncio
+import bisect
 import configparser
 import os
 import shutil
 import sys
 from collections import defaultdict
 from pathlib import Path
-from typing import Optional, Dict, List, Tuple
+from typing import Awaitable, Callable, Dict, List, Tuple
 
-from PyQt5.QtWidgets import QApplication, QMenu, QSystemTrayIcon, QAction
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtWidgets import (QApplication, QMenu, QSystemTrayIcon, QAction, QWidget, QLineEdit,
+                             QListWidget, QListWidgetItem, QVBoxLayout)
 from PyQt5.QtGui import QIcon, QCursor
-from mpd import MPDClient
+from mpd import CommandError
+from mpd import ConnectionError as MPDConnectionError
+from mpd.asyncio import MPDClient
+
+from mpd_profiling import profile_run
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 CONFIG_DIR = Path.home() / ".config" / "mpd-scripts" / "mpd-radio-tray"
 CONFIG_FILE = CONFIG_DIR / "mpd-radio-tray.conf"
 STATIONS_FILE = CONFIG_DIR / "stations.txt"
 
-# Seconds to wait on an MPD connection/command before giving up, so a hung
-# or unreachable server can't freeze the GUI (Qt's event loop is
-# single-threaded, and every MPD call here runs synchronously on it).
+# Seconds to wait for MPD to answer a connection attempt, and for a clicked
+# command to find a connection, before reporting it as unreachable.
 MPD_TIMEOUT = 5
+# While MPD is unreachable, the worker retries after this many seconds,
+# doubling up to RECONNECT_MAX_SECONDS. A click retries straight away.
+RECONNECT_SECONDS = 5
+RECONNECT_MAX_SECONDS = 60
+# Most stations the search popup lists at once; keep typing to narrow it down.
+MAX_SEARCH_RESULTS = 50
 
 
 def load_config() -> Dict[str, object]:
@@ -72,21 +88,6 @@ def load_config() -> Dict[str, object]:
 CONFIG = load_config()
 
 
-def connect_mpd(tray_icon: Optional["MPDTrayApp"] = None) -> Optional[MPDClient]:
-    """Connect to the MPD server and return the client instance."""
-    client = MPDClient()
-    client.timeout = MPD_TIMEOUT
-    try:
-        client.connect(CONFIG["mpd_host"], CONFIG["mpd_port"])
-        return client
-    except Exception as e:
-        message = f"Could not connect to MPD: {e}"
-        print(f"[MPD Error] {message}")
-        if tray_icon:
-            tray_icon.notify_error(message)
-        return None
-
-
 def load_stations() -> Dict[str, List[Tuple[str, str]]]:
     """
     Load stations from file, grouped by category.
@@ -115,51 +116,270 @@ def load_stations() -> Dict[str, List[Tuple[str, str]]]:
     return stations_by_category
 
 
-def load_station(url: str, tray_icon: Optional["MPDTrayApp"] = None) -> None:
+class StationList:
+    """
+    The station file, parsed, plus a prefix index over station names for
+    search. reload_if_changed() re-parses it only when its mtime or size
+    has changed, so checking it every time the menu opens costs one stat().
     """
-    Load and play a radio URL using MPD.
 
-    Args:
-        url: The radio stream URL to play.
-        tray_icon: Tray icon to surface errors on, if any.
+    def __init__(self):
+        self._stamp = object()  # Matches nothing, so the first check loads
+        self.by_category: Dict[str, List[Tuple[str, str]]] = {}
+        self._stations: List[Tuple[str, str, str]] = []  # (name, url, category)
+        # Every word of every station name, casefolded and sorted, with the
+        # station it came from at the same position in _positions.
+        self._words: List[str] = []
+        self._positions: List[int] = []
+
+    def reload_if_changed(self) -> bool:
+        """Re-read the station file if it changed since the last call.
+        Returns whether it did."""
+        try:
+            stat = STATIONS_FILE.stat()
+            stamp = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            stamp = None
+        if stamp == self._stamp:
+            return False
+        self._stamp = stamp
+
+        self.by_category = load_stations()
+        self._stations = [(name, url, category)
+                          for category, stations in self.by_category.items()
+                          for name, url in stations]
+        index = sorted((word, position)
+                       for position, (name, _, _) in enumerate(self._stations)
+                       for word in set(name.casefold().split()))
+        self._words = [word for word, _ in index]
+        self._positions = [position for _, position in index]
+        return True
+
+    def search(self, query: str, limit: int = MAX_SEARCH_RESULTS) -> List[Tuple[str, str, str]]:
+        """Stations with a word in their name starting with each word of
+        query ("groove sal" finds "Groove Salad"): an exact name first,
+        then names starting with the whole query, then the rest, each in
+        menu order. Only the first word is looked up in the index (a
+        bisect, however many stations there are); the rest filter what it
+        finds."""
+        words = query.casefold().split()
+        if not words:
+            return []
+        first, rest = words[0], words[1:]
+        start = bisect.bisect_left(self._words, first)
+        end = bisect.bisect_left(self._words, first + "\U0010ffff", start)
+        whole = " ".join(words)
+        matches = []
+        for position in set(self._positions[start:end]):
+            name_words = self._stations[position][0].casefold().split()
+            if all(any(word.startswith(part) for word in name_words) for part in rest):
+                name = " ".join(name_words)
+                rank = 0 if name == whole else 1 if name.startswith(whole) else 2
+                matches.append((rank, position))
+        return [self._stations[position] for _, position in sorted(matches)[:limit]]
+
+
+class StationSearch(QWidget):
+    """Type-to-search popup: a search box over the matching stations.
+    Enter (or a double-click) plays the highlighted one; Escape or a click
+    elsewhere closes it."""
+
+    def __init__(self, stations: StationList, play: Callable[[str], None]):
+        super().__init__(None, Qt.Popup)
+        self.stations = stations
+        self.play = play
+        self.query = QLineEdit(self)
+        self.query.setPlaceholderText("Search stations...")
+        self.results = QListWidget(self)
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.query)
+        layout.addWidget(self.results)
+        self.query.textChanged.connect(self.update_results)
+        self.query.returnPressed.connect(self.play_selected)
+        self.results.itemActivated.connect(self.play_selected)
+        self.resize(360, 400)
+
+    def open(self) -> None:
+        self.query.clear()
+        self.results.clear()
+        self.move(QCursor.pos())
+        self.show()
+        self.activateWindow()
+        self.query.setFocus()
+
+    def update_results(self, text: str) -> None:
+        self.results.clear()
+        for name, url, category in self.stations.search(text):
+            item = QListWidgetItem(f"{name}  ({category})", self.results)
+            item.setData(Qt.UserRole, url)
+        if self.results.count():
+            self.results.setCurrentRow(0)
+
+    def play_selected(self, *_) -> None:
+        item = self.results.currentItem()
+        if item is not None:
+            self.play(item.data(Qt.UserRole))
+            self.close()
+
+
+async def wait_for_event(event: asyncio.Event, timeout: float) -> bool:
+    """Wait up to timeout seconds for event; True if it was set. (Not
+    asyncio.wait_for, which can swallow a cancellation that arrives just as
+    the event is set, on some Python versions.)"""
+    waiter = asyncio.ensure_future(event.wait())
+    done, _ = await asyncio.wait([waiter], timeout=timeout)
+    waiter.cancel()
+    return bool(done)
+
+
+class MPDWorker(QThread):
     """
-    client = connect_mpd(tray_icon)
-    if not client:
-        return
-
-    try:
-        client.clear()
-        client.add(url)
-        client.play()
-        print(f"[Info] Now playing: {url}")
-    except Exception as e:
-        message = f"Failed to load URL: {e}"
-        print(f"[MPD Error] {message}")
-        if tray_icon:
-            tray_icon.notify_error(message)
-    finally:
-        client.close()
-        client.disconnect()
-
-
-def stop_playback(tray_icon: Optional["MPDTrayApp"] = None) -> None:
-    """Stop MPD playback and clear the queue."""
-    client = connect_mpd(tray_icon)
-    if not client:
-        return
-
-    try:
-        client.stop()
-        client.clear()
-        print("[Info] Playback stopped.")
-    except Exception as e:
-        message = f"Failed to stop playback: {e}"
-        print(f"[MPD Error] {message}")
-        if tray_icon:
-            tray_icon.notify_error(message)
-    finally:
-        client.close()
-        client.disconnect()
+    Owns the app's one MPD connection, on its own thread running an asyncio
+    loop with python-mpd2's asyncio client.
+
+    Between commands the connection sits in `idle`, which is also how a
+    dropped connection is noticed: the idle fails, connection_changed(False)
+    is emitted, and the worker reconnects with backoff. There's no periodic
+    probe while connected. Commands from the GUI thread (submit()) are queued
+    onto the loop and return at once; failures come back as failed(str).
+    Both signals are delivered on the GUI thread by Qt.
+    """
+
+    connection_changed = pyqtSignal(bool)
+    failed = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.loop = asyncio.new_event_loop()
+        self.client = None
+        self._connected = None  # asyncio.Events, created on the worker's loop in run()
+        self._retry = None
+        self._stopping = False
+        self._main_task = None
+
+    def run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self._connected = asyncio.Event()
+        self._retry = asyncio.Event()
+        self._main_task = self.loop.create_task(self._maintain_connection())
+        try:
+            self.loop.run_until_complete(self._main_task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            if self.client is not None:
+                self.client.disconnect()
+            # Let the client's own background tasks see their cancellation
+            # before the loop goes away, as asyncio.run() does.
+            pending = asyncio.all_tasks(self.loop)
+            for task in pending:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self.loop.close()
+
+    def stop(self) -> None:
+        """Ask the worker to disconnect and finish, and wait for it (called
+        from the GUI thread as the app quits)."""
+        def cancel():
+            self._stopping = True
+            if self._main_task is not None:
+                self._main_task.cancel()
+        if self.isRunning():
+            self.loop.call_soon_threadsafe(cancel)
+            self.wait(MPD_TIMEOUT * 1000)
+
+    def submit(self, label: str, action: Callable[[MPDClient], Awaitable[None]]) -> None:
+        """Queue action(client) to run on the worker's connection. Returns
+        immediately; label prefixes the error message if it fails."""
+        if self.loop.is_closed():
+            self.failed.emit(f"{label}: MPD worker stopped")
+            return
+        coroutine = self._run(label, action)
+        try:
+            asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+        except RuntimeError:  # The loop closed after all
+            coroutine.close()
+            self.failed.emit(f"{label}: MPD worker stopped")
+
+    async def _run(self, label: str, action) -> None:
+        for attempt in range(2):
+            if self.client is None:
+                self._retry.set()  # Don't sit out the rest of a reconnect backoff
+                if not await wait_for_event(self._connected, MPD_TIMEOUT):
+                    self.failed.emit("Could not connect to MPD -- is it running?")
+                    return
+            try:
+                await action(self.client)
+                return
+            except CommandError as e:
+                self.failed.emit(f"{label}: {e}")
+                return
+            except (MPDConnectionError, OSError):
+                # The idle in _maintain_connection fails too, and reconnects;
+                # wait for that and retry once.
+                self._drop_connection()
+        self.failed.emit(f"{label}: lost connection to MPD")
+
+    def _drop_connection(self) -> None:
+        if self.client is not None:
+            self.client.disconnect()
+            self.client = None
+            self._connected.clear()
+            self.connection_changed.emit(False)
+
+    async def _maintain_connection(self) -> None:
+        delay = RECONNECT_SECONDS
+        first_attempt = True
+        while not self._stopping:
+            client = MPDClient()
+            try:
+                await asyncio.wait_for(client.connect(CONFIG["mpd_host"], CONFIG["mpd_port"]), MPD_TIMEOUT)
+            except Exception as e:
+                # Not only connection errors: a port that answers but isn't
+                # MPD raises ProtocolError, and giving up on any of them
+                # would end the worker for good.
+                client.disconnect()
+                print(f"[MPD Error] Could not connect to MPD: {str(e) or type(e).__name__}")
+                if first_attempt:
+                    self.connection_changed.emit(False)
+                first_attempt = False
+                self._retry.clear()
+                await wait_for_event(self._retry, delay)
+                delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+                continue
+
+            if self._stopping:  # Quit while connecting
+                client.disconnect()
+                break
+            first_attempt = False
+            delay = RECONNECT_SECONDS
+            self.client = client
+            self._connected.set()
+            self.connection_changed.emit(True)
+            try:
+                # The quietest subsystem: the idle is only here to hold the
+                # connection open and notice when it drops.
+                async for _ in client.idle(["database"]):
+                    pass
+            except Exception as e:
+                print(f"[MPD Error] Lost connection to MPD: {str(e) or 'connection closed'}")
+            if self.client is client:
+                self._drop_connection()
+
+
+async def play_url(client: MPDClient, url: str) -> None:
+    """Replace the queue with url and play it."""
+    await client.clear()
+    await client.add(url)
+    await client.play()
+    print(f"[Info] Now playing: {url}")
+
+
+async def stop_and_clear(client: MPDClient) -> None:
+    """Stop playback and clear the queue."""
+    await client.stop()
+    await client.clear()
+    print("[Info] Playback stopped.")
 
 
 class MPDTrayApp(QSystemTrayIcon):
@@ -167,29 +387,41 @@ class MPDTrayApp(QSystemTrayIcon):
 
     def __init__(self, icon: QIcon, parent=None):
         super().__init__(icon, parent)
+        self.worker = MPDWorker()
+        self.worker.connection_changed.connect(self.on_connection_changed)
+        self.worker.failed.connect(self.notify_error)
+        self.stations = StationList()
+        self.search = StationSearch(self.stations, self.load_station)
         self.menu = QMenu()
+        # Checking for an edited station file on every open is one stat();
+        # the menu is only rebuilt if it actually changed.
+        self.menu.aboutToShow.connect(self.refresh_menu)
         self.refresh_menu()
         self.setContextMenu(self.menu)
         self.setToolTip("MPD Radio Tray")
         self.activated.connect(self.on_activate)
-        self.check_mpd_connection()
+        self.worker.start()
 
-    def check_mpd_connection(self) -> None:
+    def on_connection_changed(self, connected: bool) -> None:
         """
-        Verify MPD is reachable at startup and give a visible indication
-        (tray notification + tooltip) if it isn't, rather than staying
-        silent until the user clicks a station and wonders why nothing
-        happens. The tray icon and menu still come up either way, so the
-        user can start MPD and hit Refresh without restarting this app.
+        Give a visible indication (tray notification + tooltip) when MPD
+        can't be reached -- at startup, or when a connection drops -- rather
+        than staying silent until the user clicks a station and wonders why
+        nothing happens. The worker keeps reconnecting in the background,
+        so starting MPD is enough; no restart of this app needed.
         """
-        client = connect_mpd()
-        if client:
-            client.close()
-            client.disconnect()
+        if connected:
+            self.setToolTip("MPD Radio Tray")
         else:
             self.setToolTip("MPD Radio Tray (MPD not running)")
             self.notify_error("Could not connect to MPD -- is it running?")
 
+    def load_station(self, url: str) -> None:
+        self.worker.submit("Failed to load URL", lambda client: play_url(client, url))
+
+    def stop_playback(self) -> None:
+        self.worker.submit("Failed to stop playback", stop_and_clear)
+
     def notify_error(self, message: str) -> None:
         """Surface an error via a tray balloon notification, since print()
         output is invisible when this app is launched from a desktop
@@ -197,12 +429,18 @@ class MPDTrayApp(QSystemTrayIcon):
         self.showMessage("MPD Radio Tray", message, QSystemTrayIcon.Warning, 5000)
 
     def refresh_menu(self) -> None:
-        """Rebuild the tray menu from station file."""
+        """Rebuild the tray menu if the station file has changed (or on the
+        first call). Each category's submenu starts out empty and is filled
+        in the first time it's opened, so building the menu costs the same
+        however many stations there are."""
+        if not self.stations.reload_if_changed():
+            return
+
         # QMenu.clear() removes actions from the menu but doesn't
         # necessarily delete objects created with an explicit parent, so
         # explicitly release the previous rebuild's actions (and any
         # submenus they represent) first to avoid leaking them each time
-        # this is called (e.g. via repeated manual Refresh clicks).
+        # the station file changes.
         for action in self.menu.actions():
             submenu = action.menu()
             if submenu is not None:
@@ -211,16 +449,17 @@ class MPDTrayApp(QSystemTrayIcon):
         self.menu.clear()
 
         stop_action = QAction("Stop", self.menu)
-        stop_action.triggered.connect(lambda: stop_playback(self))
+        stop_action.triggered.connect(self.stop_playback)
         self.menu.addAction(stop_action)
 
-        stations_by_category = load_stations()
-        for category, stations in stations_by_category.items():
+        search_action = QAction("Search...", self.menu)
+        search_action.triggered.connect(self.search.open)
+        self.menu.addAction(search_action)
+
+        for category in self.stations.by_category:
             category_menu = QMenu(category, self.menu)
-            for name, url in stations:
-                action = QAction(name, category_menu)
-                action.triggered.connect(lambda _, u=url: load_station(u, self))
-                category_menu.addAction(action)
+            category_menu.aboutToShow.connect(
+                lambda m=category_menu, c=category: self.populate_category(m, c))
             self.menu.addMenu(category_menu)
 
         refresh_action = QAction("Refresh", self.menu)
@@ -231,6 +470,15 @@ class MPDTrayApp(QSystemTrayIcon):
         exit_action.triggered.connect(QApplication.quit)
         self.menu.addAction(exit_action)
 
+    def populate_category(self, category_menu: QMenu, category: str) -> None:
+        """Fill in a category's submenu as it's first shown."""
+        if category_menu.actions():
+            return
+        for name, url in self.stations.by_category.get(category, []):
+            action = QAction(name, category_menu)
+            action.triggered.connect(lambda _, u=url: self.load_station(u))
+            category_menu.addAction(action)
+
     def on_activate(self, reason: QSystemTrayIcon.ActivationReason) -> None:
         """Show context menu on left click."""
         if reason == QSystemTrayIcon.Trigger:
@@ -250,9 +498,11 @@ def main() -> None:
     app = QApplication(sys.argv)
     tray_icon = create_icon()
     tray_app = MPDTrayApp(tray_icon)
+    app.aboutToQuit.connect(tray_app.worker.stop)
     tray_app.show()
     sys.exit(app.exec_())
 
 
 if __name__ == "__main__":
-    main()
+    with profile_run("mpd-radio-tray"):
+        main()
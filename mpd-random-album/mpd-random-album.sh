@@ -646,6 +646,42 @@ validate_album_record() {
     fi
 }
 
+# ---------------------------------------------------------------------------
+# Library access
+# ---------------------------------------------------------------------------
+
+#
+# If mpd-libcache.py is installed, both the candidate listing and each
+# album's track lookup read its on-disk library snapshot instead of asking
+# MPD: one `mpc listall` over a large library plus one `mpc find` per
+# selected album becomes a few milliseconds of local filtering. The
+# snapshot is refreshed automatically whenever MPD's database changes, so
+# results are the same either way.
+#
+
+# Prints "albumartist<TAB>album<TAB>date<TAB>genre" for every song.
+list_library_tags() {
+    if command -v mpd-libcache.py >/dev/null 2>&1; then
+        mpd-libcache.py query --fields albumartist,album,date,genre
+    else
+        mpc listall --format='%albumartist%\t%album%\t%date%\t%genre%'
+    fi
+}
+
+# Prints the URI of every song with exactly album "$1" and album artist "$2".
+find_album_tracks() {
+    local album="$1"
+    local album_artist="$2"
+
+    # --no-refresh: list_library_tags already brought the snapshot up to
+    # date this run, so there's no need to ask MPD again per album.
+    if command -v mpd-libcache.py >/dev/null 2>&1; then
+        mpd-libcache.py query --no-refresh --fields uri --album "$album" --albumartist "$album_artist"
+    else
+        mpc find album "$album" albumartist "$album_artist"
+    fi
+}
+
 # ---------------------------------------------------------------------------
 # Album selection
 # ---------------------------------------------------------------------------
@@ -690,7 +726,7 @@ select_random_albums() {
     # match against $1, consistent with how album/albumartist identity is
     # always treated exactly everywhere else in this script.
     mapfile -t candidates < <(
-        mpc listall --format='%albumartist%\t%album%\t%date%\t%genre%' |
+        list_library_tags |
             awk -F '\t' -v start="$YEAR_START" -v end="$YEAR_END" -v genre="${GENRE_FILTER,,}" -v artist="$ARTIST_FILTER" '
                 NF >= 2 &&
                 $1 != "" &&
@@ -760,8 +796,9 @@ resolve_albums() {
         album="${album_record#*$'\t'}"
 
         #
-        # Use mpc find rather than mpc search because the selected album and
-        # album artist must match exactly.
+        # Use exact matching (mpc find, or mpd-libcache's equivalent) rather
+        # than mpc search because the selected album and album artist must
+        # match exactly.
         #
         # mpc search can produce unintended matches when metadata contains
         # similar names, such as:
@@ -773,7 +810,7 @@ resolve_albums() {
         # that album rather than to substring/partial matches.
         #
         mapfile -t album_tracks < <(
-            mpc find album "$album" albumartist "$album_artist"
+            find_album_tracks "$album" "$album_artist"
         )
 
         album_track_count=0
@@ -191,13 +191,15 @@ while IFS= read -r line; do
 done < "$EXCLUDE_PATH"
 
 # Build the `-iname "*.ext" -o -iname "*.ext" ...` clause from EXTENSIONS
-# so the matched formats are configurable instead of hardcoded.
+# so the matched formats are configurable instead of hardcoded, plus the
+# equivalent "\.(ext|ext)$" pattern for filtering mpd-libcache output.
 read -ra EXT_LIST <<< "$EXTENSIONS"
 FIND_NAME_ARGS=()
 for ext in "${EXT_LIST[@]}"; do
     [[ ${#FIND_NAME_ARGS[@]} -gt 0 ]] && FIND_NAME_ARGS+=(-o)
     FIND_NAME_ARGS+=(-iname "*.${ext}")
 done
+EXT_PATTERN="\\.($(IFS='|'; echo "${EXT_LIST[*]}"))\$"
 
 if [[ ! -d "$PLAYLIST_DIR" ]]; then
     echo "Error: Playlist directory $PLAYLIST_DIR does not exist." >&2
@@ -218,6 +220,26 @@ TMP_FILE=""
 SIZE_TMP=""
 trap 'rm -f "$TMP_FILE" "$SIZE_TMP"' EXIT
 
+# Prints a "MTIME PATH\0" record (mtime in epoch seconds) for every file
+# with a matching extension modified in the last "$1" days. If
+# mpd-libcache.py is installed, this reads its library snapshot -- which
+# carries MPD's own Last-Modified for every song, with paths already
+# relative to MPD's music_directory -- instead of walking MUSIC_DIR, which
+# turns a multi-second scan of a large library into milliseconds.
+list_recent_files() {
+    local days="$1"
+
+    if command -v mpd-libcache.py &> /dev/null; then
+        # grep exits 1 when nothing matches, which is just an empty
+        # playlist here, not a failure worth tripping pipefail over.
+        mpd-libcache.py query --modified-within "$days" --fields last_modified,uri -0 |
+            tr '\t' ' ' |
+            { grep -z -i -E "$EXT_PATTERN" || [[ $? -eq 1 ]]; }
+    else
+        find -L "$MUSIC_DIR" -type f -mtime "-${days}" \( "${FIND_NAME_ARGS[@]}" \) -printf '%T@ %p\0'
+    fi
+}
+
 # Generates one playlist named "$1" covering the last "$2" days, applying
 # the shared EXTENSIONS/EXCLUDE_PATTERNS/LIMIT/RANDOM_COUNT settings.
 # Called once for the default single-playlist path, or once per PRESETS
@@ -241,18 +263,19 @@ generate_playlist() {
     SIZE_TMP="$(mktemp "${playlist_file}.XXXXXX")"
 
     # Strip the MUSIC_DIR prefix (and any leading slash) from each match so
-    # paths in the playlist are relative to MPD's music_directory. Using bash
+    # paths in the playlist are relative to MPD's music_directory (a no-op
+    # for mpd-libcache's paths, which already are). Using bash
     # parameter expansion (quoted, so it's a literal prefix match rather than
     # a glob/regex) avoids having to escape MUSIC_DIR against regex
     # metacharacters like "." or "(" that commonly show up in real directory
     # names.
     #
-    # `-printf '%T@ %p\0'` prefixes each match with its mtime (epoch seconds)
+    # list_recent_files prefixes each match with its mtime (epoch seconds)
     # so `sort -z -rn -k1,1` can order the NUL-delimited records newest first
     # without breaking on paths that contain spaces or newlines. TMP_FILE
     # gets every matching candidate; -n/--limit or -r/--random is applied
     # afterwards as a separate pass over the full list (see below).
-    if ! find -L "$MUSIC_DIR" -type f -mtime "-${days}" \( "${FIND_NAME_ARGS[@]}" \) -printf '%T@ %p\0' |
+    if ! list_recent_files "$days" |
         sort -z -rn -k1,1 |
         while IFS=' ' read -r -d '' _mtime file; do
             relative="${file#"$MUSIC_DIR"}"
@@ -6,6 +6,7 @@
 
 import argparse
 from db import env, playcount, backup_database, compact_database
+from mpd_profiling import profile_run
 
 
 def cmd_stats(args):
@@ -55,4 +56,5 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    with profile_run("db_admin"):
+        main()
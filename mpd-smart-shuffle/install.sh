@@ -2,7 +2,7 @@
 
 # mpd-smart-shuffle installer
 #
-# Installs client.py/db.py/paths.py/monitor.py/randomtrack.py/db_admin.py
+# Installs client.py/db.py/paths.py/mpd_logging.py/mpd_profiling.py/monitor.py/randomtrack.py/db_admin.py
 # (and their .example config/list templates) to ~/bin, then offers to also
 # install monitor.py as an optional systemd --user background service (see
 # install-systemd.sh). randomtrack.py and db_admin.py work standalone
@@ -14,7 +14,7 @@ set -e  # Exit on error
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 INSTALL_DIR="$HOME/bin"
 
-SCRIPT_FILES="client.py db.py paths.py monitor.py randomtrack.py db_admin.py"
+SCRIPT_FILES="client.py db.py paths.py mpd_logging.py mpd_profiling.py monitor.py randomtrack.py db_admin.py"
 TEMPLATE_FILES="config.ini.example exclude_files.txt.example exclude_artists.txt.example exclude_genres.txt.example notify_urls.txt.example"
 
 echo "Installing mpd-smart-shuffle..."
@@ -12,6 +12,8 @@ from mpd import CommandError
 from db import env, lastplayed, skipcount, playcount, keyof
 from client import connect
 from paths import load_config, STATE_DIR, ensure_state_dir
+from mpd_logging import setup_logging, logging_options
+from mpd_profiling import install_sampling_profiler
 
 # Configuration
 config = load_config()
@@ -26,17 +28,78 @@ SKIP_THRESHOLD = config.getfloat('behavior', 'skip_threshold', fallback=0.5)
 PID_FILE = STATE_DIR / "monitor.pid"
 LOG_FILE = STATE_DIR / "monitor.log"
 
-# Logging setup
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(str(LOG_FILE)),
-        logging.StreamHandler()
-    ]
-)
 log = logging.getLogger('mpd_monitor')
 
+
+class PlayRecorder:
+    """Play and skip bookkeeping for one stream of `player` events, shared
+    by this monitor's own idle loop and mpd-host's monitor plugin (which
+    feed it status/currentsong however they fetched them).
+
+    Tracks the currently-anchored song for skip detection: wall-clock time
+    is used as a stand-in for "elapsed", since MPD only tells us a track
+    changed after the fact, not how far the outgoing one got. This slightly
+    overestimates elapsed time if the track was paused mid-play, which only
+    biases toward under-counting skips, never over-counting them.
+    """
+
+    def __init__(self):
+        self.track = {"song_id": None, "key": None, "duration": 0.0, "started_wall": 0.0}
+
+    def record_skip_if_due(self):
+        track = self.track
+        if not SKIP_DETECTION_ENABLED or track["key"] is None or track["duration"] <= 0:
+            return
+        played = max(0.0, time.time() - track["started_wall"])
+        fraction = played / track["duration"]
+        if fraction >= SKIP_THRESHOLD:
+            return
+        try:
+            with env.begin(db=skipcount, write=True) as txn:
+                prev = txn.get(track["key"])
+                count = (int(prev.decode()) if prev else 0) + 1
+                txn.put(track["key"], str(count).encode("utf-8"))
+            log.debug(f"Recorded skip ({fraction:.0%} played, count={count})")
+        except Exception as e:
+            log.error(f"Failed to record skip: {str(e)}", exc_info=True)
+
+    def on_player(self, status, current):
+        """Handle one `player` event. Records a skip if the previous song
+        was left early, and returns the history key to record a play of
+        `current` under, or None if there's nothing to record."""
+        song_id = current.get("id") if current else None
+        if song_id != self.track["song_id"]:
+            self.record_skip_if_due()
+            self.track.update(song_id=song_id, key=None, duration=0.0, started_wall=0.0)
+
+        if not current:
+            return None
+
+        if not all(key in current for key in ["file", "artist", "title"]):
+            log.debug("Skipping incomplete track metadata")
+            return None
+
+        key = keyof(current["artist"], current["title"])
+
+        if SKIP_DETECTION_ENABLED and status.get("state") == "play" and self.track["key"] is None:
+            duration = float(current.get("duration") or status.get("duration") or 0)
+            elapsed = float(status.get("elapsed", 0) or 0)
+            self.track.update(key=key, duration=duration, started_wall=time.time() - elapsed)
+
+        return key
+
+    def record_play(self, key, now):
+        """Write a play of `key` at `now` (a time.time() string) to the
+        history database. The caller sets the lastplayed sticker itself,
+        over whichever MPD connection it has."""
+        with env.begin(write=True) as txn:
+            txn.put(key, now.encode("utf-8"), db=lastplayed)
+            if PLAY_COUNTS_ENABLED:
+                prev = txn.get(key, db=playcount)
+                count = (int(prev.decode()) if prev else 0) + 1
+                txn.put(key, str(count).encode("utf-8"), db=playcount)
+
+
 def write_pid():
     """Write the current PID to file"""
     try:
@@ -92,6 +155,19 @@ def main():
     parser.add_argument('-k', '--kill', action='store_true', help='Stop running monitor')
     args = parser.parse_args()
 
+    # Logging setup: writes happen on a background thread (see mpd_logging), so
+    # a slow SD card never stalls the idle loop between MPD events, and
+    # monitor.log is rotated by size instead of growing forever. [logging] in
+    # config.ini can switch to journald-only instead. Done here rather than at
+    # import, so that mpd-host can import PlayRecorder without it.
+    setup_logging(
+        "mpd-smart-shuffle-monitor", str(LOG_FILE),
+        level=logging.DEBUG,
+        console=True,
+        fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        **logging_options(config['logging'] if config.has_section('logging') else None)
+    )
+
     if args.kill:
         if kill_existing():
             sys.exit(0)
@@ -112,6 +188,7 @@ def main():
 
     signal.signal(signal.SIGTERM, handle_signal)
     signal.signal(signal.SIGINT, handle_signal)
+    install_sampling_profiler("monitor", log.info)
 
     # Write PID file
     write_pid()
@@ -125,28 +202,7 @@ def main():
 
     log.info("Starting MPD play monitor...")
 
-    # Tracks the currently-anchored song for skip detection: wall-clock time
-    # is used as a stand-in for "elapsed", since MPD only tells us a track
-    # changed after the fact, not how far the outgoing one got. This slightly
-    # overestimates elapsed time if the track was paused mid-play, which only
-    # biases toward under-counting skips, never over-counting them.
-    track = {"song_id": None, "key": None, "duration": 0.0, "started_wall": 0.0}
-
-    def record_skip_if_due():
-        if not SKIP_DETECTION_ENABLED or track["key"] is None or track["duration"] <= 0:
-            return
-        played = max(0.0, time.time() - track["started_wall"])
-        fraction = played / track["duration"]
-        if fraction >= SKIP_THRESHOLD:
-            return
-        try:
-            with env.begin(db=skipcount, write=True) as txn:
-                prev = txn.get(track["key"])
-                count = (int(prev.decode()) if prev else 0) + 1
-                txn.put(track["key"], str(count).encode("utf-8"))
-            log.debug(f"Recorded skip ({fraction:.0%} played, count={count})")
-        except Exception as e:
-            log.error(f"Failed to record skip: {str(e)}", exc_info=True)
+    recorder = PlayRecorder()
 
     try:
         while True:
@@ -157,35 +213,15 @@ def main():
             status = client.status()
             current = client.currentsong()
 
-            song_id = current.get("id") if current else None
-            if song_id != track["song_id"]:
-                record_skip_if_due()
-                track.update(song_id=song_id, key=None, duration=0.0, started_wall=0.0)
-
-            if not current:
-                continue
-
-            if not all(key in current for key in ["file", "artist", "title"]):
-                log.debug("Skipping incomplete track metadata")
+            key = recorder.on_player(status, current)
+            if key is None:
                 continue
 
-            key = keyof(current["artist"], current["title"])
-
-            if SKIP_DETECTION_ENABLED and status.get("state") == "play" and track["key"] is None:
-                duration = float(current.get("duration") or status.get("duration") or 0)
-                elapsed = float(status.get("elapsed", 0) or 0)
-                track.update(key=key, duration=duration, started_wall=time.time() - elapsed)
-
             now = str(time.time())
 
             try:
                 client.sticker_set("song", current["file"], "lastplayed_unixtime", now)
-                with env.begin(write=True) as txn:
-                    txn.put(key, now.encode("utf-8"), db=lastplayed)
-                    if PLAY_COUNTS_ENABLED:
-                        prev = txn.get(key, db=playcount)
-                        count = (int(prev.decode()) if prev else 0) + 1
-                        txn.put(key, str(count).encode("utf-8"), db=playcount)
+                recorder.record_play(key, now)
                 log.debug(f"Recorded play: {current['artist']} - {current['title']}")
             except Exception as e:
                 log.error(f"Failed to record play: {str(e)}", exc_info=True)
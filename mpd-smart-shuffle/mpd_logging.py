@@ -0,0 +1 @@
+../common/mpd_logging.py
\ No newline at end of file
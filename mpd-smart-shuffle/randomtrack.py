@@ -3,10 +3,11 @@
 # vim: ai ts=4 sw=4 sts=4 expandtab
 
 from mpd import CommandError
-from collections import deque
+from collections import Counter, deque
 from db import env, lastqueued, lastplayed, skipcount, keyof
 from client import connect
 from paths import load_config, CONFIG_DIR
+from mpd_profiling import profile_run
 import logging
 import random
 import re
@@ -21,9 +22,13 @@ from pathlib import Path
 # Load configuration
 config = load_config()
 
-# Initialize logging
+# Initialize logging. Per-candidate DEBUG tracing is opt-in via --trace
+# (see main()): on a large library it's thousands of lines per run, and
+# the formatting plus stderr/journald I/O alone was a measurable share of
+# runtime. Rejections are tallied per reason instead and logged as one
+# summary table at the end of each run.
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 log = logging.getLogger(os.path.basename(__file__))
@@ -268,6 +273,19 @@ def should_skip_due_to_profile(genres, profile):
     return not (profile["genres"] & file_genres)
 
 
+def log_selection_summary(considered, added, rejections):
+    """Log one table of why candidates were rejected this run, most common
+    reason first, in place of a log line per rejected candidate."""
+    lines = [
+        f"Selection summary: {considered} candidates considered, {added} added, "
+        f"{sum(rejections.values())} rejected"
+    ]
+    width = max((len(reason) for reason in rejections), default=0)
+    for reason, count in rejections.most_common():
+        lines.append(f"  {reason:<{width}}  {count:>7}")
+    log.info("\n".join(lines))
+
+
 def notify_low_eligible(playlistlen, target, attempts):
     if not config.getboolean('notify', 'enabled', fallback=False):
         return
@@ -305,8 +323,26 @@ def main():
         "-n", "--dry-run", action="store_true",
         help="Log what would be queued without touching MPD's queue or the tracking databases"
     )
+    ap.add_argument(
+        "--trace", action="store_true",
+        help="Log every candidate considered and why it was rejected (very verbose on large libraries)"
+    )
     args = ap.parse_args()
 
+    if args.trace:
+        logging.getLogger().setLevel(logging.DEBUG)
+
+    # Why each rejected candidate was turned down, tallied per reason and
+    # logged once as a summary table when the run ends.
+    rejections = Counter()
+    considered = 0
+    added = 0
+
+    def reject(reason, detail):
+        rejections[reason] += 1
+        if args.trace:
+            log.debug("Skipped - %s: %s", reason, detail)
+
     # Initialize MPD connection
     client = connect(
         host=config['mpd']['host'],
@@ -371,16 +407,19 @@ def main():
             file = random.choice(files)
             filename = file["file"]
 
+            considered += 1
+            if args.trace:
+                log.debug("Considering: %s", filename)
+
             if FEATURES["exclude_list"] and filename in excluded_files:
-                log.debug("Skipped - excluded file: %s", filename)
+                reject("excluded file", filename)
                 continue
 
             filepath = os.path.join(config['paths']['music_dir'], filename)
-            log.debug("Considering: %s", filename)
 
             # Skip if file doesn't exist
             if not os.path.exists(filepath):
-                log.debug("File not found: %s", filepath)
+                reject("file not found", filepath)
                 continue
 
             # Check last played/queued time from MPD stickers
@@ -394,7 +433,7 @@ def main():
                         log.warning("Sticker error for %s: %s", filename, str(e))
 
             if last_played >= MAX_LAST:
-                log.debug("Skipped - played recently: %s", filename)
+                reject("played/queued recently (sticker)", filename)
                 continue
 
             # Soft cutoff: the longer a track has sat past min_replay_days,
@@ -404,7 +443,7 @@ def main():
                 overdue = (NOW - last_played) - MIN_DURATION
                 accept_prob = min(1.0, overdue / MIN_DURATION)
                 if random.random() > accept_prob:
-                    log.debug("Skipped - not yet weighted-due: %s", filename)
+                    reject("not yet weighted-due", filename)
                     continue
 
             # New-music boost: recently-added tracks (by file mtime) always
@@ -419,7 +458,7 @@ def main():
                     mtime = 0
                 is_new = mtime > 0 and (NOW - mtime) < NEW_MUSIC_DAYS * 86400
                 if not is_new and random.random() > (1.0 / NEW_MUSIC_WEIGHT):
-                    log.debug("Skipped - new_music_boost pass: %s", filename)
+                    reject("new_music_boost pass", filename)
                     continue
 
             # Rating weighting: MPD "rating" stickers (set by clients like
@@ -435,22 +474,23 @@ def main():
                 if rating is not None:
                     rating_accept_prob = 0.3 + 0.7 * rating
                     if random.random() > rating_accept_prob:
-                        log.debug("Skipped - rating weighting (%.2f): %s", rating, filename)
+                        reject("rating weighting", f"({rating:.2f}) {filename}")
                         continue
 
             # Load file metadata
             try:
                 tags = mutagen.File(filepath)
                 if not tags or not hasattr(tags, 'tags'):
-                    log.debug("No tags found in %s", filename)
+                    reject("no tags", filename)
                     continue
             except Exception as e:
+                rejections["unreadable tags"] += 1
                 log.warning("Failed to read tags from %s: %s", filepath, str(e))
                 continue
 
             # Skip if missing required tags
             if not all(key in tags.tags for key in ["ARTIST", "TITLE"]):
-                log.debug("Missing required tags in %s", filename)
+                reject("missing artist/title tags", filename)
                 continue
 
             artist = tags.tags["ARTIST"][0]
@@ -459,32 +499,32 @@ def main():
             genres_tag = tags.tags.get("GENRE", [])
 
             if FEATURES["exclude_list"] and artist.lower() in excluded_artists:
-                log.debug("Skipped - excluded artist: %s", artist)
+                reject("excluded artist", artist)
                 continue
 
             if FEATURES["exclude_list"] and excluded_genres:
                 file_genres = {g.lower() for g in genres_tag}
                 if file_genres & excluded_genres:
-                    log.debug("Skipped - excluded genre: %s", file_genres & excluded_genres)
+                    reject("excluded genre", file_genres & excluded_genres)
                     continue
 
             if FEATURES["artist_diversity"] and artist.lower() in recent_artists:
-                log.debug("Skipped - artist diversity window: %s", artist)
+                reject("artist diversity window", artist)
                 continue
 
             if FEATURES["album_diversity"] and album != "N/A" and album.lower() in recent_albums:
-                log.debug("Skipped - album diversity window: %s", album)
+                reject("album diversity window", album)
                 continue
 
             # Seasonal music check
             if FEATURES["seasonal_filters"] and genres_tag:
                 if should_skip_due_to_season(genres_tag, TODAY, seasons):
-                    log.debug("Skipped - seasonal music out of season")
+                    reject("out of season", filename)
                     continue
 
             # Time-of-day / day-of-week profile check
             if FEATURES["time_profiles"] and should_skip_due_to_profile(genres_tag, active_profile):
-                log.debug("Skipped - doesn't match active time profile [%s]", active_profile["name"])
+                reject(f"time profile [{active_profile['name']}]", filename)
                 continue
 
             # Check play history in LMDB
@@ -493,13 +533,13 @@ def main():
 
             with env.begin(db=lastqueued) as txn:
                 if (last_q := txn.get(key)) and float(last_q.decode()) >= MAX_LAST:
-                    log.debug("%s - %s queued recently", artist, title)
+                    reject("queued recently (history)", f"{artist} - {title}")
                     skip = True
 
             if not skip:
                 with env.begin(db=lastplayed) as txn:
                     if (last_p := txn.get(key)) and float(last_p.decode()) >= MAX_LAST:
-                        log.debug("%s - %s played recently", artist, title)
+                        reject("played recently (history)", f"{artist} - {title}")
                         skip = True
 
             if not skip and FEATURES["skip_detection"]:
@@ -507,7 +547,7 @@ def main():
                     raw = txn.get(key)
                 skip_count = int(raw.decode()) if raw else 0
                 if skip_count > 0 and random.random() > (1.0 / (1 + skip_count)):
-                    log.debug("%s - %s skipped often (%d) - giving it a pass", artist, title, skip_count)
+                    reject("skipped often", f"({skip_count}) {artist} - {title}")
                     skip = True
 
             if skip:
@@ -523,6 +563,7 @@ def main():
                     client.addid(filename, str(insert_pos))
                 else:
                     client.add(filename)
+            added += 1
 
             if FEATURES["artist_diversity"]:
                 recent_artists.append(artist.lower())
@@ -546,11 +587,14 @@ def main():
             else:
                 playlistlen += 1
     finally:
+        if considered:
+            log_selection_summary(considered, added, rejections)
         client.disconnect()
 
 if __name__ == "__main__":
     try:
-        main()
+        with profile_run("randomtrack"):
+            main()
     except KeyboardInterrupt:
         log.info("Interrupted by user")
     except Exception as e:
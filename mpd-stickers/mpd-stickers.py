@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+
+"""
+mpd-stickers
+
+Bulk export, import, diff and sync of MPD song stickers -- the ratings and
+"broken" flags music_queue_manager sets, mpdmark's bookmarks,
+mpd-smart-shuffle's lastplayed/lastqueued times, and anything else stored
+the same way.
+
+Export reads every sticker of each requested name with one `sticker find`
+per name, rather than one `mpc sticker` process per song. Import writes in
+batches of `sticker set`/`sticker delete` commands sent as a single MPD
+command list, so 100k stickers is a few hundred round trips instead of
+100k.
+
+The export format is one sticker per line, sorted by URI then name:
+
+    uri<TAB>name<TAB>value
+
+with backslashes, tabs and newlines inside fields escaped as \\\\, \\t and
+\\n. Because exports are sorted, two of them can be compared in a single
+merge pass: `diff` prints the changes needed to turn one into the other,
+as lines of
+
+    +<TAB>uri<TAB>name<TAB>value     (set)
+    -<TAB>uri<TAB>name<TAB>          (delete)
+
+which `import` also accepts, and `sync` does the whole export/diff/import
+between two MPD instances in one go.
+
+Wherever an MPD instance is expected, it's given like mpc's MPD_HOST:
+"host", "host:port" or "password@host:port". Without one, the MPD_HOST
+and MPD_PORT environment variables are used (default localhost:6600).
+"""
+
+import argparse
+import os
+import sys
+
+from mpd import MPDClient, CommandError
+from mpd import ConnectionError as MPDConnectionError
+
+from mpd_profiling import profile_run
+
+# Sticker names used by this repo's own tools, exported by default.
+DEFAULT_NAMES = ("rating", "broken", "bookmark", "lastplayed_unixtime", "lastqueued_unixtime")
+
+# Commands per command list. Large enough to make round trips negligible,
+# small enough to stay well under MPD's max_command_list_size (2 MiB by
+# default) even with long URIs and JSON bookmark values.
+DEFAULT_BATCH_SIZE = 500
+
+MPD_PREFIX = "mpd:"
+
+
+def die(msg: str) -> None:
+    """Print an error message to stderr and exit with status 1."""
+    sys.stderr.write(msg)
+    sys.stderr.write("\n")
+    sys.exit(1)
+
+
+def connect(address=None) -> MPDClient:
+    """Connect to an MPD given as "[password@]host[:port]", falling back to
+    MPD_HOST/MPD_PORT like mpc when address is None."""
+    if address is None:
+        host = os.environ.get("MPD_HOST", "localhost")
+        port = os.environ.get("MPD_PORT", "6600")
+    elif ":" in address:
+        host, _, port = address.rpartition(":")
+    else:
+        host, port = address, "6600"
+    password = None
+    if "@" in host and not host.startswith("@"):  # "@..." is an abstract socket, not a password
+        password, host = host.split("@", 1)
+
+    client = MPDClient()
+    try:
+        client.connect(host, int(port))
+        if password:
+            client.password(password)
+    except (MPDConnectionError, OSError, CommandError, ValueError) as e:
+        die(f"Cannot connect to MPD at {host}:{port}: {e}")
+
+    if "sticker" not in client.commands():
+        die(f"MPD at {host}:{port} does not support stickers, or they aren't enabled (sticker_file in mpd.conf).")
+    return client
+
+
+def escape(field: str) -> str:
+    return field.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+
+
+def unescape(field: str) -> str:
+    out = []
+    chars = iter(field)
+    for char in chars:
+        if char == "\\":
+            nxt = next(chars, "")
+            out.append({"t": "\t", "n": "\n"}.get(nxt, nxt))
+        else:
+            out.append(char)
+    return "".join(out)
+
+
+def fetch_stickers(client: MPDClient, names) -> list:
+    """Return every (uri, name, value) sticker with one of the given names,
+    sorted by URI then name."""
+    stickers = []
+    for name in names:
+        try:
+            rows = client.sticker_find("song", "", name)
+        except CommandError as e:
+            # MPD reports "no such sticker" when nothing has this name yet.
+            if "no such sticker" in str(e):
+                continue
+            raise
+        for row in rows:
+            sticker_name, _, value = row["sticker"].partition("=")
+            stickers.append((row["file"], sticker_name, value))
+    stickers.sort()
+    return stickers
+
+
+def read_export(f) -> list:
+    """Parse an export file back into sorted (uri, name, value) tuples."""
+    stickers = []
+    for line_number, line in enumerate(f, 1):
+        line = line.rstrip("\n")
+        if not line:
+            continue
+        fields = line.split("\t")
+        if len(fields) != 3:
+            die(f"Line {line_number}: expected uri<TAB>name<TAB>value, got {line!r}")
+        stickers.append(tuple(unescape(field) for field in fields))
+    stickers.sort()
+    return stickers
+
+
+def load_source(source: str, names) -> list:
+    """Stickers from an export file, "-" for stdin, or "mpd:ADDRESS" (or
+    "mpd:" alone for the default MPD)."""
+    if source.startswith(MPD_PREFIX):
+        client = connect(source[len(MPD_PREFIX):] or None)
+        try:
+            return fetch_stickers(client, names)
+        finally:
+            client.disconnect()
+    if source == "-":
+        return read_export(sys.stdin)
+    with open(source) as f:
+        return read_export(f)
+
+
+def diff_stickers(old: list, new: list):
+    """Merge-walk two sorted sticker lists, yielding ("+", uri, name, value)
+    for every sticker that's new or changed in `new` and ("-", uri, name,
+    None) for every sticker `new` no longer has."""
+    i = j = 0
+    while i < len(old) or j < len(new):
+        old_key = old[i][:2] if i < len(old) else None
+        new_key = new[j][:2] if j < len(new) else None
+        if new_key is None or (old_key is not None and old_key < new_key):
+            yield ("-", old_key[0], old_key[1], None)
+            i += 1
+        elif old_key is None or new_key < old_key:
+            yield ("+",) + new[j]
+            j += 1
+        else:
+            if old[i][2] != new[j][2]:
+                yield ("+",) + new[j]
+            i += 1
+            j += 1
+
+
+def apply_changes(client: MPDClient, changes, batch_size: int = DEFAULT_BATCH_SIZE) -> dict:
+    """Apply ("+"|"-", uri, name, value) changes in batched command lists.
+
+    A command list stops at its first failing command -- typically a song
+    that doesn't exist in this MPD's library -- so a batch that fails is
+    retried one command at a time to apply everything else in it and
+    count what couldn't be applied.
+    """
+    counts = {"set": 0, "deleted": 0, "failed": 0}
+
+    def send(change):
+        op, uri, name, value = change
+        if op == "+":
+            client.sticker_set("song", uri, name, value)
+        else:
+            client.sticker_delete("song", uri, name)
+
+    def tally(change):
+        counts["set" if change[0] == "+" else "deleted"] += 1
+
+    batch = []
+
+    def flush():
+        if not batch:
+            return
+        try:
+            client.command_list_ok_begin()
+            for change in batch:
+                send(change)
+            client.command_list_end()
+            for change in batch:
+                tally(change)
+        except CommandError:
+            for change in batch:
+                try:
+                    send(change)
+                    tally(change)
+                except CommandError as e:
+                    # Deleting a sticker that's already gone is the outcome we wanted.
+                    if change[0] == "-" and "no such sticker" in str(e):
+                        tally(change)
+                    else:
+                        counts["failed"] += 1
+                        print(f"Warning: {change[1]}: {e}", file=sys.stderr)
+        batch.clear()
+
+    for change in changes:
+        batch.append(change)
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    return counts
+
+
+def write_export(stickers, out) -> None:
+    for uri, name, value in stickers:
+        out.write(f"{escape(uri)}\t{escape(name)}\t{escape(value)}\n")
+
+
+def write_diff(changes, out) -> None:
+    for op, uri, name, value in changes:
+        if op == "+":
+            out.write(f"+\t{escape(uri)}\t{escape(name)}\t{escape(value)}\n")
+        else:
+            # The empty trailing field keeps every diff line at four
+            # fields, so it can never be mistaken for a three-field export
+            # line whose URI happens to be "-".
+            out.write(f"-\t{escape(uri)}\t{escape(name)}\t\n")
+
+
+def read_changes(f):
+    """Yield changes from an export (every line a set) or a diff file."""
+    for line_number, line in enumerate(f, 1):
+        line = line.rstrip("\n")
+        if not line:
+            continue
+        fields = [unescape(field) for field in line.split("\t")]
+        if len(fields) == 3:
+            yield ("+",) + tuple(fields)
+        elif len(fields) == 4 and fields[0] == "+":
+            yield tuple(fields)
+        elif len(fields) == 4 and fields[0] == "-":
+            yield ("-", fields[1], fields[2], None)
+        else:
+            die(f"Line {line_number}: not an export or diff line: {line!r}")
+
+
+def report(counts: dict, dry_run: bool = False) -> None:
+    verb = "Would apply" if dry_run else "Applied"
+    print(f"{verb}: {counts['set']} set, {counts['deleted']} deleted"
+          + ("" if dry_run else f", {counts['failed']} failed"), file=sys.stderr)
+
+
+def open_output(path):
+    return sys.stdout if path in (None, "-") else open(path, "w")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk export/import/diff/sync of MPD song stickers")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_names(p):
+        p.add_argument("-n", "--name", action="append", dest="names", metavar="NAME",
+                       help=f"Sticker name to include; repeatable (default: {', '.join(DEFAULT_NAMES)})")
+
+    export_parser = subparsers.add_parser("export", help="Write stickers as sorted TSV")
+    export_parser.add_argument("--mpd", metavar="ADDRESS", help="MPD to export from (default: MPD_HOST/MPD_PORT)")
+    export_parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+    add_names(export_parser)
+
+    import_parser = subparsers.add_parser("import", help="Apply an export or diff file in batched command lists")
+    import_parser.add_argument("input", nargs="?", default="-", help="Export or diff file (default: stdin)")
+    import_parser.add_argument("--mpd", metavar="ADDRESS", help="MPD to import into (default: MPD_HOST/MPD_PORT)")
+    import_parser.add_argument("-b", "--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                               help=f"Commands per command list (default: {DEFAULT_BATCH_SIZE})")
+
+    diff_parser = subparsers.add_parser("diff", help="Print the changes that turn OLD into NEW")
+    diff_parser.add_argument("old", help="Export file, '-' for stdin, or mpd:ADDRESS")
+    diff_parser.add_argument("new", help="Export file, '-' for stdin, or mpd:ADDRESS")
+    diff_parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+    add_names(diff_parser)
+
+    sync_parser = subparsers.add_parser("sync", help="Make DEST's stickers match SOURCE's")
+    sync_parser.add_argument("source", help="Export file, '-' for stdin, or mpd:ADDRESS")
+    sync_parser.add_argument("dest", metavar="ADDRESS", help="MPD to update, e.g. otherhost:6600")
+    sync_parser.add_argument("--delete", action="store_true",
+                             help="Also delete stickers DEST has that SOURCE doesn't (default: only add/update)")
+    sync_parser.add_argument("--dry-run", action="store_true", help="Report what would change without changing it")
+    sync_parser.add_argument("-b", "--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                             help=f"Commands per command list (default: {DEFAULT_BATCH_SIZE})")
+    add_names(sync_parser)
+
+    args = parser.parse_args()
+    names = getattr(args, "names", None) or DEFAULT_NAMES
+
+    if args.command == "export":
+        client = connect(args.mpd)
+        try:
+            stickers = fetch_stickers(client, names)
+        finally:
+            client.disconnect()
+        out = open_output(args.output)
+        write_export(stickers, out)
+        if out is not sys.stdout:
+            out.close()
+        print(f"Exported {len(stickers)} stickers.", file=sys.stderr)
+
+    elif args.command == "import":
+        f = sys.stdin if args.input == "-" else open(args.input)
+        client = connect(args.mpd)
+        try:
+            report(apply_changes(client, read_changes(f), args.batch_size))
+        finally:
+            client.disconnect()
+            if f is not sys.stdin:
+                f.close()
+
+    elif args.command == "diff":
+        old = load_source(args.old, names)
+        new = load_source(args.new, names)
+        out = open_output(args.output)
+        write_diff(diff_stickers(old, new), out)
+        if out is not sys.stdout:
+            out.close()
+
+    elif args.command == "sync":
+        source = load_source(args.source, names)
+        client = connect(args.dest)
+        try:
+            changes = [change for change in diff_stickers(fetch_stickers(client, names), source)
+                       if change[0] == "+" or args.delete]
+            if args.dry_run:
+                report({"set": sum(1 for c in changes if c[0] == "+"),
+                        "deleted": sum(1 for c in changes if c[0] == "-")}, dry_run=True)
+            else:
+                report(apply_changes(client, changes, args.batch_size))
+        finally:
+            client.disconnect()
+
+
+if __name__ == "__main__":
+    with profile_run("mpd-stickers"):
+        try:
+            main()
+        except BrokenPipeError:
+            sys.stderr.close()
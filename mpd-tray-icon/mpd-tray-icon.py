@@ -3,6 +3,9 @@
 MPD control notification icon + show song name in tooltip.
 Based on https://github.com/sc8/MPD_Tray/
 
+Connects to MPD the way mpc does, via MPD_HOST ("password@host" for a
+password) and MPD_PORT.
+
 Note: uses AppIndicator3, which stock GNOME Shell doesn't support
 natively -- install the "AppIndicator and KStatusNotifierItem Support"
 extension if the icon doesn't appear.
@@ -12,10 +15,54 @@ import gi
 gi.require_version('Gtk', '3.0')
 gi.require_version('AppIndicator3', '0.1')
 from gi.repository import Gtk, GLib, AppIndicator3
-import subprocess
+import queue
 import threading
 import time
 import os
+import sys
+
+from mpd import MPDClient, CommandError
+from mpd import ConnectionError as MPDConnectionError
+
+from mpd_profiling import profile_run
+
+MPD_ERRORS = (MPDConnectionError, CommandError, OSError)
+TIMEOUT = 5  # Seconds, for every command except idle, which blocks until MPD has news
+RECONNECT_SECONDS = 2
+
+
+def connect():
+    """Connect to MPD using MPD_HOST/MPD_PORT, the same way mpc does."""
+    host = os.environ.get("MPD_HOST", "localhost")
+    password = None
+    if "@" in host and not host.startswith("@"):  # "@..." is an abstract socket, not a password
+        password, host = host.split("@", 1)
+    port = int(os.environ.get("MPD_PORT", "6600"))
+
+    client = MPDClient()
+    client.timeout = TIMEOUT
+    client.connect(host, port)
+    if password:
+        client.password(password)
+    return client
+
+
+def format_track(status, song):
+    """The track as `mpc current` prints it: "Artist - Title", a stream's
+    "Name: Title", or the file name when there are no tags; "Stopped" when
+    nothing is playing."""
+    if status.get('state', 'stop') == 'stop' or not song:
+        return "Stopped"
+    title = song.get('title')
+    if isinstance(title, list):  # Repeated tags come back as a list
+        title = title[0]
+    artist = song.get('artist')
+    if isinstance(artist, list):
+        artist = artist[0]
+    track = f"{artist} - {title}" if artist and title else title
+    if song.get('name'):
+        return f"{song['name']}: {track}" if track else song['name']
+    return track or song.get('file', "Unknown")
 
 class MPDIndicator:
     """Tray icon showing the current MPD track, with Play/Pause/Next/Previous controls."""
@@ -32,11 +79,15 @@ class MPDIndicator:
         self.indicator.set_status(AppIndicator3.IndicatorStatus.ACTIVE)
         self.build_menu()
 
-        # Show current state immediately, then update again only when MPD's
-        # player state actually changes, via a background thread blocking on
-        # `mpc idle player` -- no polling.
-        self.update_track()
+        # The watcher thread shows the current state as soon as it connects,
+        # then again only when MPD's player state actually changes, blocking
+        # on `idle player` in between -- no polling. Controls are queued to
+        # a second thread with a connection of its own, so they never wait on
+        # (or interrupt) the idling one, and a slow MPD never blocks the menu.
+        self.command_client = None
+        self.commands = queue.Queue()
         threading.Thread(target=self.watch_player, daemon=True).start()
+        threading.Thread(target=self.run_commands, daemon=True).start()
 
     def get_icon_path(self):
         """Returns the first existing icon path from a preference list, or a
@@ -83,60 +134,102 @@ class MPDIndicator:
         self.indicator.set_menu(self.menu)
 
     def watch_player(self):
-        """Blocks on `mpc idle player`, refreshing the label via the GTK main
-        loop whenever playback state changes."""
-        # Blocks until MPD reports a player-state change, then asks the GTK
-        # main loop to refresh the label (GLib.idle_add is the safe way to
-        # touch GTK widgets from a background thread). A non-zero exit
-        # (MPD unreachable) backs off briefly instead of busy-looping.
+        """Keeps one connection idling on MPD's player events, refreshing the
+        label via the GTK main loop whenever playback state changes."""
+        # Each wakeup fetches status and the current song as one command
+        # list over the same connection, then goes straight back to idle,
+        # so a track change costs one round trip and no new process or
+        # connection. The result is handed to the GTK main loop with
+        # GLib.idle_add, the safe way to touch GTK widgets from a background
+        # thread. If MPD goes away, the label says so and the thread
+        # reconnects every couple of seconds instead of busy-looping.
         while True:
-            result = subprocess.run(
-                ['mpc', 'idle', 'player'],
-                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-            )
-            if result.returncode != 0:
-                time.sleep(2)
+            try:
+                client = connect()
+            except MPD_ERRORS:
+                GLib.idle_add(self.show_track, None)
+                time.sleep(RECONNECT_SECONDS)
                 continue
-            GLib.idle_add(self.update_track)
-
-    def update_track(self):
-        """Fetches the current track from mpc and updates the tray label and
-        tooltip, showing "MPD not running" if mpc fails."""
-        try:
-            result = subprocess.run(
-                ['mpc', 'current'],
-                capture_output=True, text=True, timeout=5
-            )
-            if result.returncode != 0:
-                raise RuntimeError(result.stderr.strip() or "mpc failed")
-
-            track = result.stdout.strip() or "Stopped"
+            try:
+                while True:
+                    client.command_list_ok_begin()
+                    client.status()
+                    client.currentsong()
+                    status, song = client.command_list_end()
+                    GLib.idle_add(self.show_track, format_track(status, song))
+                    client.idle('player')
+            except MPD_ERRORS:
+                GLib.idle_add(self.show_track, None)
+                client.disconnect()
+                time.sleep(RECONNECT_SECONDS)
+
+    def show_track(self, track):
+        """Updates the tray label and tooltip with the current track, or
+        shows "MPD not running" if track is None. Runs on the GTK main loop."""
+        if track is None:
+            self.track_item.set_label("MPD not running")
+            self.indicator.set_label("", "")
+        else:
             self.track_item.set_label(track)
             self.indicator.set_label(track, "")
+        return False  # one-shot: don't re-run this via GLib.idle_add
 
-        except Exception:
-            self.track_item.set_label("MPD not running")
-            self.indicator.set_label("", "")
+    def run_command(self, action):
+        """Queues action(client) for the command thread and returns at once,
+        so the menu stays responsive however long MPD takes to answer."""
+        self.commands.put(action)
 
-        return False  # one-shot: don't re-run this via GLib.idle_add
+    def run_commands(self):
+        """Command thread: runs each queued action on the controls' own
+        connection, opening it on first use, and reopening and retrying
+        once if MPD has dropped it (it closes connections left unused for a
+        while). Failures are reported via the GTK main loop."""
+        while True:
+            action = self.commands.get()
+            for attempt in range(2):
+                try:
+                    if self.command_client is None:
+                        self.command_client = connect()
+                    action(self.command_client)
+                    break
+                except CommandError as e:
+                    GLib.idle_add(self.report_error, f"MPD command failed: {e}")
+                    break
+                except (MPDConnectionError, OSError):
+                    if self.command_client is not None:
+                        self.command_client.disconnect()
+                        self.command_client = None
+            else:
+                GLib.idle_add(self.report_error, "Couldn't reach MPD")
+
+    def report_error(self, message):
+        """Reports a failed control. Runs on the GTK main loop."""
+        print(message, file=sys.stderr)
+        return False  # one-shot, like show_track
 
     def toggle(self, event):
-        subprocess.Popen(['mpc', 'toggle'])
+        def toggle(client):
+            if client.status().get('state') == 'play':
+                client.pause(1)
+            else:
+                client.play()
+        self.run_command(toggle)
 
     def next_track(self, event):
-        subprocess.Popen(['mpc', 'next'])
+        self.run_command(lambda client: client.next())
 
     def prev_track(self, event):
-        subprocess.Popen(['mpc', 'prev'])
+        self.run_command(lambda client: client.previous())
 
 if __name__ == '__main__':
     # Check if MPD is running
     try:
-        subprocess.check_call(["mpc", "status"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-    except subprocess.CalledProcessError:
+        connect().disconnect()
+    except MPD_ERRORS:
         print("MPD is not running. Please start MPD first.")
         exit(1)
 
     Gtk.init([])
-    indicator = MPDIndicator()
-    Gtk.main()
+    with profile_run("mpd-tray-icon"):
+        indicator = MPDIndicator()
+        Gtk.main()
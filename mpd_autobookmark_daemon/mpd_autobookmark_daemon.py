@@ -0,0 +1,556 @@
+#!/usr/bin/env python3
+"""
+MPD Auto-Bookmark Daemon
+
+This script runs as a daemon that listens to the MPD (Music Player Daemon) server.
+Whenever playback pauses, stops, or moves on to another song, it saves the position
+as an mpdmark bookmark, so `mpdmark.py load` becomes a generic "resume where you
+left off."
+
+Bookmarks are stored in mpdmark's own format -- one JSON-encoded "bookmark"
+sticker per song, holding {name: elapsed_seconds} -- under a single name
+(bookmark_name), so they show up in `mpdmark.py list` next to any saved by
+hand, which are left untouched. A song that plays through to (nearly) its end
+has its auto bookmark removed again instead.
+
+Sticker writes are debounced and coalesced per song: the first position
+recorded for a song is written straight away, and any further ones within
+write_interval seconds replace each other in memory, with only the latest
+written once the interval is up. Anything still pending is written on
+shutdown. The daemon holds one connection, idling on `player` events and
+sending its writes over the same connection; it never polls.
+
+Configuration:
+- bookmark_name, write_interval, finished_margin, mpd_host, mpd_port,
+  mpd_password, genre_filter_enabled, genre_filter: see
+  ~/.config/mpd-scripts/mpd_autobookmark_daemon/mpd_autobookmark_daemon.conf
+  (seeded from mpd_autobookmark_daemon.conf.example on first run).
+- PID_FILE: Location to store the daemon process ID (PID) (default: "~/.local/state/mpd_autobookmark_daemon/mpd_autobookmark_daemon.pid").
+- LOG_FILE: Location for the daemon log file (default: "~/.local/state/mpd_autobookmark_daemon/mpd_autobookmark_daemon.log"),
+  rotated by size, or replaced by journald (log_target, log_max_kb,
+  log_backup_count in the config file).
+"""
+
+import sys
+import os
+import time
+import json
+import asyncio
+import signal
+import argparse
+import logging
+import configparser
+from mpd import CommandError
+from mpd import ConnectionError as MPDConnectionError
+from mpd.asyncio import MPDClient
+from mpd_logging import setup_logging, logging_options
+from mpd_profiling import install_sampling_profiler
+
+# Configuration Constants
+STATE_DIR = os.path.join(os.path.expanduser("~"), ".local", "state", "mpd_autobookmark_daemon")
+PID_FILE = os.path.join(STATE_DIR, "mpd_autobookmark_daemon.pid")  # Path for PID file
+LOG_FILE = os.path.join(STATE_DIR, "mpd_autobookmark_daemon.log")  # Path for log file
+
+CONFIG_DIR = os.path.join(os.path.expanduser("~"), ".config", "mpd-scripts", "mpd_autobookmark_daemon")
+CONFIG_FILE = os.path.join(CONFIG_DIR, "mpd_autobookmark_daemon.conf")
+
+# mpdmark's sticker: one JSON {name: elapsed_seconds} dict per song.
+STICKER_NAME = "bookmark"
+
+def load_config():
+    """
+    Loads settings from
+    ~/.config/mpd-scripts/mpd_autobookmark_daemon/mpd_autobookmark_daemon.conf,
+    seeding it from the mpd_autobookmark_daemon.conf.example template
+    shipped alongside this script on first run.
+
+    Returns:
+        configparser.SectionProxy: the "mpd_autobookmark_daemon" section.
+    """
+    if not os.path.exists(CONFIG_FILE):
+        os.makedirs(CONFIG_DIR, mode=0o700, exist_ok=True)
+        template = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mpd_autobookmark_daemon.conf.example")
+        with open(template) as src, open(CONFIG_FILE, "w") as dst:
+            dst.write(src.read())
+        os.chmod(CONFIG_FILE, 0o600)  # May contain an MPD password
+
+    config = configparser.ConfigParser()
+    config.read(CONFIG_FILE)
+    return config["mpd_autobookmark_daemon"]
+
+def parse_genre_filter(raw):
+    """
+    Parses a comma-separated genre_filter config value into a set of
+    lowercased, trimmed genre names for case-insensitive membership checks.
+
+    Args:
+        raw (str): The raw config value.
+
+    Returns:
+        set[str]: Lowercased genre names (empty if raw has none).
+    """
+    return {genre.strip().lower() for genre in raw.split(",") if genre.strip()}
+
+_config = load_config()
+BOOKMARK_NAME = _config.get("bookmark_name", fallback="resume").strip() or "resume"
+WRITE_INTERVAL = max(0.0, _config.getfloat("write_interval", fallback=30.0))
+FINISHED_MARGIN = max(0.0, _config.getfloat("finished_margin", fallback=15.0))
+MPD_HOST = _config.get("mpd_host", fallback="localhost")
+MPD_PORT = _config.getint("mpd_port", fallback=6600)
+MPD_PASSWORD = _config.get("mpd_password", fallback="")
+GENRE_FILTER_ENABLED = _config.getboolean("genre_filter_enabled", fallback=False)
+GENRE_FILTER = parse_genre_filter(_config.get("genre_filter", fallback=""))
+LOGGING_OPTIONS = logging_options(_config)
+
+def song_bookmarkable(song):
+    """
+    Returns True if a song should get an auto bookmark: it's a file in the
+    library rather than a stream URL (which has no position to return to),
+    and it passes the genre filter if genre_filter_enabled is on. A song
+    with no genre tag -- or one not in genre_filter -- is skipped once
+    filtering is enabled.
+
+    Args:
+        song (dict): A currentsong result.
+
+    Returns:
+        bool: Whether this song's position should be bookmarked.
+    """
+    uri = song.get("file")
+    if not uri or "://" in uri:
+        return False
+    if not GENRE_FILTER_ENABLED:
+        return True
+
+    genre = song.get("genre", [])
+    # MPD returns a list instead of a plain string when a track has
+    # multiple genre tag values.
+    genres = genre if isinstance(genre, list) else [genre]
+    track_genres = {g.strip().lower() for g in genres if g.strip()}
+
+    return bool(track_genres & GENRE_FILTER)
+
+def check_permissions():
+    """
+    Ensure the state directory (which holds the PID and log files) exists
+    and is writable, creating it -- and any missing parent directories --
+    if needed. If permissions are insufficient, the script exits.
+    """
+    try:
+        os.makedirs(STATE_DIR, exist_ok=True)
+    except OSError as e:
+        print(f"Permission denied: Cannot create {STATE_DIR}: {e}")
+        sys.exit(1)
+
+    if not os.access(STATE_DIR, os.W_OK):
+        print(f"Permission denied: Cannot write to {STATE_DIR}.")
+        sys.exit(1)
+
+class MPDAutoBookmarkDaemon:
+    """
+    MPD daemon that bookmarks the playback position on pause, stop and song
+    change, with debounced sticker writes.
+
+    Built on python-mpd2's asyncio client, which lets the one connection sit
+    in `idle player` and still send a sticker write the moment a debounced
+    one falls due: commands are interleaved with the idle on the same
+    connection, so there's no second connection and no polling.
+
+    Attributes:
+        verbose (bool): Flag to enable verbose logging.
+        client (MPDClient): asyncio MPD client for the current connection.
+        song_id (str | None): Song ID the fields below describe.
+        uri (str | None): That song's file, or None if it isn't bookmarkable.
+        state (str | None): Last player state seen ("play", "pause", "stop").
+        elapsed (float): Position in that status, as of elapsed_at.
+        elapsed_at (float): time.monotonic() when that status was fetched.
+        duration (float | None): That song's length, if known.
+        pending (dict[str, float | None]): Position waiting to be written
+            per uri, or None to remove the auto bookmark.
+        last_write (dict[str, float]): time.monotonic() of each uri's last
+            sticker write, for the debounce.
+        wakeup (asyncio.Event): Set by record() to wake writer().
+    """
+
+    def __init__(self, verbose=False):
+        """
+        Initializes the MPD Auto-Bookmark Daemon with logging setup.
+
+        Args:
+            verbose (bool): Whether to run in verbose mode (default: False).
+        """
+        self.verbose = verbose  # Set the verbose mode flag
+        self.client = None  # MPD client instance will be created later
+        self.forget_player()
+        self.pending = {}
+        self.last_write = {}
+        self.wakeup = None  # Created in run(), inside the event loop
+
+        # Console logging in verbose mode; otherwise a size-rotated LOG_FILE
+        # (or journald, per log_target), written from a background thread.
+        if verbose:
+            setup_logging("mpd_autobookmark_daemon", level=logging.DEBUG, console=True)
+        else:
+            setup_logging("mpd_autobookmark_daemon", LOG_FILE, **LOGGING_OPTIONS)
+        self.logger = logging.getLogger()
+
+    def log(self, message):
+        """
+        Logs a message to both the console (if verbose) and log file.
+
+        Args:
+            message (str): The message to log.
+        """
+        if self.verbose:
+            print(f"[MPDAutoBookmarkDaemon] {message}")
+        self.logger.info(message)
+
+    def forget_player(self):
+        """
+        Drops what's known about the player, e.g. after reconnecting, when
+        a position estimated across the gap would be meaningless. Pending
+        writes are kept.
+        """
+        self.song_id = None
+        self.uri = None
+        self.state = None
+        self.elapsed = 0.0
+        self.elapsed_at = 0.0
+        self.duration = None
+
+    async def connect(self):
+        """
+        Connects to the MPD server at MPD_HOST:MPD_PORT (and authenticates
+        if MPD_PASSWORD is set). Raises MPDConnectionError/OSError on
+        failure, which serve() retries, or CommandError if MPD refuses the
+        password, which it doesn't.
+        """
+        client = MPDClient()
+        await client.connect(MPD_HOST, MPD_PORT)
+        if MPD_PASSWORD:
+            try:
+                await client.password(MPD_PASSWORD)
+            except CommandError:
+                client.disconnect()
+                raise
+        self.client = client
+        self.log(f"Connected to MPD at {MPD_HOST}:{MPD_PORT}.")
+
+    def position(self, now):
+        """
+        Estimates where the current song has got to by `now` (a
+        time.monotonic() reading) from the last status fetched: MPD's stop
+        and song-change statuses no longer carry the old song's position.
+        """
+        if self.state == "play":
+            return self.elapsed + (now - self.elapsed_at)
+        return self.elapsed
+
+    def record(self, uri, elapsed):
+        """
+        Queues a bookmark write for uri (elapsed=None to remove the auto
+        bookmark), replacing any still pending for it, and wakes writer()
+        to write it if it's due.
+        """
+        self.pending[uri] = None if elapsed is None else round(elapsed, 1)
+        self.wakeup.set()
+
+    async def flush(self, now, force=False):
+        """
+        Writes each pending bookmark whose uri hasn't been written within
+        WRITE_INTERVAL (or every pending one, with force). A write that
+        fails on a dropped connection stays pending.
+
+        Returns:
+            float | None: Seconds until the next pending write is due, or
+            None if nothing is left pending.
+        """
+        next_due = None
+        for uri in list(self.pending):
+            due = self.last_write.get(uri, float("-inf")) + WRITE_INTERVAL
+            if force or due <= now:
+                elapsed = self.pending.pop(uri)
+                try:
+                    await self.write_bookmark(uri, elapsed)
+                except (MPDConnectionError, OSError):
+                    # Unless a newer position came in while it was failing.
+                    self.pending.setdefault(uri, elapsed)
+                    raise
+                self.last_write[uri] = now
+                if uri in self.pending:
+                    # Recorded again while that write was in flight.
+                    due = now + WRITE_INTERVAL
+            if uri in self.pending and (next_due is None or due - now < next_due):
+                next_due = due - now
+
+        # Only uris still inside their interval need remembering.
+        for uri, written in list(self.last_write.items()):
+            if written + WRITE_INTERVAL <= now and uri not in self.pending:
+                del self.last_write[uri]
+        return next_due
+
+    async def write_bookmark(self, uri, elapsed):
+        """
+        Sets (or, for elapsed=None, removes) BOOKMARK_NAME in uri's JSON
+        bookmark sticker, keeping every other bookmark on it. Reads the
+        sticker first, so a bookmark saved with mpdmark in the meantime
+        isn't lost, and skips the write if nothing would change.
+        """
+        try:
+            raw = await self.client.sticker_get("song", uri, STICKER_NAME)
+            bookmarks = json.loads(raw)
+        except (CommandError, ValueError, TypeError):
+            bookmarks = {}
+        if not isinstance(bookmarks, dict):
+            bookmarks = {}
+
+        if elapsed is None:
+            if bookmarks.pop(BOOKMARK_NAME, None) is None:
+                return
+        elif bookmarks.get(BOOKMARK_NAME) == elapsed:
+            return
+        else:
+            bookmarks[BOOKMARK_NAME] = elapsed
+
+        try:
+            if bookmarks:
+                await self.client.sticker_set("song", uri, STICKER_NAME, json.dumps(bookmarks))
+            else:
+                await self.client.sticker_delete("song", uri, STICKER_NAME)
+        except CommandError as e:
+            self.log(f"Error saving bookmark on {uri}: {e}")
+            return
+        if elapsed is None:
+            self.log(f"Finished {uri}; removed its {BOOKMARK_NAME!r} bookmark.")
+        else:
+            self.log(f"Bookmarked {uri} at {elapsed:.1f}s as {BOOKMARK_NAME!r}.")
+
+    async def handle_status(self, status):
+        """
+        Records a bookmark for whatever this status says just happened --
+        leaving a song (switching, or playing through to the end), stopping,
+        or pausing (including seeking while paused) -- then remembers it
+        for the next one.
+
+        Args:
+            status (dict): The MPD status just fetched.
+        """
+        now = time.monotonic()
+        state = status.get("state")
+        song_id = status.get("songid")
+
+        if self.uri is not None and self.state in ("play", "pause"):
+            position = self.position(now)
+            if song_id != self.song_id:
+                if self.duration and position >= self.duration - FINISHED_MARGIN:
+                    self.record(self.uri, None)
+                else:
+                    self.record(self.uri, position)
+            elif state == "stop":
+                self.record(self.uri, position)
+
+        if song_id != self.song_id:
+            # One currentsong round trip per song, not per event.
+            self.song_id = song_id
+            self.uri = None
+            if song_id is not None:
+                current = await self.client.currentsong()
+                if song_bookmarkable(current):
+                    self.uri = current["file"]
+
+        self.state = state
+        self.elapsed = float(status.get("elapsed", 0))
+        self.elapsed_at = now
+        self.duration = float(status.get("duration", 0)) or None
+
+        if state == "pause" and self.uri is not None:
+            self.record(self.uri, self.elapsed)
+
+    async def writer(self):
+        """
+        Writes pending bookmarks as they fall due, sleeping until the next
+        one is or record() queues another.
+        """
+        while True:
+            self.wakeup.clear()
+            next_due = await self.flush(time.monotonic())
+            # asyncio.wait rather than wait_for: wait_for can swallow a
+            # cancel that lands as record() sets wakeup, and serve() would
+            # then wait on this task forever.
+            woken = asyncio.ensure_future(self.wakeup.wait())
+            try:
+                await asyncio.wait([woken], timeout=next_due)
+            finally:
+                woken.cancel()
+
+    async def serve(self):
+        """
+        Connects (retrying until MPD is up), then handles every `idle player`
+        event with writer() running alongside, reconnecting whenever the
+        connection drops. Returns only if MPD refuses the password.
+        """
+        while True:
+            try:
+                await self.connect()
+            except CommandError as e:
+                self.log(f"MPD refused the connection ({e}); check mpd_password in {CONFIG_FILE}.")
+                return
+            except (MPDConnectionError, OSError) as e:
+                self.log(f"Failed to connect to MPD ({e}). Retrying in 5s...")
+                await asyncio.sleep(5)
+                continue
+
+            writer = asyncio.create_task(self.writer())
+            try:
+                await self.handle_status(await self.client.status())
+                async for _ in self.client.idle(["player"]):
+                    await self.handle_status(await self.client.status())
+            except (MPDConnectionError, OSError) as e:
+                self.log(f"Lost connection to MPD ({str(e) or 'connection closed'}), attempting to reconnect...")
+            except Exception as e:
+                self.log(f"Error during MPD state monitoring: {e}")
+                await asyncio.sleep(2)  # Wait before retrying on error
+            finally:
+                writer.cancel()
+                try:
+                    await writer
+                except (asyncio.CancelledError, MPDConnectionError, OSError):
+                    pass
+                self.client.disconnect()
+                self.forget_player()
+
+    async def run(self):
+        """
+        Serves until SIGTERM/SIGINT, then writes every pending bookmark --
+        including the current position, if something is playing or paused
+        -- on a fresh connection, regardless of write_interval. Stops early,
+        returning exit status 1, if serving fails for good (MPD refusing
+        the password).
+        """
+        self.wakeup = asyncio.Event()
+        stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, stopping.set)
+
+        self.log("MPD Auto-Bookmark Daemon started. Listening for pause/stop/song changes...")
+        serving = asyncio.create_task(self.serve())
+        stopped = asyncio.create_task(stopping.wait())
+        await asyncio.wait([serving, stopped], return_when=asyncio.FIRST_COMPLETED)
+        stopped.cancel()
+
+        self.log("Stopping MPD auto-bookmark daemon...")
+        if serving.done():
+            if serving.exception() is not None:
+                self.logger.error("Serving MPD failed", exc_info=serving.exception())
+            return 1
+        if self.uri is not None and self.state in ("play", "pause"):
+            self.record(self.uri, self.position(time.monotonic()))
+        serving.cancel()
+        try:
+            await serving
+        except asyncio.CancelledError:
+            pass
+
+        if self.pending:
+            try:
+                await self.connect()
+                await self.flush(time.monotonic(), force=True)
+                self.client.disconnect()
+            except (MPDConnectionError, CommandError, OSError) as e:
+                self.log(f"Could not save {len(self.pending)} pending bookmark(s) on shutdown: {e}")
+        return 0
+
+    def listen(self):
+        """
+        Runs the daemon until it's told to stop (or can't go on), then
+        removes the PID file and exits with run()'s status.
+        """
+        install_sampling_profiler("mpd_autobookmark_daemon", self.log)  # SIGUSR2 toggles sampling, if MPD_SCRIPTS_PROFILE is set
+        try:
+            status = asyncio.run(self.run())
+        finally:
+            if os.path.exists(PID_FILE):
+                os.remove(PID_FILE)  # Remove the PID file
+                self.log("PID file removed.")
+        sys.exit(status)
+
+def start_daemon():
+    """
+    Starts the script as a background daemon process.
+
+    This method forks the process, creates a new session, checks permissions, and then
+    starts the MPDAutoBookmarkDaemon to listen for events.
+    """
+    if os.path.exists(PID_FILE):
+        print("Daemon is already running.")
+        sys.exit(1)
+
+    pid = os.fork()  # Fork the process to run in the background
+    if pid > 0:
+        sys.exit(0)  # Parent process exits
+
+    os.setsid()  # Create a new session to detach from the terminal
+
+    # Ensure necessary permissions are set for PID and log files
+    check_permissions()
+
+    # Write the PID to a file for managing the daemon process
+    with open(PID_FILE, "w") as f:
+        f.write(str(os.getpid()))
+
+    daemon = MPDAutoBookmarkDaemon(verbose=False)  # Initialize the daemon
+    daemon.listen()  # Start listening for MPD events
+
+def stop_daemon():
+    """
+    Stops the daemon by killing the process with the stored PID.
+
+    This method checks if the daemon is running, and if so, sends a SIGTERM signal
+    to gracefully stop the process, which writes its pending bookmarks first.
+    """
+    if not os.path.exists(PID_FILE):
+        print("Daemon is not running.")
+        sys.exit(1)
+
+    with open(PID_FILE, "r") as f:
+        pid = int(f.read().strip())  # Read the PID of the running daemon
+
+    # Check if the process is still running
+    try:
+        os.kill(pid, 0)  # Check if the process exists without sending a signal
+    except ProcessLookupError:
+        # If the process does not exist
+        print(f"No process found with PID {pid}. The daemon may have already stopped.")
+        os.remove(PID_FILE)  # Remove the stale PID file
+        sys.exit(0)
+    except PermissionError:
+        # If permission is denied to check the process
+        print(f"Permission error while checking process with PID {pid}.")
+        sys.exit(1)
+
+    # If the process is running, send SIGTERM to stop it
+    os.kill(pid, signal.SIGTERM)
+    print("Daemon stopped.")
+
+def run_interactive():
+    """
+    Runs the daemon in the foreground with verbose console logging, instead
+    of forking to the background and writing a PID file. Useful for
+    debugging (see --verbose).
+    """
+    daemon = MPDAutoBookmarkDaemon(verbose=True)  # Initialize the daemon
+    daemon.listen()  # Start listening for MPD events
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MPD Auto-Bookmark Daemon")
+    parser.add_argument("-s", "--stop", action="store_true", help="Stop the daemon")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Run in interactive mode with logging")
+    args = parser.parse_args()
+
+    if args.stop:
+        stop_daemon()  # Stop the daemon if requested
+    elif args.verbose:
+        run_interactive()  # Run in verbose mode if requested
+    else:
+        start_daemon()  # Start the daemon normally
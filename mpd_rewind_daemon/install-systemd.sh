@@ -12,6 +12,7 @@ set -e  # Exit on error
 
 INSTALL_DIR="$HOME/bin"
 SCRIPT_NAME="mpd_rewind_daemon.py"
+SHARED_MODULES="mpd_logging.py mpd_profiling.py"  # From ../common, symlinked here; imported by the script
 UNIT_NAME="mpd-rewind-daemon.service"
 UNIT_DIR="$HOME/.config/systemd/user"  # Per-user systemd unit search path
 
@@ -25,6 +26,9 @@ pip3 install --user python-mpd2
 echo "Copying daemon script to $INSTALL_DIR/$SCRIPT_NAME..."
 cp "$SCRIPT_NAME" "$INSTALL_DIR/$SCRIPT_NAME"
 chmod +x "$INSTALL_DIR/$SCRIPT_NAME"
+for f in $SHARED_MODULES; do
+    cp "$f" "$INSTALL_DIR/$f"
+done
 
 mkdir -p "$UNIT_DIR"
 echo "Installing systemd unit to $UNIT_DIR/$UNIT_NAME..."
@@ -11,6 +11,7 @@ set -e  # Exit on error
 
 INSTALL_DIR="$HOME/bin"
 SCRIPT_NAME="mpd_rewind_daemon.py"
+SHARED_MODULES="mpd_logging.py mpd_profiling.py"  # From ../common, symlinked here; imported by the script
 SCRIPT_PATH="$INSTALL_DIR/$SCRIPT_NAME"
 AUTOSTART_ENTRY="$SCRIPT_PATH"  # Autostart entry for the daemon (already executable with its own shebang)
 DESKTOP_FILE="$HOME/.config/autostart/mpd-rewind.desktop"
@@ -41,6 +42,9 @@ pip3 install --user python-mpd2
 echo "Copying daemon script to $SCRIPT_PATH..."
 cp "$SCRIPT_NAME" "$SCRIPT_PATH"
 chmod +x "$SCRIPT_PATH"
+for f in $SHARED_MODULES; do
+    cp "$f" "$INSTALL_DIR/$f"
+done
 
 # Ensure the autostart directory exists
 mkdir -p "$HOME/.config/autostart"
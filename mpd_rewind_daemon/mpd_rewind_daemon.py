@@ -12,7 +12,9 @@ Configuration:
   ~/.config/mpd-scripts/mpd_rewind_daemon/mpd_rewind_daemon.conf (seeded
   from mpd_rewind_daemon.conf.example on first run).
 - PID_FILE: Location to store the daemon process ID (PID) (default: "~/.local/state/mpd_rewind_daemon/mpd_rewind_daemon.pid").
-- LOG_FILE: Location for the daemon log file (default: "~/.local/state/mpd_rewind_daemon/mpd_rewind_daemon.log").
+- LOG_FILE: Location for the daemon log file (default: "~/.local/state/mpd_rewind_daemon/mpd_rewind_daemon.log"),
+  rotated by size, or replaced by journald (log_target, log_max_kb,
+  log_backup_count in the config file).
 - Permissions check for the state directory.
 - Enhanced error logging for daemon mode.
 """
@@ -26,6 +28,8 @@ import logging
 import configparser
 from mpd import MPDClient
 from mpd import ConnectionError as MPDConnectionError
+from mpd_logging import setup_logging, logging_options
+from mpd_profiling import install_sampling_profiler
 
 # Configuration Constants
 STATE_DIR = os.path.join(os.path.expanduser("~"), ".local", "state", "mpd_rewind_daemon")
@@ -107,6 +111,52 @@ MPD_PORT = _config.getint("mpd_port", fallback=6600)
 MPD_PASSWORD = _config.get("mpd_password", fallback="")
 GENRE_FILTER_ENABLED = _config.getboolean("genre_filter_enabled", fallback=False)
 GENRE_FILTER = parse_genre_filter(_config.get("genre_filter", fallback=""))
+LOGGING_OPTIONS = logging_options(_config)
+
+def rewind_amount(pause_duration):
+    """
+    Looks up how many seconds to rewind based on how long playback was
+    paused, using REWIND_TIERS (sorted ascending by threshold). Returns
+    the rewind amount for the largest threshold that's <= pause_duration,
+    or 0 if the pause was shorter than the smallest threshold.
+
+    Args:
+        pause_duration (float): How many seconds playback was paused for.
+
+    Returns:
+        float: Seconds to rewind (0 if no tier applies).
+    """
+    amount = 0.0
+    for threshold, rewind in REWIND_TIERS:
+        if pause_duration >= threshold:
+            amount = rewind
+        else:
+            break
+    return amount
+
+def song_genre_allowed(song):
+    """
+    Returns True if genre_filter_enabled is off, or the song's genre
+    (case-insensitive) is in genre_filter. A song with no genre tag -- or
+    one not in the list -- is not allowed once filtering is enabled, so an
+    empty genre_filter with filtering enabled disables rewinding entirely.
+
+    Args:
+        song (dict): A currentsong result.
+
+    Returns:
+        bool: Whether a resume of this song should be rewound.
+    """
+    if not GENRE_FILTER_ENABLED:
+        return True
+
+    genre = song.get("genre", [])
+    # MPD returns a list instead of a plain string when a track has
+    # multiple genre tag values.
+    genres = genre if isinstance(genre, list) else [genre]
+    track_genres = {g.strip().lower() for g in genres if g.strip()}
+
+    return bool(track_genres & GENRE_FILTER)
 
 def check_permissions():
     """
@@ -134,6 +184,8 @@ class MPDRewindDaemon:
         client (MPDClient): MPD client for communication with the MPD server.
         last_state (str): Tracks the last state of the MPD player ("play" or "pause").
         pause_started_at (float | None): time.time() when the last pause began.
+        genre_song_id (str | None): Song ID genre_allowed was worked out for.
+        genre_allowed (bool): Whether that song passes the genre filter.
     """
 
     def __init__(self, verbose=False):
@@ -148,12 +200,16 @@ class MPDRewindDaemon:
         self.client = None  # MPD client instance will be created later
         self.last_state = None  # Tracks last player state (play or pause)
         self.pause_started_at = None  # When the current/last pause began
-
-        # Set logging configuration based on verbose mode
-        log_level = logging.DEBUG if verbose else logging.INFO
-        logging.basicConfig(filename=LOG_FILE if not verbose else None,
-                            level=log_level,
-                            format="%(asctime)s - %(levelname)s - %(message)s")
+        self.genre_song_id = None  # Song whose genre_allowed is cached
+        self.genre_allowed = True
+
+        # Console logging in verbose mode; otherwise a size-rotated LOG_FILE
+        # (or journald, per log_target), written from a background thread
+        # so log I/O never delays a rewind.
+        if verbose:
+            setup_logging("mpd_rewind_daemon", level=logging.DEBUG, console=True)
+        else:
+            setup_logging("mpd_rewind_daemon", LOG_FILE, **LOGGING_OPTIONS)
         self.logger = logging.getLogger()
 
     def log(self, message):
@@ -233,32 +289,34 @@ class MPDRewindDaemon:
 
     def get_rewind_amount(self, pause_duration):
         """
-        Looks up how many seconds to rewind based on how long playback was
-        paused, using REWIND_TIERS (sorted ascending by threshold). Returns
-        the rewind amount for the largest threshold that's <= pause_duration,
-        or 0 if the pause was shorter than the smallest threshold.
+        Seconds to rewind after a pause of pause_duration seconds; see
+        rewind_amount().
+        """
+        return rewind_amount(pause_duration)
 
-        Args:
-            pause_duration (float): How many seconds playback was paused for.
+    def update_genre_cache(self, status):
+        """
+        Re-checks the genre filter when the current song ID (from a status
+        listen() has already fetched) differs from the cached one, so the
+        currentsong round trip happens once per song change rather than on
+        every resume. A no-op while genre_filter_enabled is off.
 
-        Returns:
-            float: Seconds to rewind (0 if no tier applies).
+        Args:
+            status (dict): The MPD status just fetched.
         """
-        amount = 0.0
-        for threshold, rewind in REWIND_TIERS:
-            if pause_duration >= threshold:
-                amount = rewind
-            else:
-                break
-        return amount
+        if not GENRE_FILTER_ENABLED:
+            return
+        song_id = status.get("songid")
+        if song_id == self.genre_song_id:
+            return
+        self.genre_song_id = song_id
+        self.genre_allowed = self.current_track_genre_allowed() if song_id is not None else False
 
     def current_track_genre_allowed(self):
         """
-        Returns True if genre_filter_enabled is off, or the currently
-        playing track's genre (case-insensitive) is in genre_filter. A
-        track with no genre tag -- or one not in the list -- is not
-        allowed once filtering is enabled, so an empty genre_filter with
-        filtering enabled disables rewinding entirely.
+        Returns whether the currently playing track passes the genre
+        filter (see song_genre_allowed()), always True while
+        genre_filter_enabled is off.
 
         Returns:
             bool: Whether rewind_and_resume should proceed for this track.
@@ -270,29 +328,27 @@ class MPDRewindDaemon:
             current = self.client.currentsong()
         except Exception as e:
             self.log(f"Error fetching current song for genre filter: {e}")
+            self.genre_song_id = None  # Try again next time
             return False
 
-        genre = current.get("genre", [])
-        # MPD returns a list instead of a plain string when a track has
-        # multiple genre tag values.
-        genres = genre if isinstance(genre, list) else [genre]
-        track_genres = {g.strip().lower() for g in genres if g.strip()}
+        return song_genre_allowed(current)
 
-        return bool(track_genres & GENRE_FILTER)
-
-    def rewind_and_resume(self, pause_duration):
+    def rewind_and_resume(self, pause_duration, status):
         """
-        Pauses, rewinds, and resumes playback to ensure proper rewind.
+        Rewinds the just-resumed track with a single seekcur, relative to
+        wherever playback has got to by the time MPD handles it.
 
-        This method pauses the current track, seeks to a rewind position, and resumes playback.
-        The rewind amount scales with how long playback was paused (see get_rewind_amount).
-        Skipped entirely if genre_filter_enabled is on and the current
-        track's genre isn't in genre_filter (see current_track_genre_allowed).
+        The rewind amount scales with how long playback was paused (see
+        get_rewind_amount). Skipped entirely if genre_filter_enabled is on
+        and the current track's genre isn't in genre_filter (cached per
+        song by update_genre_cache). No extra status/currentsong round
+        trips and no pause: the resume-to-rewound delay is one round trip.
 
         Args:
             pause_duration (float): How many seconds playback was paused for.
+            status (dict): The status listen() fetched on seeing the resume.
         """
-        if not self.current_track_genre_allowed():
+        if not self.genre_allowed:
             self.log("Current track's genre is not in genre_filter; skipping rewind.")
             return
 
@@ -302,21 +358,14 @@ class MPDRewindDaemon:
             return
 
         try:
-            status = self.client.status()  # Fetch current MPD status
-            if status.get("state") == "play":
-                position = float(status.get("elapsed", 0))  # Get current playback position
-                seek_time = max(position - seek_back_time, 0)  # Calculate new seek position
-
-                self.log(f"Pausing playback to rewind...")
-                self.client.pause(1)  # Pause playback
-
-                time.sleep(0.2)  # Small delay to ensure state change
-
-                self.log(f"Paused for {pause_duration:.2f}s; rewinding {seek_back_time:.2f}s. Seeking to {seek_time:.2f}s...")
-                self.client.seekcur(seek_time)  # Seek to the new position
-
-                self.log("Resuming playback after rewind.")
-                self.client.pause(0)  # Resume playback
+            position = float(status.get("elapsed", 0))
+            if position <= seek_back_time:
+                # Don't count on MPD clamping a relative seek past the start.
+                self.log(f"Paused for {pause_duration:.2f}s; rewinding to the start of the track.")
+                self.client.seekcur(0)
+            else:
+                self.log(f"Paused for {pause_duration:.2f}s; rewinding {seek_back_time:.2f}s.")
+                self.client.seekcur(f"-{seek_back_time:g}")
         except Exception as e:
             self.log(f"Error during rewind operation: {e}")
 
@@ -329,6 +378,7 @@ class MPDRewindDaemon:
         """
         signal.signal(signal.SIGTERM, self.handle_signal)  # Handle termination signal
         signal.signal(signal.SIGINT, self.handle_signal)  # Handle interrupt signal
+        install_sampling_profiler("mpd_rewind_daemon", self.log)  # SIGUSR2 toggles sampling, if MPD_SCRIPTS_PROFILE is set
 
         self.connect_with_retry()  # Connect to the MPD server, retrying until it's up
         self.log("MPD Rewind Daemon started. Listening for pause/unpause events...")
@@ -338,6 +388,7 @@ class MPDRewindDaemon:
                 self.client.idle("player")  # Wait for player state change
                 status = self.client.status()  # Fetch current status
                 current_state = status.get("state")  # Get current playback state
+                self.update_genre_cache(status)  # Only does anything on a song change
 
                 # Check for state transitions
                 if current_state == "pause" and self.last_state == "play":
@@ -347,7 +398,7 @@ class MPDRewindDaemon:
                 elif current_state == "play" and self.last_state == "pause":
                     pause_duration = (time.time() - self.pause_started_at) if self.pause_started_at else 0.0
                     self.log(f"Detected playback resume event after {pause_duration:.2f}s pause. Applying rewind.")
-                    self.rewind_and_resume(pause_duration)  # Apply rewind on resume
+                    self.rewind_and_resume(pause_duration, status)  # Apply rewind on resume
                     self.pause_started_at = None
 
                 self.last_state = current_state  # Update last known state
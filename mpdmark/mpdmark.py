@@ -14,6 +14,12 @@ MPD sticker_find call is enough to list every bookmark in the library. The
 --song/--name pair that stays valid even if the numbering has shifted.
 `prune` removes bookmarks left behind on songs no longer in the library.
 
+A copy of the numbered list is kept in ~/.local/state/mpdmark/index.json,
+rewritten by every `list` and updated in place by save/del/rename/prune, so
+resolving an index (and `list --cached`, for shell completion) doesn't need
+a library-wide sticker_find. Before acting on an indexed entry, its song's
+own sticker is checked to still hold it; if not, the index is rebuilt.
+
 Connection settings (host/port/password) come from
 ~/.config/mpd-scripts/mpdmark/mpdmark.conf, seeded from mpdmark.conf.example
 on first run; --host/--port/--password on the command line override the
@@ -22,6 +28,7 @@ config file for a single invocation.
 
 import argparse
 import configparser
+import itertools
 import json
 import os
 import sys
@@ -30,12 +37,23 @@ from os.path import basename
 from mpd import MPDClient, CommandError
 from socket import error as SocketError
 
+from mpd_profiling import profile_run
+
 STICKER_NAME = "bookmark"
 DEFAULT_BOOKMARK_NAME = "default"
 
+# `find file` lookups per command list when resolving song metadata for
+# `list` or checking bookmarked files still exist for `prune`: a thousand
+# bookmarked files in one round trip, while staying well under MPD's
+# max_command_list_size and max_output_buffer_size.
+METADATA_BATCH_SIZE = 1000
+
 CONFIG_DIR = os.path.join(os.path.expanduser("~"), ".config", "mpd-scripts", "mpdmark")
 CONFIG_FILE = os.path.join(CONFIG_DIR, "mpdmark.conf")
 
+STATE_DIR = os.path.join(os.path.expanduser("~"), ".local", "state", "mpdmark")
+INDEX_FILE = os.path.join(STATE_DIR, "index.json")
+
 
 def load_config() -> configparser.SectionProxy:
     """Load ~/.config/mpd-scripts/mpdmark/mpdmark.conf, seeding it from the
@@ -73,6 +91,52 @@ def format_time(seconds: float) -> str:
     return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
 
 
+def read_index(server: str):
+    """Return the bookmark index saved for `server` ("host:port"), or None
+    if there isn't one, it's unreadable, or it was built against a
+    different MPD server.
+
+    The index is a dict with "bookmarks", the [uri, name, elapsed] entries
+    in `list` order, and "songs", mapping each bookmarked uri to the
+    [title, length_seconds or None] `list` last printed for it.
+    """
+    try:
+        with open(INDEX_FILE) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(index, dict) or index.get("server") != server:
+        return None
+    index["bookmarks"] = [tuple(entry) for entry in index.get("bookmarks", [])]
+    index.setdefault("songs", {})
+    return index
+
+
+def write_index(index: dict) -> None:
+    """Save the bookmark index, replacing the old one atomically so a
+    concurrent reader (e.g. a completion running alongside) never sees a
+    half-written file. Failing to write it isn't fatal: the next resolve
+    just falls back to a rescan."""
+    tmp_path = f"{INDEX_FILE}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(STATE_DIR, exist_ok=True)
+        with open(tmp_path, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, INDEX_FILE)
+    except OSError as e:
+        sys.stderr.write(f"Warning: could not write {INDEX_FILE}: {e}\n")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def print_bookmark(number: int, name: str, elapsed: float, length, title: str) -> None:
+    """Print one numbered `list` line."""
+    total = format_time(length) if length is not None else "--:--"
+    print(f"({number}) [{name}] {format_time(elapsed)}/{total} {title}")
+
+
 def get_elapsed(status: dict) -> float:
     """Return the current playback position in seconds from MPD's "elapsed" status field."""
     return float(status["elapsed"])
@@ -119,13 +183,81 @@ class App:
         entries.sort(key=lambda entry: (entry[0], entry[1]))
         return entries
 
+    def song_metadata(self, uris: list):
+        """Yield (uri, song) for each of `uris`, in order, where song is its
+        `find file` result or {} if it's no longer in the library.
+
+        The lookups go out as command lists of METADATA_BATCH_SIZE. Each
+        batch's responses, down to MPD's closing OK, are read in full
+        before any of it is yielded, so the connection is free for other
+        commands whenever the caller has control -- even if it stops early.
+        """
+        for start in range(0, len(uris), METADATA_BATCH_SIZE):
+            batch = uris[start:start + METADATA_BATCH_SIZE]
+            self._client.command_list_ok_begin()
+            for uri in batch:
+                self._client.find("file", uri)
+            for uri, songs in zip(batch, self._client.command_list_end()):
+                yield uri, songs[0] if songs else {}
+
     def list_bookmarks(self, args: argparse.Namespace) -> None:
-        """Print every bookmark in the library, numbered for use with load/del."""
-        for i, (uri, name, elapsed) in enumerate(self.get_all_bookmarks(), start=1):
-            info = self._client.listallinfo(uri)[0]
-            total = format_time(float(info["time"]))
+        """Print every bookmark in the library, numbered for use with load/del,
+        and save that numbering as the bookmark index."""
+        entries = self.get_all_bookmarks()
+        songs = {}
+        # Sorted by uri, so each file's bookmarks are adjacent and its
+        # metadata is fetched once however many bookmarks it has.
+        by_uri = itertools.groupby(entries, key=lambda entry: entry[0])
+        uris = [uri for uri, _ in itertools.groupby(entry[0] for entry in entries)]
+        number = itertools.count(1)
+        for (uri, bookmarks), (_, info) in zip(by_uri, self.song_metadata(uris)):
+            length = info.get("duration") or info.get("time")
+            length = float(length) if length else None
             title = info.get("title", basename(uri))
-            print(f"({i}) [{name}] {format_time(elapsed)}/{total} {title}")
+            songs[uri] = [title, length]
+            for _, name, elapsed in bookmarks:
+                print_bookmark(next(number), name, elapsed, length, title)
+        self._index = {"server": self._server, "bookmarks": entries, "songs": songs}
+        write_index(self._index)
+
+    def list_cached_bookmarks(self, args: argparse.Namespace) -> None:
+        """Print the bookmark index as `list` last saw it, without contacting
+        MPD (fast enough to call from shell completion)."""
+        if self._index is None:
+            die("No bookmark index yet; run `mpdmark.py list` first.")
+        songs = self._index["songs"]
+        for number, (uri, name, elapsed) in enumerate(self._index["bookmarks"], 1):
+            title, length = songs.get(uri, [basename(uri), None])
+            print_bookmark(number, name, elapsed, length, title)
+
+    def rescan_index(self) -> list:
+        """Rebuild the bookmark index from a full sticker_find, keeping the
+        song metadata already known for files still bookmarked, and return
+        its entries."""
+        entries = self.get_all_bookmarks()
+        songs = self._index["songs"] if self._index is not None else {}
+        songs = {uri: songs[uri] for uri, _, _ in entries if uri in songs}
+        self._index = {"server": self._server, "bookmarks": entries, "songs": songs}
+        write_index(self._index)
+        return entries
+
+    def update_index(self, uri: str, bookmarks: dict, song=None) -> None:
+        """Write a song's new bookmark dict through to the index, if there is
+        one, keeping `list` order. `song` is its currentsong/find info, for
+        a file the index may not have metadata for yet."""
+        if self._index is None:
+            return
+        entries = [entry for entry in self._index["bookmarks"] if entry[0] != uri]
+        entries.extend((uri, name, float(elapsed)) for name, elapsed in bookmarks.items())
+        entries.sort(key=lambda entry: (entry[0], entry[1]))
+        self._index["bookmarks"] = entries
+        songs = self._index["songs"]
+        if not bookmarks:
+            songs.pop(uri, None)
+        elif song is not None:
+            length = song.get("duration") or song.get("time")
+            songs[uri] = [song.get("title", basename(uri)), float(length) if length else None]
+        write_index(self._index)
 
     def resolve_target(self, args: argparse.Namespace) -> tuple[str, str, float]:
         """Resolve a (uri, name, elapsed) bookmark from either a list index or
@@ -134,7 +266,8 @@ class App:
         --song/--name address a bookmark directly, which stays correct even
         if other bookmarks are added or removed in between calls -- unlike
         an index, which is only valid against the same `list` output it came
-        from. Dies with a usage error if the argument combination is
+        from. An index is looked up in the bookmark index, falling back to a
+        full rescan if there isn't one or it no longer matches MPD. Dies with a usage error if the argument combination is
         invalid, or if nothing matches.
         """
         if args.song is not None or args.name is not None:
@@ -147,8 +280,20 @@ class App:
                 die(f"No bookmark named {args.name!r} on {args.song!r}")
             return args.song, args.name, float(bookmarks[args.name])
 
-        entries = self.get_all_bookmarks()
         index = args.index if args.index is not None else 1
+        if self._index is not None:
+            entries = self._index["bookmarks"]
+            if 1 <= index <= len(entries):
+                # Served from the index, but only if the song's own sticker
+                # still holds that bookmark at that position. Anything else
+                # means the bookmark set changed behind the index's back
+                # (another client, or a delete on another machine).
+                uri, name, elapsed = entries[index - 1]
+                saved = self.get_song_bookmarks(uri).get(name)
+                if saved is not None and float(saved) == elapsed:
+                    return uri, name, elapsed
+
+        entries = self.rescan_index()
         if not (1 <= index <= len(entries)):
             die("Invalid bookmark index")
         return entries[index - 1]
@@ -159,6 +304,7 @@ class App:
         bookmarks = self.get_song_bookmarks(uri)
         bookmarks.pop(name, None)
         self.set_song_bookmarks(uri, bookmarks)
+        self.update_index(uri, bookmarks)
         print(f"Deleted bookmark {name!r} on {uri}")
 
     def save_bookmark(self, args: argparse.Namespace) -> None:
@@ -172,6 +318,7 @@ class App:
         bookmarks = self.get_song_bookmarks(current["file"])
         bookmarks[args.name] = elapsed
         self.set_song_bookmarks(current["file"], bookmarks)
+        self.update_index(current["file"], bookmarks, current)
 
     def rename_bookmark(self, args: argparse.Namespace) -> None:
         """Rename the resolved bookmark, keeping its saved position."""
@@ -184,6 +331,7 @@ class App:
         del bookmarks[name]
         bookmarks[args.to] = elapsed
         self.set_song_bookmarks(uri, bookmarks)
+        self.update_index(uri, bookmarks)
         print(f"Renamed bookmark {name!r} to {args.to!r} on {uri}")
 
     def load_bookmark(self, args: argparse.Namespace) -> None:
@@ -206,12 +354,19 @@ class App:
 
         MPD doesn't clean up stickers when a file disappears from the
         library, so bookmarks for deleted/moved files would otherwise
-        accumulate silently.
+        accumulate silently. Only the bookmarked files are looked up (see
+        song_metadata), so the cost follows the number of bookmarks rather
+        than the size of the library. With --dry-run, only reports them.
         """
-        library_uris = {obj["file"] for obj in self._client.listall() if "file" in obj}
-        stale_uris = {uri for uri, _, _ in self.get_all_bookmarks()} - library_uris
+        uris = [uri for uri, _ in itertools.groupby(entry[0] for entry in self.rescan_index())]
+        # Collected first, so every lookup is done before the first delete.
+        stale_uris = [uri for uri, info in self.song_metadata(uris) if not info]
         for uri in stale_uris:
+            if args.dry_run:
+                print(f"Would prune bookmarks for missing song: {uri}")
+                continue
             self.set_song_bookmarks(uri, {})
+            self.update_index(uri, {})
             print(f"Pruned bookmarks for missing song: {uri}")
         if not stale_uris:
             print("No stale bookmarks found.")
@@ -225,6 +380,7 @@ class App:
 
         list_parser = sub_parser.add_parser("list", help="list all bookmarks")
         list_parser.set_defaults(func=self.list_bookmarks)
+        list_parser.add_argument("-c", "--cached", action="store_true", help="Print the saved bookmark index without contacting MPD")
 
         del_parser = sub_parser.add_parser("del", help="delete a bookmark")
         del_parser.set_defaults(func=self.delete_bookmark)
@@ -245,6 +401,7 @@ class App:
 
         prune_parser = sub_parser.add_parser("prune", help="remove bookmarks for songs no longer in the library")
         prune_parser.set_defaults(func=self.prune_bookmarks)
+        prune_parser.add_argument("-d", "--dry-run", action="store_true", help="List the bookmarks that would be removed without removing them")
 
         return parser.parse_args()
 
@@ -262,6 +419,12 @@ class App:
         host = args.host or config.get("mpd_host", fallback="localhost")
         port = args.port or config.getint("mpd_port", fallback=6600)
         password = args.password or config.get("mpd_password", fallback="") or None
+        self._server = f"{host}:{port}"
+        self._index = read_index(self._server)
+
+        if args.command == "list" and args.cached:
+            self.list_cached_bookmarks(args)
+            return
 
         self._client = MPDClient()
         try:
@@ -287,4 +450,5 @@ class App:
 
 
 if __name__ == "__main__":
-    App()
+    with profile_run("mpdmark"):
+        App()
@@ -14,6 +14,8 @@ import os
 import requests
 from requests.exceptions import HTTPError
 
+from mpd_profiling import profile_run
+
 # SomaFM's channels.json exposes each channel's icon at three sizes, keyed
 # by these JSON field names.
 ICON_SIZES = {
@@ -153,5 +155,6 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    with profile_run("soma_fm_playlist_fetcher"):
+        main()
 
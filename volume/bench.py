@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+bench.py
+
+Benchmarks the volume scripts. Starts a fake MPD (just enough of the
+protocol for them: a greeting, `status`, `setvol`, `volume`, `password`,
+and OK for anything else, counting every connection and command), points
+a throwaway HOME's volume.conf at it so your real config is never
+touched, then runs mpdvolup.py/mpdvoldown.py/volume.py back to back and
+reports invocations/sec, plus how many connections and commands each
+invocation cost MPD.
+
+    ./bench.py                                  # both variants in this checkout
+    ./bench.py -n 500 --max-volume              # exercise the maxVolume cap path
+    ./bench.py --scripts /tmp/before/volume/mpc --scripts mpc
+
+Point --scripts at another checkout's variant directory (e.g. a
+`git worktree` of an older commit) to compare before and after. The old
+mpc variant needs `mpc` on your PATH. It also times the shared
+mpd_volume engine in-process, over python-mpd2 and over the plain socket,
+to separate protocol cost from interpreter startup.
+"""
+
+import argparse
+import os
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+INVOCATIONS = (
+    ["mpdvolup.py", "1"],
+    ["mpdvoldown.py", "1"],
+    ["volume.py", "up", "1"],
+    ["volume.py", "down", "1"],
+)
+
+
+class FakeMPDHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        state = self.server.state
+        with self.server.lock:
+            state["connections"] += 1
+        self.wfile.write(f"OK MPD {self.server.version}\n".encode())
+        for line in self.rfile:
+            command, _, arg = line.strip().partition(b" ")
+            with self.server.lock:
+                state["commands"] += 1
+                if command == b"close":
+                    return
+                if command == b"status":
+                    self.wfile.write(f"volume: {state['volume']}\nstate: play\nOK\n".encode())
+                    continue
+                if command == b"setvol":
+                    state["volume"] = max(0, min(100, int(arg.strip(b'"'))))
+                elif command == b"volume":
+                    state["volume"] = max(0, min(100, state["volume"] + int(arg.strip(b'"'))))
+            self.wfile.write(b"OK\n")
+
+
+class FakeMPD(socketserver.ThreadingTCPServer):
+    """Just enough of MPD for the volume scripts, counting connections and
+    commands (`close` included, as MPD sees it)."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, version, *args):
+        super().__init__(*args)
+        self.version = version
+        self.state = {"volume": 50, "connections": 0, "commands": 0}
+        self.lock = threading.Lock()
+
+    def counters(self) -> tuple:
+        with self.lock:
+            return self.state["connections"], self.state["commands"]
+
+
+def write_config(home: str, port: int, max_volume: bool) -> None:
+    config_dir = os.path.join(home, ".config", "mpd-scripts", "volume")
+    os.makedirs(config_dir)
+    with open(os.path.join(config_dir, "volume.conf"), "w") as f:
+        f.write(f"[MPD]\nhost = 127.0.0.1\nport = {port}\npassword =\n\n"
+                f"[MPD-SCRIPTS]\nvolUp = 5\nvolDown = 5\n"
+                f"toggleMaxVolume = {max_volume}\nmaxVolume = 100\n")
+
+
+def report(label: str, count: int, elapsed: float, connections: int, commands: int) -> None:
+    print(f"{label:40} {count / elapsed:8.1f} /s  {elapsed / count * 1000:7.2f} ms each  "
+          f"{connections / count:4.1f} connections, {commands / count:4.1f} commands each")
+
+
+def bench_scripts(directory: str, args: argparse.Namespace, mpd: FakeMPD, env: dict) -> None:
+    before = mpd.counters()
+    started = time.perf_counter()
+    for i in range(args.count):
+        script, *script_args = INVOCATIONS[i % len(INVOCATIONS)]
+        subprocess.run([sys.executable, os.path.join(directory, script), *script_args],
+                       env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+    elapsed = time.perf_counter() - started
+    after = mpd.counters()
+    report(directory, args.count, elapsed, after[0] - before[0], after[1] - before[1])
+
+
+def bench_in_process(args: argparse.Namespace, mpd: FakeMPD, home: str) -> None:
+    os.environ["HOME"] = home  # Before the import, which expands ~ in CONFIG_FILE
+    sys.path.insert(0, os.path.join(HERE, "python-mpd"))
+    import mpd_volume
+
+    transports = [(True, "in-process, python-mpd2")] if mpd_volume.MPDClient is not None else []
+    transports.append((False, "in-process, plain socket"))
+    devnull = open(os.devnull, "w")
+    for use_library, label in transports:
+        before = mpd.counters()
+        started = time.perf_counter()
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            for i in range(args.count):
+                mpd_volume.run("up" if i % 2 == 0 else "down", 1, use_library=use_library)
+        finally:
+            sys.stdout = stdout
+        elapsed = time.perf_counter() - started
+        after = mpd.counters()
+        report(label, args.count, elapsed, after[0] - before[0], after[1] - before[1])
+    devnull.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the volume scripts against a fake MPD")
+    parser.add_argument("--scripts", action="append", metavar="DIR",
+                        help="Variant directory to run the scripts from, repeatable (default: mpc and python-mpd here)")
+    parser.add_argument("-n", "--count", type=int, default=200, help="Invocations per run (default: 200)")
+    parser.add_argument("--max-volume", action="store_true",
+                        help="Turn toggleMaxVolume on, so raising the volume has to read it first")
+    parser.add_argument("--mpd-version", default="0.23.5",
+                        help="Version the fake MPD reports; below 0.23 there's no relative `volume` (default: 0.23.5)")
+    args = parser.parse_args()
+    directories = args.scripts or [os.path.join(HERE, "mpc"), os.path.join(HERE, "python-mpd")]
+    directories = [os.path.abspath(directory) for directory in directories]
+
+    mpd = FakeMPD(args.mpd_version, ("127.0.0.1", 0), FakeMPDHandler)
+    threading.Thread(target=mpd.serve_forever, daemon=True).start()
+
+    print(f"{args.count} invocations each, fake MPD {args.mpd_version}"
+          f"{', toggleMaxVolume on' if args.max_volume else ''}")
+    with tempfile.TemporaryDirectory() as home:
+        write_config(home, mpd.server_address[1], args.max_volume)
+        env = dict(os.environ, HOME=home)
+        for directory in directories:
+            bench_scripts(directory, args, mpd, env)
+        bench_in_process(args, mpd, home)
+    mpd.shutdown()
+
+
+if __name__ == "__main__":
+    main()
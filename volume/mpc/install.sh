@@ -5,7 +5,6 @@
 # - Prompts user to set installation user/group to 'root' or the current user.
 # - Ensures volume.conf exists, copying it if necessary.
 # - Runs Python scripts to update the configuration and add MPD script sections.
-# - Installs mpc package.
 # - Copies necessary Python scripts to the installation directory and sets proper permissions.
 # ==============================================================================
 
@@ -81,11 +80,10 @@ add_mpd_script_section_if_conf_exists  # Add script section to configuration if
 # Display the installation directory to confirm path for subsequent steps
 echo "Install directory: $installdir"
 
-# Install the mpc package
-sudo apt install mpc
-
 # Copy the Python scripts to the installation directory
 cp ./mpdvoldown.py ./mpdvolup.py ./volume.py "$installdir"
+# Shared modules the scripts import (symlinked here from ../../common)
+cp ./mpd_profiling.py ./mpd_volume.py "$installdir"
 # Change ownership to the selected user and group
 chown "$mpd_extended_user:$mpd_extended_group" "$installdir/mpdvoldown.py" "$installdir/mpdvolup.py" "$installdir/volume.py"
 # Make the Python scripts executable
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 
 """
-Adjust MPD volume using mpc command-line tool.
+Adjust MPD volume talking to MPD over a plain socket.
 
 This script allows you to adjust the volume of the Music Player Daemon (MPD) using the settings provided 
 in the 'volume.conf' configuration file. If the configuration file or its settings are not found, 
@@ -12,7 +12,7 @@ Usage:
 
 Arguments:
     direction   Direction to adjust the volume (up or down)
-    amount      Amount by which to adjust volume
+    amount      Amount by which to adjust volume (default: volUp/volDown from volume.conf)
 
 Examples:
     volume.py up 5      # Increase volume by 5 units
@@ -24,96 +24,27 @@ Note:
     the provided volume increase value.
 
 Dependencies:
-    - mpc command-line tool (https://musicpd.org/doc/html/user.html#mpc)
+    - None beyond Python 3: the shared mpd_volume.py speaks MPD's protocol itself
+      (this variant used to shell out to mpc for every call)
 """
 
-import os
 import sys
 import argparse
-import subprocess
-import configparser
 
-def read_config():
-    """
-    Function to read MPD configuration from volume.conf file.
-    
-    Returns:
-    - Dictionary containing MPD configuration.
-    """
-    config = configparser.ConfigParser()
-    volume_conf_path = os.path.expanduser("~/.config/mpd-scripts/volume/volume.conf")
-    if not os.path.isfile(volume_conf_path):
-        print(f"Error: MPD extended configuration file (volume.conf) not found at {volume_conf_path}")
-        sys.exit(1)
-
-    config.read(volume_conf_path)
-    mpd_config = {
-        'host': config['MPD'].get('host', 'localhost'),
-        'port': int(config['MPD'].get('port', '6600')),
-        'password': config['MPD'].get('password', ''),
-        'toggleMaxVolume': config['MPD-SCRIPTS'].getboolean('toggleMaxVolume', fallback=False),
-        'maxVolume': int(config['MPD-SCRIPTS'].get('maxVolume', 80))
-    }
-    return mpd_config
-
-def mpc_env(mpd_config):
-    """
-    Builds the environment mpc reads its connection settings from
-    (MPD_HOST/MPD_PORT), so volume.conf's host/port/password are actually
-    honored instead of silently falling back to mpc's own defaults. The
-    password travels via MPD_HOST's "password@host" form rather than a
-    -P/--password flag, so it doesn't show up in `ps` output.
-    """
-    env = os.environ.copy()
-    host = mpd_config['host']
-    env['MPD_HOST'] = f"{mpd_config['password']}@{host}" if mpd_config['password'] else host
-    env['MPD_PORT'] = str(mpd_config['port'])
-    return env
-
-def get_current_volume(env):
-    """Returns the current MPD volume percentage as an int, via `mpc volume`."""
-    output = subprocess.check_output(["mpc", "volume"], env=env).decode()
-    return int(output.split()[1].strip("%"))
+from mpd_profiling import profile_run
+from mpd_volume import run
 
 def main():
     # Parse command-line arguments
     parser = argparse.ArgumentParser(description='Adjust MPD volume.')
     parser.add_argument('direction', nargs='?', choices=['up', 'down'], help='Direction to adjust volume (up or down)')
-    parser.add_argument('amount', nargs='?', type=int, default=5, help='Amount by which to adjust volume')
+    parser.add_argument('amount', nargs='?', type=int, help='Amount by which to adjust volume')
     args = parser.parse_args()
 
-    # Read MPD server configuration from volume.conf
-    mpd_config = read_config()
-    toggle_max_volume = mpd_config['toggleMaxVolume']
-    max_volume = mpd_config['maxVolume']
-    env = mpc_env(mpd_config)
-
-    # If no arguments provided, show usage and current volume
-    if not args.direction:
-        try:
-            current_volume = get_current_volume(env)
-            print(f"usage: {sys.argv[0]} [-h] {{up,down}} [amount]\nCurrent volume: {current_volume}%")
-        except Exception as e:
-            print(f"Error: {e}")
-        sys.exit(0)
-
-    # Adjust volume based on command-line argument
-    try:
-        if args.direction == 'up':
-            if toggle_max_volume:
-                current_volume = get_current_volume(env)
-                new_volume = min(current_volume + args.amount, max_volume)
-                subprocess.run(["mpc", "volume", str(new_volume)], env=env)
-                print(f"Volume increased by {new_volume - current_volume} units.")
-            else:
-                subprocess.run(["mpc", "volume", f"+{args.amount}"], env=env)
-                print(f"Volume increased by {args.amount} units.")
-        elif args.direction == 'down':
-            subprocess.run(["mpc", "volume", f"-{args.amount}"], env=env)
-            print(f"Volume decreased by {args.amount} units.")
-    except Exception as e:
-        print(f"Error: {e}")
+    # With no direction, shows usage and the current volume
+    usage = f"usage: {sys.argv[0]} [-h] {{up,down}} [amount]"
+    sys.exit(run(args.direction, args.amount, usage, use_library=False))
 
 if __name__ == "__main__":
-    main()
-
+    with profile_run("volume"):
+        main()
@@ -93,6 +93,8 @@ echo "Install directory: $installdir"
 
 # Copy the Python scripts to the installation directory
 cp ./mpdvoldown.py ./mpdvolup.py ./volume.py "$installdir"
+# Shared modules the scripts import (symlinked here from ../../common)
+cp ./mpd_profiling.py ./mpd_volume.py "$installdir"
 # Change ownership to the selected user and group
 chown "$mpd_extended_user:$mpd_extended_group" "$installdir/mpdvoldown.py" "$installdir/mpdvolup.py" "$installdir/volume.py"
 # Make the Python scripts executable
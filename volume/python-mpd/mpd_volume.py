@@ -0,0 +1 @@
+../../common/mpd_volume.py
\ No newline at end of file
@@ -17,82 +17,28 @@ Examples:
     mpdvolup.py 5     # Increase volume by 5 units
     mpdvolup.py 10    # Increase volume by 10 units
 
+Note:
+    If the 'toggleMaxVolume' setting is enabled in the configuration file, the script ensures that the 
+    volume does not exceed the 'maxVolume' setting when increasing the volume. Otherwise, it respects 
+    the provided volume increase value.
+
 Dependencies:
-    - python-mpd library (https://python-mpd.readthedocs.io/en/latest/)
+    - python-mpd library (https://python-mpd.readthedocs.io/en/latest/), via the
+      shared mpd_volume.py, which falls back to a plain socket without it
 """
 
-
-import configparser
-import os
 import sys
-from mpd import MPDClient
 
-def read_config():
-    """
-    Function to read MPD configuration from volume.conf file.
-    
-    Returns:
-    - Dictionary containing MPD configuration.
-    """
-    config = configparser.ConfigParser()
-    volume_conf_path = os.path.expanduser("~/.config/mpd-scripts/volume/volume.conf")
-    if not os.path.isfile(volume_conf_path):
-        print(f"Error: MPD extended configuration file (volume.conf) not found at {volume_conf_path}")
-        sys.exit(1)
-
-    config.read(volume_conf_path)
-    mpd_config = {
-        'SERVER': config['MPD'].get('host', 'localhost'),
-        'MPD_PORT': int(config['MPD'].get('port', '6600')),
-        'MPDPASS': config['MPD'].get('password', ''),
-        'toggleMaxVolume': config['MPD-SCRIPTS'].getboolean('toggleMaxVolume', fallback=False),
-        'maxVolume': int(config['MPD-SCRIPTS'].get('maxVolume', 80))
-    }
-    return mpd_config
+from mpd_profiling import profile_run
+from mpd_volume import run
 
 def main():
-    # Read MPD server configuration from volume.conf
-    mpd_config = read_config()
-    mpd_server = mpd_config['SERVER']
-    mpd_port = mpd_config['MPD_PORT']
-    mpd_pass = mpd_config['MPDPASS']
-    toggle_max_volume = mpd_config['toggleMaxVolume']
-    max_volume = mpd_config['maxVolume']
-
-    # Connect to MPD server
-    client = MPDClient()
-    client.connect(mpd_server, mpd_port)
+    # If no arguments provided, show usage and current volume
+    if len(sys.argv) == 1:
+        sys.exit(run(None, usage=f"usage: {sys.argv[0]} [-h] [amount]", use_library=True))
 
-    # Authenticate
-    if mpd_pass:
-        client.password(mpd_pass)
-
-    # Parse command-line arguments
-    if len(sys.argv) > 1:
-        amount = int(sys.argv[1])
-    else:
-        # If no arguments are provided, show usage and current volume
-        current_volume = client.status().get('volume', 'Unknown')
-        print(f"Usage: {sys.argv[0]} [amount]\nCurrent volume: {current_volume}")
-        sys.exit(0)
-
-    # Increase volume
-    try:
-        if toggle_max_volume:
-            current_volume = int(client.status().get('volume', 0))
-            new_volume = min(current_volume + amount, max_volume)
-            client.setvol(new_volume)
-            print(f"Volume increased by {new_volume - current_volume} units.")
-        else:
-            client.volume(f'+{amount}')  # Increase volume by specified amount
-            print(f"Volume increased by {amount} units.")
-    except Exception as e:
-        print(f"Error: {e}")
-    
-    # Disconnect from MPD server
-    client.close()
-    client.disconnect()
+    sys.exit(run("up", int(sys.argv[1]), use_library=True))
 
 if __name__ == "__main__":
-    main()
-
+    with profile_run("mpdvolup"):
+        main()
@@ -12,7 +12,7 @@ Usage:
 
 Arguments:
     direction   Direction to adjust the volume (up or down)
-    amount      Amount by which to adjust volume
+    amount      Amount by which to adjust volume (default: volUp/volDown from volume.conf)
 
 Examples:
     volume.py up 5      # Increase volume by 5 units
@@ -24,80 +24,27 @@ Note:
     the provided volume increase value.
 
 Dependencies:
-    - python-mpd library (https://python-mpd.readthedocs.io/en/latest/)
+    - python-mpd library (https://python-mpd.readthedocs.io/en/latest/), via the
+      shared mpd_volume.py, which falls back to a plain socket without it
 """
 
-import os
 import sys
 import argparse
-from mpd import MPDClient
-import configparser
 
-def read_config():
-    """
-    Function to read MPD configuration from volume.conf file.
-    
-    Returns:
-    - Dictionary containing MPD configuration.
-    """
-    config = configparser.ConfigParser()
-    volume_conf_path = os.path.expanduser("~/.config/mpd-scripts/volume/volume.conf")
-    if not os.path.isfile(volume_conf_path):
-        print(f"Error: MPD extended configuration file (volume.conf) not found at {volume_conf_path}")
-        sys.exit(1)
-
-    config.read(volume_conf_path)
-    mpd_config = {
-        'volUp': int(config['MPD-SCRIPTS'].get('volUp', 5)),
-        'volDown': int(config['MPD-SCRIPTS'].get('volDown', 5)),
-        'toggleMaxVolume': config['MPD-SCRIPTS'].getboolean('toggleMaxVolume', fallback=False),
-        'maxVolume': int(config['MPD-SCRIPTS'].get('maxVolume', 80)),
-        'host': config['MPD'].get('HOST', 'localhost'),
-        'port': int(config['MPD'].get('PORT', '6600')),
-        'password': config['MPD'].get('PASSWORD', '')
-    }
-    return mpd_config
+from mpd_profiling import profile_run
+from mpd_volume import run
 
 def main():
     # Parse command-line arguments
     parser = argparse.ArgumentParser(description='Adjust MPD volume.')
     parser.add_argument('direction', nargs='?', choices=['up', 'down'], help='Direction to adjust volume (up or down)')
-    parser.add_argument('amount', nargs='?', type=int, default=5, help='Amount by which to adjust volume')
+    parser.add_argument('amount', nargs='?', type=int, help='Amount by which to adjust volume')
     args = parser.parse_args()
 
-    # Read MPD configuration from volume.conf
-    mpd_config = read_config()
-    host = mpd_config['host']
-    port = mpd_config['port']
-    password = mpd_config['password']
-
-    # Connect to MPD server
-    client = MPDClient()
-    client.connect(host, port)
-
-    # Authenticate if password is provided
-    if password:
-        client.password(password)
-
-    # Get current volume
-    current_volume = client.status().get('volume', 'Unknown')
-
-    # If no arguments provided, show usage and current volume
-    if not args.direction:
-        print(f"usage: {sys.argv[0]} [-h] {{up,down}} [amount]\nCurrent volume: {current_volume}")
-        sys.exit(0)
-
-    # Adjust volume based on command-line argument
-    if args.direction == 'up':
-        client.volume(f'+{args.amount}')  # Increase volume by specified amount
-        print(f"Volume increased by {args.amount} units.")
-    elif args.direction == 'down':
-        client.volume(f'-{args.amount}')  # Decrease volume by specified amount
-        print(f"Volume decreased by {args.amount} units.")
-
-    # Disconnect from MPD server
-    client.close()
-    client.disconnect()
+    # With no direction, shows usage and the current volume
+    usage = f"usage: {sys.argv[0]} [-h] {{up,down}} [amount]"
+    sys.exit(run(args.direction, args.amount, usage, use_library=True))
 
 if __name__ == "__main__":
-    main()
+    with profile_run("volume"):
+        main()